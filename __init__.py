@@ -3,12 +3,35 @@ from flask_login import LoginManager
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask_socketio import SocketIO
 from dotenv import load_dotenv
+import importlib
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
+def optional_import(name, needed_for):
+    """
+    Imports a dependency that only one subsystem uses, at the point of use, so workers that never reach it do not pay
+    for loading it. The slim install profile (requirements-slim.txt) leaves these packages out, the full one
+    (requirements.txt) has all of them. The module name must be the name of its pip package.
+
+    Args:
+        name (str): The module to import, for example "boto3".
+        needed_for (str): The feature that needs it, used in the error message.
+
+    Returns:
+        module: The imported module.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise RuntimeError(
+            f"{needed_for} requires the {name} package: pip install {name}, or install requirements.txt, which includes "
+            "every optional package, instead of requirements-slim.txt"
+        )
+
 # Setup of key Flask object (app)
 app = Flask(__name__)
 
@@ -17,7 +40,8 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 
 # Allowed servers for cross-origin resource sharing (CORS), these are GitHub Pages and localhost for GitHub Pages testing
-cors = CORS(app, supports_credentials=True, origins=['http://localhost:4887', 'http://127.0.0.1:4887', 'https://illuminati1618.github.io'])
+cors_origins = ['http://localhost:4887', 'http://127.0.0.1:4887', 'https://illuminati1618.github.io']
+cors = CORS(app, supports_credentials=True, origins=cors_origins)
 
 # System Defaults
 app.config['ADMIN_USER'] = os.environ.get('ADMIN_USER') or 'admin'
@@ -57,8 +81,20 @@ app.config['DB_USERNAME'] = DB_USERNAME
 app.config['DB_PASSWORD'] = DB_PASSWORD
 app.config['SQLALCHEMY_DATABASE_NAME'] = dbName
 app.config['SQLALCHEMY_DATABASE_STRING'] = dbString
-app.config['SQLALCHEMY_DATABASE_URI'] = dbURI
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI') or dbURI  # override, for example a test database
 app.config['SQLALCHEMY_BACKUP_URI'] = backupURI
+app.config['BACKUP_COMPRESSION'] = os.environ.get('BACKUP_COMPRESSION') or 'gzip'  # 'none', 'gzip' or 'zstd' (needs zstandard)
+app.config['BACKUP_BATCH_SIZE'] = int(os.environ.get('BACKUP_BATCH_SIZE') or 1000)  # rows fetched per round trip while exporting
+app.config['BACKUP_SQLITE_PAGES'] = int(os.environ.get('BACKUP_SQLITE_PAGES') or 256)  # pages per online backup step, writers run between steps
+app.config['BACKUP_SNAPSHOT_DIR'] = os.environ.get('BACKUP_SNAPSHOT_DIR') or None  # defaults to a snapshots folder next to the backup
+app.config['BACKUP_SNAPSHOT_KEEP'] = int(os.environ.get('BACKUP_SNAPSHOT_KEEP') or 7)  # timestamped SQLite snapshots kept, 0 disables
+app.config['BACKUP_WORKERS'] = int(os.environ.get('BACKUP_WORKERS') or 4)  # parallel connections for the logical dump and load
+app.config['BACKUP_LOAD_ATOMIC'] = (os.environ.get('BACKUP_LOAD_ATOMIC') or 'true').lower() == 'true'  # 'false' loads the real tables directly, skipping the staging copy
+app.config['BACKUP_DUMP_FORMAT'] = os.environ.get('BACKUP_DUMP_FORMAT') or 'ndjson'  # 'ndjson' or 'csv'
+app.config['BACKUP_S3_BUCKET'] = os.environ.get('BACKUP_S3_BUCKET') or None  # upload logical dumps here when set
+app.config['BACKUP_S3_PREFIX'] = os.environ.get('BACKUP_S3_PREFIX') or 'backups'
+app.config['BACKUP_FULL_EVERY'] = int(os.environ.get('BACKUP_FULL_EVERY') or 7)  # incremental backups before a new full base
+app.config['BACKUP_CDC_GRACE'] = float(os.environ.get('BACKUP_CDC_GRACE') or 60)  # seconds a change log gap may still be an uncommitted transaction
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
@@ -66,8 +102,58 @@ migrate = Migrate(app, db)
 # Image upload settings 
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # maximum size of uploaded content
 app.config['UPLOAD_EXTENSIONS'] = ['.jpg', '.png', '.gif']  # supported file types
-app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')  # created by main.create_app()
+# Internal nginx location for /uploads, when set Flask only authorizes and nginx sends the file (see flocker_nginx_file)
+app.config['UPLOAD_ACCEL_REDIRECT'] = os.environ.get('UPLOAD_ACCEL_REDIRECT') or None
+
+# Realtime (Socket.IO) settings
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+app.config['PRESENCE_BACKEND'] = os.environ.get('PRESENCE_BACKEND') or 'memory'  # 'memory' or 'redis'
+app.config['PRESENCE_KEY_PREFIX'] = os.environ.get('PRESENCE_KEY_PREFIX') or 'flocker'
+app.config['SOCKETIO_ASYNC_MODE'] = os.environ.get('SOCKETIO_ASYNC_MODE') or 'threading'  # eventlet, gevent or threading, the same default as server.py and gunicorn.conf.py
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None  # e.g. redis://localhost:6379/0
+app.config['CHAT_HISTORY_SIZE'] = int(os.environ.get('CHAT_HISTORY_SIZE') or 50)  # messages kept per room for join backfill
+app.config['CHAT_HISTORY_FLUSH_INTERVAL'] = float(os.environ.get('CHAT_HISTORY_FLUSH_INTERVAL') or 1.0)  # seconds between batched writes
+app.config['CHAT_HISTORY_FLUSH_BATCH'] = int(os.environ.get('CHAT_HISTORY_FLUSH_BATCH') or 500)  # rows per insert statement
+app.config['CHAT_HISTORY_MAX_PENDING'] = int(os.environ.get('CHAT_HISTORY_MAX_PENDING') or 10000)  # unsaved messages kept while writes fail
+app.config['CHAT_BATCH_INTERVAL_MS'] = int(os.environ.get('CHAT_BATCH_INTERVAL_MS') or 0)  # frame interval, 0 emits every event immediately
+app.config['CHAT_BATCH_MAX_MESSAGES'] = int(os.environ.get('CHAT_BATCH_MAX_MESSAGES') or 100)  # messages per frame
+app.config['CHAT_MAX_MESSAGE_LENGTH'] = int(os.environ.get('CHAT_MAX_MESSAGE_LENGTH') or 2000)  # characters per message
+app.config['CHAT_RATE_PER_CONNECTION'] = float(os.environ.get('CHAT_RATE_PER_CONNECTION') or 2)  # messages per second, 0 disables
+app.config['CHAT_BURST_PER_CONNECTION'] = int(os.environ.get('CHAT_BURST_PER_CONNECTION') or 10)
+app.config['CHAT_RATE_PER_ROOM'] = float(os.environ.get('CHAT_RATE_PER_ROOM') or 50)  # messages per second, 0 disables
+app.config['CHAT_BURST_PER_ROOM'] = int(os.environ.get('CHAT_BURST_PER_ROOM') or 200)
+app.config['CHAT_RATE_MAX_ROOMS'] = int(os.environ.get('CHAT_RATE_MAX_ROOMS') or 10000)  # room buckets kept, clients pick room names
+app.config['CHAT_SLOW_CONSUMER_QUEUE'] = int(os.environ.get('CHAT_SLOW_CONSUMER_QUEUE') or 500)  # queued packets per client, 0 disables
+app.config['CHAT_SLOW_CONSUMER_INTERVAL'] = float(os.environ.get('CHAT_SLOW_CONSUMER_INTERVAL') or 2.0)  # seconds between checks
+app.config['CHAT_SLOW_CONSUMER_ACTION'] = os.environ.get('CHAT_SLOW_CONSUMER_ACTION') or 'disconnect'  # 'drop' or 'disconnect'
+app.config['AVATAR_CACHE_SIZE'] = int(os.environ.get('AVATAR_CACHE_SIZE') or 10000)  # users kept in the chat avatar cache
+app.config['AVATAR_CACHE_TTL'] = float(os.environ.get('AVATAR_CACHE_TTL') or 300)  # seconds, bounds staleness across workers
+app.config['LEADERBOARD_SIZE'] = int(os.environ.get('LEADERBOARD_SIZE') or 10)  # players in each leaderboard broadcast
+app.config['LEADERBOARD_BROADCAST_INTERVAL'] = float(os.environ.get('LEADERBOARD_BROADCAST_INTERVAL') or 1.0)  # seconds
+app.config['TIME_TRACK_FLUSH_INTERVAL'] = float(os.environ.get('TIME_TRACK_FLUSH_INTERVAL') or 5.0)  # seconds between bulk inserts of time tracking beacons
+app.config['TIME_TRACK_FLUSH_BATCH'] = int(os.environ.get('TIME_TRACK_FLUSH_BATCH') or 1000)  # rows per insert statement
+app.config['LANGUAGE_RANKING_SIZE'] = int(os.environ.get('LANGUAGE_RANKING_SIZE') or 50)  # languages served by /api/languagemet
+app.config['LANGUAGE_RANKING_TTL'] = float(os.environ.get('LANGUAGE_RANKING_TTL') or 5)  # seconds a worker serves its cached ranking
+app.config['METRICS_MULTIPROC_DIR'] = os.environ.get('METRICS_MULTIPROC_DIR') or None  # shared by gunicorn workers so /metrics covers all of them
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN') or None  # bearer token required by /metrics when set
+app.config['QUERY_WATCH'] = (os.environ.get('QUERY_WATCH') or 'false').lower() == 'true'  # count and fingerprint SQL per request
+app.config['QUERY_WATCH_SLOW_MS'] = float(os.environ.get('QUERY_WATCH_SLOW_MS') or 100)  # statements slower than this are logged with EXPLAIN
+app.config['QUERY_WATCH_REPEAT'] = int(os.environ.get('QUERY_WATCH_REPEAT') or 5)  # same statement shape this often in one request is an N+1
+app.config['QUERY_BUDGET'] = int(os.environ.get('QUERY_BUDGET') or 0)  # max statements per request, 0 for no budget
+app.config['QUERY_WATCH_RAISE'] = (os.environ.get('QUERY_WATCH_RAISE') or 'false').lower() == 'true'  # raise instead of log on overrun, for tests
+app.config['ASYNC_DATABASE_URI'] = os.environ.get('ASYNC_DATABASE_URI') or None  # engine of the asgi.py read endpoints, derived from the database settings when unset
+app.config['ASYNC_DB_POOL_SIZE'] = int(os.environ.get('ASYNC_DB_POOL_SIZE') or 20)  # connections per asgi.py worker (MySQL)
+app.config['ASGI_WSGI_THREADS'] = int(os.environ.get('ASGI_WSGI_THREADS') or 10)  # threads running the other Flask routes under asgi.py
+
+# Single Socket.IO server for the whole app, handlers are registered in main.py and api/chat.py
+# A message queue lets emits from any worker or node reach clients connected to the others
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+    message_queue=app.config['SOCKETIO_MESSAGE_QUEUE']
+)
 
 # GITHUB settings
 app.config['GITHUB_API_URL'] = 'https://api.github.com'
@@ -0,0 +1,155 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from __init__ import app, cors_origins, db
+from model.user import User
+from model.post import Post
+from model.channel import Channel
+from model.pfp import pfp_base64_decode
+
+"""
+Async versions of the read-heavy endpoints, served by asgi.py in front of the Flask app.
+
+Under the sync workers a slow query holds a whole worker (or thread) until it returns. Here every request is a
+coroutine on one event loop and the queries go through an async engine, so a worker keeps serving while they wait.
+
+The handlers return the same bodies and status codes as their flask_restful counterparts in api/user.py, api/post.py
+and api/pfp.py, including the token_required errors, and read with Core selects so nothing is lazy loaded.
+"""
+
+# Async drivers used in place of the sync ones when ASYNC_DATABASE_URI is not set
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+aiomysql'}
+
+engine = None
+
+def async_url():
+    if app.config['ASYNC_DATABASE_URI']:
+        return app.config['ASYNC_DATABASE_URI']
+    with app.app_context():
+        url = db.engine.url  # resolved by Flask-SQLAlchemy, sqlite paths are relative to the instance folder
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+async def startup():
+    global engine
+    url = async_url()
+    options = {} if str(url).startswith('sqlite') else {'pool_size': app.config['ASYNC_DB_POOL_SIZE'], 'pool_recycle': 3600}
+    engine = create_async_engine(url, **options)
+
+async def shutdown():
+    if engine is not None:
+        await engine.dispose()
+
+def user_json(user):
+    # Same keys as User.read()
+    return {
+        "id": user.id,
+        "uid": user._uid,
+        "name": user._name,
+        "email": user._email,
+        "role": user._role,
+        "pfp": user._pfp,
+        "car": user._car,
+        "interests": user._interests,
+        "followers": user._followers
+    }
+
+async def current_user(connection, cookies):
+    """
+    Async counterpart of token_required, returns (user row, None) or (None, (error body, status)).
+    """
+    morsel = cookies.get(app.config["JWT_TOKEN_NAME"])
+    if not morsel:
+        return None, ({"message": "Token is missing", "error": "Unauthorized"}, 401)
+    try:
+        data = jwt.decode(morsel.value, app.config["SECRET_KEY"], algorithms=["HS256"])
+        user = (await connection.execute(select(User.__table__).where(User._uid == data["_uid"]))).first()
+        if not user:
+            return None, ({"message": "User not found", "error": "Unauthorized", "data": data}, 401)
+        return user, None
+    except jwt.ExpiredSignatureError:
+        return None, ({"message": "Token has expired", "error": "Unauthorized"}, 401)
+    except jwt.InvalidTokenError:
+        return None, ({"message": "Invalid token", "error": "Unauthorized"}, 401)
+    except Exception as e:
+        return None, ({"message": "An error occurred", "error": str(e)}, 500)
+
+async def get_id(connection, user):
+    return user_json(user), 200
+
+async def get_users(connection, user):
+    users = (await connection.execute(select(User.__table__))).all()
+    json_ready = []
+    for row in users:
+        user_data = user_json(row)
+        user_data['access'] = ['rw'] if user._role == 'Admin' or user.id == row.id else ['ro']
+        json_ready.append(user_data)
+    return json_ready, 200
+
+async def get_following(connection, user):
+    following = (await connection.execute(select(User._uid).where(User._followers.contains(user._uid)))).scalars().all()
+    if not following:
+        return {'message': 'No users found that you are following'}, 404
+    return list(following), 200
+
+async def get_posts(connection, user):
+    # One join instead of the two lookups per post made by Post.read()
+    posts = await connection.execute(
+        select(Post.id, Post._title, Post._comment, Post._content,
+               User._name.label('user_name'), Channel.name.label('channel_name'))
+        .outerjoin(User, User.id == Post._user_id)
+        .outerjoin(Channel, Channel.id == Post._channel_id)
+    )
+    return [{
+        "id": post.id,
+        "title": post._title,
+        "comment": post._comment,
+        "content": post._content,
+        "user_name": post.user_name,
+        "channel_name": post.channel_name
+    } for post in posts], 200
+
+async def get_pfp(connection, user):
+    if not user._pfp:
+        return {'message': 'Profile picture is not set.'}, 404
+    # File reads block, run them on the default thread pool
+    base64_encode = await asyncio.to_thread(pfp_base64_decode, user._uid, user._pfp)
+    if not base64_encode:
+        return {'message': 'An error occurred while reading the profile picture.'}, 500
+    return {'pfp': base64_encode}, 200
+
+# GET paths served here, with whether they require the JWT cookie
+routes = {
+    '/api/id': (get_id, True),
+    '/api/users': (get_users, True),
+    '/api/following': (get_following, True),
+    '/api/posts': (get_posts, False),
+    '/api/id/pfp': (get_pfp, True),
+}
+
+async def respond(send, status, body, origin):
+    payload = json.dumps(body).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    if origin in cors_origins:
+        # Same policy as the flask_cors setup in __init__.py
+        headers += [(b'access-control-allow-origin', origin.encode()), (b'access-control-allow-credentials', b'true'), (b'vary', b'Origin')]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def handle(scope, receive, send):
+    """
+    Serves one GET request for a path in routes.
+    """
+    handler, authenticated = routes[scope['path']]
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    origin = headers.get('origin')
+    async with engine.connect() as connection:
+        user = None
+        if authenticated:
+            user, error = await current_user(connection, SimpleCookie(headers.get('cookie', '')))
+            if error:
+                return await respond(send, error[1], error[0], origin)
+        body, status = await handler(connection, user)
+    await respond(send, status, body, origin)
@@ -0,0 +1,114 @@
+import threading
+
+class RoomBroadcaster:
+    """
+    Per-room outbound scheduler for the chat Socket.IO events.
+
+    Instead of emitting every message and presence change as it happens, handlers queue them here. Every interval
+    a background task sends at most one "message_batch" frame (a list of messages) and one "presence_diff" frame
+    ({"joined": [...], "left": [...]}) to each room that changed. A user who joins and leaves within the same
+    interval cancels out, so a burst of joins at class start costs one small frame per room instead of one full
+    online list per join.
+
+    With an interval of 0 the broadcaster is disabled and callers emit immediately, as before.
+    """
+    def __init__(self, socketio, interval_ms=0, max_batch=100):
+        """
+        Args:
+            socketio (SocketIO): The Flask-SocketIO server used to emit and run the background task.
+            interval_ms (int): Milliseconds between frames, 0 disables batching.
+            max_batch (int): The maximum number of messages sent in one frame, the rest wait for the next frame.
+        """
+        self.socketio = socketio
+        self.interval = interval_ms / 1000.0
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._messages = {}
+        self._joined = {}
+        self._left = {}
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def queue_message(self, room, message):
+        """
+        Queues a message for the room's next frame.
+
+        Args:
+            room (str): The room name.
+            message (dict): The message payload.
+        """
+        with self._lock:
+            self._messages.setdefault(room, []).append(message)
+        self._start()
+
+    def user_joined(self, room, username):
+        """
+        Records a join in the room's next presence diff, cancelling a pending leave of the same user.
+        """
+        with self._lock:
+            left = self._left.get(room)
+            if left and username in left:
+                left.discard(username)
+            else:
+                self._joined.setdefault(room, set()).add(username)
+        self._start()
+
+    def user_left(self, room, username):
+        """
+        Records a leave in the room's next presence diff, cancelling a pending join of the same user.
+        """
+        with self._lock:
+            joined = self._joined.get(room)
+            if joined and username in joined:
+                joined.discard(username)
+            else:
+                self._left.setdefault(room, set()).add(username)
+        self._start()
+
+    def _start(self):
+        if self._task is None:
+            with self._lock:
+                if self._task is None:
+                    self._task = self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            self.flush()
+
+    def _take(self):
+        """
+        Swaps out the pending state so frames are built without holding the lock.
+        """
+        with self._lock:
+            messages, joined, left = self._messages, self._joined, self._left
+            self._joined, self._left = {}, {}
+            self._messages = {}
+            for room, pending in messages.items():
+                if len(pending) > self.max_batch:
+                    self._messages[room] = pending[self.max_batch:]
+                    messages[room] = pending[:self.max_batch]
+        return messages, joined, left
+
+    def flush(self):
+        """
+        Emits one frame per changed room.
+
+        Returns:
+            int: The number of frames emitted.
+        """
+        messages, joined, left = self._take()
+        frames = 0
+        for room in set(joined) | set(left):
+            diff = {"joined": sorted(joined.get(room, ())), "left": sorted(left.get(room, ()))}
+            if diff["joined"] or diff["left"]:
+                self.socketio.emit("presence_diff", diff, room=room)
+                frames += 1
+        for room, batch in messages.items():
+            if batch:
+                self.socketio.emit("message_batch", batch, room=room)
+                frames += 1
+        return frames
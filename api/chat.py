@@ -0,0 +1,131 @@
+import threading
+from flask import request
+from flask_socketio import emit, join_room, leave_room
+from datetime import datetime
+from __init__ import app, socketio
+from model.presence import presence_store
+from model.message import chat_history
+from api.broadcast import RoomBroadcaster
+from api.ratelimit import RateLimiter, SlowConsumerMonitor
+from model.avatar import avatar_cache
+
+"""
+Chat Socket.IO handlers, registered once on the shared socketio object when main.py imports this module.
+"""
+
+# Coalesce room broadcasts into frames, CHAT_BATCH_INTERVAL_MS=0 keeps immediate per-event emits
+broadcaster = RoomBroadcaster(socketio, interval_ms=app.config['CHAT_BATCH_INTERVAL_MS'], max_batch=app.config['CHAT_BATCH_MAX_MESSAGES'])
+
+# One noisy client or room must not degrade latency for everyone else
+connection_limiter = RateLimiter(app.config['CHAT_RATE_PER_CONNECTION'], app.config['CHAT_BURST_PER_CONNECTION'])
+room_limiter = RateLimiter(app.config['CHAT_RATE_PER_ROOM'], app.config['CHAT_BURST_PER_ROOM'], max_keys=app.config['CHAT_RATE_MAX_ROOMS'])
+slow_consumers = SlowConsumerMonitor(
+    socketio,
+    threshold=app.config['CHAT_SLOW_CONSUMER_QUEUE'],
+    interval=app.config['CHAT_SLOW_CONSUMER_INTERVAL'],
+    action=app.config['CHAT_SLOW_CONSUMER_ACTION']
+)
+
+# Rooms each connection joined, so a client that disconnects without "leave" is taken off the online lists
+memberships = {}
+memberships_lock = threading.Lock()
+
+def get_avatar(username):
+    # Served from the avatar cache, the database is only queried on a miss
+    return avatar_cache.get(username)
+
+@socketio.on("join")
+def handle_join(data):
+    username = data["username"]
+    room = data["room"]
+    join_room(room)
+    slow_consumers.start()
+    with memberships_lock:
+        memberships.setdefault(request.sid, set()).add((room, username))
+
+    # Add user to room's online list
+    presence_store.add_user(room, username)
+
+    # Resolve everyone in the room up front so message fan-out stays in memory
+    avatar_cache.prefetch(presence_store.get_users(room))
+
+    # Backfill the joining client from the room's in-memory history
+    emit("history", chat_history.recent(room))
+
+    if broadcaster.enabled:
+        # The joining client gets the full list once, the room only gets the diff
+        emit("online_users", presence_store.get_users(room))
+        broadcaster.user_joined(room, username)
+        return
+
+    # Notify room
+    emit("message", {
+        "username": "System",
+        "msg": f"{username} has joined the room.",
+        "timestamp": datetime.now().strftime("%H:%M"),
+        "avatar": ""
+    }, room=room)
+
+    # Send updated online user list
+    emit("online_users", presence_store.get_users(room), room=room)
+
+@socketio.on("send_message")
+def handle_send_message(data):
+    username = data["username"]
+    room = data["room"]
+    msg = data["msg"]
+
+    if not isinstance(msg, str) or not msg or len(msg) > app.config['CHAT_MAX_MESSAGE_LENGTH']:
+        emit("error", {"message": f"Message must be 1 to {app.config['CHAT_MAX_MESSAGE_LENGTH']} characters"})
+        return
+    if not connection_limiter.allow(request.sid) or not room_limiter.allow(room):
+        emit("rate_limited", {"message": "Too many messages, slow down", "room": room})
+        return
+
+    message = {
+        "username": username,
+        "msg": msg,
+        "timestamp": datetime.now().strftime("%H:%M"),
+        "avatar": get_avatar(username)
+    }
+    chat_history.record(room, message)
+    if broadcaster.enabled:
+        broadcaster.queue_message(room, message)
+    else:
+        emit("message", message, room=room)
+
+@socketio.on("leave")
+def handle_leave(data):
+    username = data["username"]
+    room = data["room"]
+    leave_room(room)
+    with memberships_lock:
+        memberships.get(request.sid, set()).discard((room, username))
+    announce_leave(room, username)
+
+def announce_leave(room, username):
+    """
+    Removes a user from a room's online list and tells the room.
+    """
+    presence_store.remove_user(room, username)
+
+    if broadcaster.enabled:
+        broadcaster.user_left(room, username)
+        return
+
+    emit("message", {
+        "username": "System",
+        "msg": f"{username} has left the room.",
+        "timestamp": datetime.now().strftime("%H:%M"),
+        "avatar": ""
+    }, room=room)
+
+    emit("online_users", presence_store.get_users(room), room=room)
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    connection_limiter.forget(request.sid)
+    with memberships_lock:
+        joined = memberships.pop(request.sid, set())
+    for room, username in joined:
+        announce_leave(room, username)
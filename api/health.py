@@ -0,0 +1,163 @@
+import os
+import shutil
+import socket
+import tempfile
+import time
+from flask import Blueprint, jsonify
+from flask_restful import Api, Resource
+from sqlalchemy import text
+from __init__ import app, db, optional_import
+from api.jwt_authorize import admin_only
+from api.stats import request_stats
+
+"""
+Health endpoints for the load balancer and the admin health page.
+
+- /api/health/live: the process is up, never touches the database.
+- /api/health/ready: timed probes of the database, the upload folder and the Socket.IO backend, 503 if one fails.
+- /api/health/stats: per-endpoint request counts and latency percentiles of this worker.
+- /api/health: host CPU, disk, RAM and network for templates/uhealth.html, plus readiness and stats.
+"""
+health_api = Blueprint('health_api', __name__, url_prefix='/api')
+api = Api(health_api)
+
+def timed(probe):
+    """
+    Runs a probe and returns its status and duration, a probe signals failure by raising.
+    """
+    started = time.perf_counter()
+    try:
+        detail = probe()
+        status = 'skipped' if detail == 'skipped' else 'ok'
+        result = {'status': status}
+    except Exception as e:
+        result = {'status': 'error', 'error': str(e)}
+    result['ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+def probe_database():
+    db.session.execute(text('SELECT 1'))
+    db.session.rollback()
+
+def probe_uploads():
+    with tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], prefix='.health-'):
+        pass
+
+def probe_socketio_backend():
+    urls = {app.config['SOCKETIO_MESSAGE_QUEUE']}
+    if app.config['PRESENCE_BACKEND'] == 'redis':
+        urls.add(app.config['REDIS_URL'])
+    urls = [url for url in urls if url and url.startswith('redis')]
+    if not urls:
+        return 'skipped'  # single process Socket.IO, nothing external to reach
+    redis = optional_import('redis', 'A redis Socket.IO backend')
+    for url in urls:
+        redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1).ping()
+
+def readiness():
+    checks = {
+        'database': timed(probe_database),
+        'uploads': timed(probe_uploads),
+        'socketio': timed(probe_socketio_backend)
+    }
+    ready = all(check['status'] != 'error' for check in checks.values())
+    return ready, checks
+
+def cpu_times():
+    with open('/proc/stat') as stat:
+        fields = [int(value) for value in stat.readline().split()[1:]]
+    user, nice, system, idle = fields[0], fields[1], fields[2], fields[3] + fields[4]
+    return user + nice, system, idle, sum(fields)
+
+class HostSampler:
+    """
+    Reads host usage from /proc, CPU percentages are computed against the previous sample.
+    """
+    def __init__(self):
+        self._last_cpu = None
+
+    def cpu(self):
+        try:
+            current = cpu_times()
+        except OSError:
+            return {'user': 0, 'system': 0, 'idle': 100}
+        previous = self._last_cpu or (0, 0, 0, 0)
+        self._last_cpu = current
+        user, system, idle, total = (now - before for now, before in zip(current, previous))
+        total = total or 1
+        return {
+            'user': round(user * 100 / total, 1),
+            'system': round(system * 100 / total, 1),
+            'idle': round(idle * 100 / total, 1)
+        }
+
+    def ram(self):
+        info = {}
+        try:
+            with open('/proc/meminfo') as meminfo:
+                for line in meminfo:
+                    key, value = line.split(':', 1)
+                    info[key] = int(value.split()[0]) // 1024
+        except OSError:
+            return {'total': '0 MB', 'used': '0 MB', 'free': '0 MB'}
+        total = info.get('MemTotal', 0)
+        free = info.get('MemAvailable', info.get('MemFree', 0))
+        return {'total': f'{total} MB', 'used': f'{total - free} MB', 'free': f'{free} MB'}
+
+    def disk(self):
+        usage = shutil.disk_usage(app.instance_path)
+        gb = 1024 ** 3
+        return [{
+            'filesystem': app.instance_path,
+            'size': f'{usage.total / gb:.1f}G',
+            'used': f'{usage.used / gb:.1f}G',
+            'avail': f'{usage.free / gb:.1f}G',
+            'use%': f'{usage.used * 100 / usage.total:.0f}%' if usage.total else '0%'
+        }]
+
+    def network(self):
+        try:
+            import psutil  # optional, only used for interface addresses
+            return [
+                {'interface': name, 'addresses': [address.address for address in addresses]}
+                for name, addresses in psutil.net_if_addrs().items()
+            ]
+        except ImportError:
+            return [{'interface': name, 'addresses': []} for _, name in socket.if_nameindex()]
+
+
+host = HostSampler()
+
+class HealthAPI:
+    class _Live(Resource):
+        def get(self):
+            return {'status': 'ok', 'pid': os.getpid()}, 200
+
+    class _Ready(Resource):
+        def get(self):
+            ready, checks = readiness()
+            return {'status': 'ok' if ready else 'unavailable', 'checks': checks}, 200 if ready else 503
+
+    class _Stats(Resource):
+        @admin_only
+        def get(self):
+            return jsonify(request_stats.read())
+
+    class _Health(Resource):
+        @admin_only
+        def get(self):
+            ready, checks = readiness()
+            return jsonify({
+                'cpu': host.cpu(),
+                'disk': host.disk(),
+                'ram': host.ram(),
+                'network': host.network(),
+                'ready': ready,
+                'checks': checks,
+                'stats': request_stats.read()
+            })
+
+api.add_resource(HealthAPI._Live, '/health/live')
+api.add_resource(HealthAPI._Ready, '/health/ready')
+api.add_resource(HealthAPI._Stats, '/health/stats')
+api.add_resource(HealthAPI._Health, '/health')
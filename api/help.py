@@ -0,0 +1,135 @@
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, g
+from flask_login import current_user
+from flask_restful import Api, Resource
+from flask_socketio import join_room
+from __init__ import socketio
+from api.jwt_authorize import admin_only, token_required
+from model.help import HelpRequest
+
+"""
+Help request queue for templates/uhelp.html.
+
+Polling is cheap: GET answers 304 when the If-None-Match header carries the current ETag, which costs one indexed
+aggregate query, and a since cursor returns only requests changed after the previous poll. Admin pages that join the
+"help_admins" Socket.IO room also get a "help_request" event for every change and only need to poll as a fallback.
+"""
+help_api = Blueprint('help_api', __name__, url_prefix='/api')
+api = Api(help_api)
+
+HELP_ROOM = 'help_admins'
+
+def notify(help_request):
+    socketio.emit('help_request', help_request.read(), to=HELP_ROOM)
+
+def parse_cursor(cursor):
+    """
+    Parses an X-Help-Cursor value, "<ISO timestamp>,<id>", into a (datetime, id) tuple, None when absent.
+
+    A bare timestamp, as sent by pages loaded before ids were added to the cursor, is read with id 0.
+    """
+    if not cursor:
+        return None
+    changed_at, _, last_id = cursor.partition(',')
+    return datetime.fromisoformat(changed_at), int(last_id or 0)
+
+@token_required()
+def create_as_user(body):
+    help_request = HelpRequest(body['message'], user_id=g.current_user.id).create()
+    notify(help_request)
+    return help_request.read(), 201
+
+class HelpAPI:
+    class _Queue(Resource):
+        @admin_only
+        def get(self):
+            """
+            Returns the queue oldest first, or only changes when since is given.
+
+            Query parameters:
+            - status: only requests in this state, for example Pending.
+            - since: the cursor returned by the previous poll (X-Help-Cursor header), changes include deletions.
+            - limit: between 1 and 500, defaults to 200.
+            """
+            status = request.args.get('status')
+            etag = f"{HelpRequest.version()}-{status or ''}"  # werkzeug quotes it in the header
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            try:
+                since = parse_cursor(request.args.get('since'))
+            except ValueError:
+                return {'message': 'since must be a cursor from X-Help-Cursor'}, 400
+            limit = min(max(request.args.get('limit', 200, type=int), 1), 500)
+
+            help_requests = HelpRequest.queue(status=status, since=since, limit=limit)
+            response = jsonify([help_request.read() for help_request in help_requests])
+            response.set_etag(etag)
+            if help_requests and since is not None:
+                # Sorted by the cursor order, the last one is the newest change
+                last = help_requests[-1]
+                since = (last._updated_at, last.id)
+            elif help_requests:
+                since = max((help_request._updated_at, help_request.id) for help_request in help_requests)
+            if since:
+                response.headers['X-Help-Cursor'] = f"{since[0].isoformat()},{since[1]}"
+            return response
+
+        def post(self):
+            """
+            Creates a help request, admins on the console may create one for any user, other users for themselves.
+            """
+            body = request.get_json(silent=True) or {}
+            if not body.get('message'):
+                return {'message': 'Message is required'}, 400
+            if not (current_user.is_authenticated and current_user.role == 'Admin'):
+                return create_as_user(body)
+            try:
+                user_id = int(body['user_id']) if body.get('user_id') not in (None, '') else None
+            except ValueError:
+                return {'message': 'user_id must be an integer'}, 400
+            help_request = HelpRequest(
+                body['message'],
+                response=body.get('response') or '',
+                status=body.get('status') or 'Pending',
+                user_id=user_id
+            ).create()
+            notify(help_request)
+            return help_request.read(), 201
+
+        @admin_only
+        def put(self):
+            body = request.get_json(silent=True) or {}
+            help_request = HelpRequest.query.get(body.get('id'))
+            if help_request is None or help_request._deleted:
+                return {'message': 'Help request not found'}, 404
+            try:
+                help_request.update(body)
+            except ValueError:
+                return {'message': 'user_id must be an integer'}, 400
+            notify(help_request)
+            return help_request.read(), 200
+
+        @admin_only
+        def delete(self):
+            body = request.get_json(silent=True) or {}
+            help_request = HelpRequest.query.get(body.get('id'))
+            if help_request is None or help_request._deleted:
+                return {'message': 'Help request not found'}, 404
+            help_request.delete()
+            notify(help_request)
+            return {'message': f'Help request {help_request.id} deleted'}, 200
+
+api.add_resource(HelpAPI._Queue, '/help_requests')
+
+
+@socketio.on('join_help')
+def handle_join_help():
+    """
+    Subscribes an admin console page to help request changes.
+    """
+    if current_user.is_authenticated and current_user.role == 'Admin':
+        join_room(HELP_ROOM)
+        return True
+    return False
@@ -1,5 +1,6 @@
 from flask import request
 from flask import current_app, g
+from flask_login import current_user
 from functools import wraps
 import jwt
 from model.user import User
@@ -77,4 +78,22 @@ def token_required(roles=None):
             # Call back to the guarded function if all checks pass
             return func_to_guard(*args, **kwargs)
         return decorated
-    return decorator
\ No newline at end of file
+    return decorator
+
+def admin_only(func):
+    """
+    Guard API endpoints used by the admin console pages.
+
+    The admin console authenticates with the Flask-Login session rather than the JWT cookie, so this checks the
+    session user instead of decoding a token.
+
+    Possible error responses:
+
+    - 401 / Unauthorized: no admin is logged in to the console.
+    """
+    @wraps(func)
+    def decorated(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role != 'Admin':
+            return {'message': 'Admin login required', 'error': 'Unauthorized'}, 401
+        return func(*args, **kwargs)
+    return decorated
@@ -2,8 +2,8 @@ import jwt
 from flask import Blueprint, request, jsonify, current_app, Response, g
 from flask_restful import Api, Resource  # used for REST API building
 from __init__ import app
-from api.jwt_authorize import token_required
-from model.language import Language
+from api.jwt_authorize import admin_only, token_required
+from model.language import Language, language_ranking
 
 # Create a Blueprint for the language API
 language_api = Blueprint('language_api', __name__, url_prefix='/api')
@@ -11,6 +11,74 @@ language_api = Blueprint('language_api', __name__, url_prefix='/api')
 # Create an Api object and associate it with the Blueprint
 api = Api(language_api)
 
+def create_language(body):
+    """
+    Adds a new language entry from a request body.
+    """
+    # Validate required fields
+    name = body.get('name')
+    creator = body.get('creator')
+    popularity = body.get('popularity', 0)  # Default popularity is 0
+
+    if not name or not creator:
+        return {'message': 'Name and creator are required'}, 400
+
+    try:
+        # Create a new language entry
+        new_language = Language(name=name, creator=creator, popularity=popularity)
+        new_language.create()
+        return jsonify({'message': 'Language added successfully', 'language': new_language.read()})
+    except ValueError as e:
+        return {'message': str(e)}, 400
+    except Exception as e:
+        return {'message': 'Failed to create language', 'error': str(e)}, 500
+
+def update_language(body):
+    """
+    Updates an existing language entry from a request body.
+    """
+    # Validate required fields
+    language_id = body.get('id')
+    if not language_id:
+        return {'message': 'ID is required for updating a language'}, 400
+
+    language = Language.query.get(language_id)
+    if not language:
+        return {'message': 'Language not found'}, 404
+
+    try:
+        # Validated first, so a rejected update leaves the session unchanged
+        language.popularity = body.get('popularity', language.popularity)
+    except ValueError as e:
+        return {'message': str(e)}, 400
+
+    try:
+        language.name = body.get('name', language.name)
+        language.creator = body.get('creator', language.creator)
+        language.create()
+        return jsonify({'message': 'Language updated successfully', 'language': language.read()})
+    except Exception as e:
+        return {'message': 'Failed to update language', 'error': str(e)}, 500
+
+def delete_language(body):
+    """
+    Deletes an existing language entry named in a request body.
+    """
+    # Validate required fields
+    language_id = body.get('id')
+    if not language_id:
+        return {'message': 'ID is required for deleting a language'}, 400
+
+    language = Language.query.get(language_id)
+    if not language:
+        return {'message': 'Language not found'}, 404
+
+    try:
+        language.delete()
+        return jsonify({'message': 'Language deleted successfully'})
+    except Exception as e:
+        return {'message': 'Failed to delete language', 'error': str(e)}, 500
+
 class LanguageAPI:
     class _Language(Resource):
         """
@@ -22,48 +90,14 @@ class LanguageAPI:
             """
             Add a new language entry.
             """
-            body = request.get_json()
-
-            # Validate required fields
-            name = body.get('name')
-            creator = body.get('creator')
-            popularity = body.get('popularity', 0)  # Default popularity is 0
-
-            if not name or not creator:
-                return {'message': 'Name and creator are required'}, 400
-
-            try:
-                # Create a new language entry
-                new_language = Language(name=name, creator=creator, popularity=popularity)
-                new_language.create()
-                return jsonify({'message': 'Language added successfully', 'language': new_language.read()})
-            except Exception as e:
-                return {'message': 'Failed to create language', 'error': str(e)}, 500
+            return create_language(request.get_json())
 
         @token_required()
         def put(self):
             """
             Update an existing language entry.
             """
-            body = request.get_json()
-
-            # Validate required fields
-            language_id = body.get('id')
-            if not language_id:
-                return {'message': 'ID is required for updating a language'}, 400
-
-            language = Language.query.get(language_id)
-            if not language:
-                return {'message': 'Language not found'}, 404
-
-            try:
-                language.name = body.get('name', language.name)
-                language.creator = body.get('creator', language.creator)
-                language.popularity = body.get('popularity', language.popularity)
-                language.create()
-                return jsonify({'message': 'Language updated successfully', 'language': language.read()})
-            except Exception as e:
-                return {'message': 'Failed to update language', 'error': str(e)}, 500
+            return update_language(request.get_json())
 
         @token_required()
         def get(self):
@@ -81,22 +115,37 @@ class LanguageAPI:
             """
             Delete an existing language entry.
             """
-            body = request.get_json()
+            return delete_language(request.get_json())
 
-            # Validate required fields
-            language_id = body.get('id')
-            if not language_id:
-                return {'message': 'ID is required for deleting a language'}, 400
+    class _Met(Resource):
+        """
+        Language ranking and management for the admin console page templates/languageData.html.
+        """
 
-            language = Language.query.get(language_id)
-            if not language:
-                return {'message': 'Language not found'}, 404
+        @admin_only
+        def get(self):
+            """
+            Get the most popular languages, most popular first, from the ranking cache.
 
+            Query parameters:
+                - limit: the number of languages, at most LANGUAGE_RANKING_SIZE.
+            """
             try:
-                language.delete()
-                return jsonify({'message': 'Language deleted successfully'})
+                return jsonify(language_ranking.get(request.args.get('limit', type=int)))
             except Exception as e:
-                return {'message': 'Failed to delete language', 'error': str(e)}, 500
+                return {'message': 'Failed to retrieve languages', 'error': str(e)}, 500
+
+        @admin_only
+        def post(self):
+            return create_language(request.get_json())
+
+        @admin_only
+        def put(self):
+            return update_language(request.get_json())
+
+        @admin_only
+        def delete(self):
+            return delete_language(request.get_json())
 
     class _Popularity(Resource):
         """
@@ -127,4 +176,5 @@ class LanguageAPI:
 
 # Register the API resources with the Blueprint
 api.add_resource(LanguageAPI._Language, '/language')
-api.add_resource(LanguageAPI._Popularity, '/language/popularity')
\ No newline at end of file
+api.add_resource(LanguageAPI._Popularity, '/language/popularity')
+api.add_resource(LanguageAPI._Met, '/languagemet')
\ No newline at end of file
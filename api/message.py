@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify
+from flask_restful import Api, Resource
+from api.jwt_authorize import token_required
+from model.channel import Channel
+from model.message import Message, chat_history
+
+# Create a Blueprint for the chat message history API
+message_api = Blueprint('message_api', __name__, url_prefix='/api')
+
+# Create an Api object and associate it with the Blueprint
+api = Api(message_api)
+
+class MessageAPI:
+    class _History(Resource):
+        """
+        Chat history older than the join backfill, paginated with an id cursor.
+        """
+        @token_required()
+        def get(self):
+            """
+            Return one page of a room's messages, newest first.
+
+            Query parameters:
+            - room: the room (channel) name, required.
+            - before: the cursor returned by the previous page, omit for the newest messages.
+            - limit: the page size, between 1 and 200, defaults to 50.
+            """
+            room = request.args.get('room')
+            if not room:
+                return {'message': 'Room is required'}, 400
+            try:
+                before = request.args.get('before', type=int)
+                limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+            except ValueError:
+                return {'message': 'Limit must be an integer'}, 400
+
+            channel = Channel.query.filter_by(name=room).first()
+            if channel is None:
+                return {'message': f'Room {room} not found'}, 404
+
+            # Make sure buffered messages are visible to the query
+            chat_history.flush()
+            messages = Message.page(channel.id, before=before, limit=limit)
+            next_cursor = messages[-1].id if len(messages) == limit else None
+            return jsonify({
+                'messages': [message.read() for message in messages],
+                'next': next_cursor
+            })
+
+# Register the API resources with the Blueprint
+api.add_resource(MessageAPI._History, '/messages')
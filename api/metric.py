@@ -0,0 +1,324 @@
+import json
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
+from flask_restful import Api, Resource
+from __init__ import db
+from api.jwt_authorize import admin_only
+from model.user import User
+from model.post import Post
+from model.channel import Channel
+from model.message import Message
+from model.vote import Vote
+from model.metric import Metric
+
+"""
+Admin dashboard metrics.
+
+Totals and time series come from the incrementally maintained metrics table, so they cost a few indexed lookups
+however many rows exist. List endpoints return a bounded page of the newest rows (the total is sent in the
+X-Total-Count header) instead of the whole table.
+
+The dashboards also create, edit and delete rows here. Writes go through the ORM, so the counters are kept in step
+by the same mapper events as every other write (see model.metric.track). Rows created from the console belong to the
+admin who is logged in.
+"""
+metric_api = Blueprint('metric_api', __name__, url_prefix='/api')
+api = Api(metric_api)
+
+def page_limit():
+    """
+    Returns the requested page size, between 1 and 500 rows, 100 by default.
+    """
+    return min(max(request.args.get('limit', 100, type=int), 1), 500)
+
+def json_body():
+    return request.get_json(silent=True) or {}
+
+def int_field(body, name):
+    """
+    Returns body[name] as an integer, accepting JSON numbers and digit strings, or None when it is missing or is not a
+    whole number.
+    """
+    value = body.get(name)
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_content(content):
+    """
+    Post content is JSON, the dashboard form sends it as text: JSON text is parsed, anything else is kept as text.
+    """
+    if isinstance(content, dict):
+        return content
+    try:
+        parsed = json.loads(content) if content else {}
+    except ValueError:
+        parsed = None
+    return parsed if isinstance(parsed, dict) else {"text": content}
+
+def save(record):
+    try:
+        db.session.add(record)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {'message': 'Failed to save', 'error': str(e)}, 500
+    return None
+
+def remove(record):
+    try:
+        db.session.delete(record)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {'message': 'Failed to delete', 'error': str(e)}, 500
+    return None
+
+def with_total(rows, total):
+    response = jsonify(rows)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
+class MetricAPI:
+    class _Summary(Resource):
+        """
+        Totals plus hourly (last 24h) and daily (last 30 days) rollups for one counter.
+        """
+        counters = {
+            'post': ['posts'],
+            'chat': ['messages'],
+            'poll': ['users'],
+            'vote': ['upvotes', 'downvotes'],
+        }
+
+        @admin_only
+        def get(self, kind):
+            names = self.counters.get(kind)
+            if names is None:
+                return {'message': f'Unknown metric {kind}'}, 404
+            return jsonify({name: Metric.summary(name) for name in names})
+
+    class _Posts(Resource):
+        @admin_only
+        def get(self):
+            """
+            Newest posts with user and channel names resolved in the same query.
+            """
+            rows = (
+                db.session.query(Post, User._name, Channel.name)
+                .outerjoin(User, Post._user_id == User.id)
+                .outerjoin(Channel, Post._channel_id == Channel.id)
+                .order_by(Post.id.desc())
+                .limit(page_limit())
+                .all()
+            )
+            posts = [
+                {
+                    "id": post.id,
+                    "title": post._title,
+                    "comment": post._comment,
+                    "content": post._content,
+                    "user_id": post._user_id,
+                    "channel_id": post._channel_id,
+                    "user_name": user_name,
+                    "channel_name": channel_name
+                }
+                for post, user_name, channel_name in rows
+            ]
+            return with_total(posts, Metric.total('posts'))
+
+        @admin_only
+        def post(self):
+            body = json_body()
+            channel_id = int_field(body, 'channel_id')
+            if not body.get('title') or not body.get('comment') or channel_id is None:
+                return {'message': 'title, comment and an integer channel_id are required'}, 400
+            post = Post(
+                body['title'],
+                body['comment'],
+                user_id=current_user.id,
+                channel_id=channel_id,
+                content=parse_content(body.get('content'))
+            )
+            return save(post) or (post.read(), 201)
+
+        @admin_only
+        def put(self):
+            """
+            Updates the comment of a post, the only field the dashboard edits.
+            """
+            body = json_body()
+            post_id = int_field(body, 'id')
+            if post_id is None:
+                return {'message': 'id must be an integer'}, 400
+            post = Post.query.get(post_id)
+            if post is None:
+                return {'message': 'Post not found'}, 404
+            post._comment = body.get('comment', post._comment)
+            return save(post) or (post.read(), 200)
+
+        @admin_only
+        def delete(self):
+            post_id = int_field(json_body(), 'id')
+            if post_id is None:
+                return {'message': 'id must be an integer'}, 400
+            post = Post.query.get(post_id)
+            if post is None:
+                return {'message': 'Post not found'}, 404
+            return remove(post) or ({'message': f'Post {post.id} deleted'}, 200)
+
+    class _Chats(Resource):
+        @admin_only
+        def get(self):
+            messages = Message.query.order_by(Message.id.desc()).limit(page_limit()).all()
+            chats = [
+                {"id": message.id, "channel_id": message._channel_id, "user_id": message._username, "message": message._msg}
+                for message in messages
+            ]
+            return with_total(chats, Metric.total('messages'))
+
+        @admin_only
+        def post(self):
+            body = json_body()
+            channel_id = int_field(body, 'channel_id')
+            if not body.get('message') or channel_id is None:
+                return {'message': 'message and an integer channel_id are required'}, 400
+            message = Message(channel_id, current_user.uid, body['message'])
+            return save(message) or (message.read(), 201)
+
+        @admin_only
+        def put(self):
+            body = json_body()
+            message_id = int_field(body, 'id')
+            if message_id is None:
+                return {'message': 'id must be an integer'}, 400
+            message = Message.query.get(message_id)
+            if message is None:
+                return {'message': 'Message not found'}, 404
+            message._msg = body.get('message') or message._msg
+            return save(message) or (message.read(), 200)
+
+        @admin_only
+        def delete(self):
+            message_id = int_field(json_body(), 'id')
+            if message_id is None:
+                return {'message': 'id must be an integer'}, 400
+            message = Message.query.get(message_id)
+            if message is None:
+                return {'message': 'Message not found'}, 404
+            return remove(message) or ({'message': f'Message {message.id} deleted'}, 200)
+
+    class _Polls(Resource):
+        """
+        The interests poll: every user answers it by listing their interests, so a poll row is a user's id, name and
+        User._interests, and the poll total is the users counter. An empty interests value means no answer yet.
+
+        Creating a row records the answer of an existing user found by name, deleting one clears the answer and
+        keeps the account.
+        """
+        @admin_only
+        def get(self):
+            users = (
+                User.query.with_entities(User.id, User._name, User._interests)
+                .order_by(User.id.desc())
+                .limit(page_limit())
+                .all()
+            )
+            polls = [{"id": id, "name": name, "interests": interests} for id, name, interests in users]
+            return with_total(polls, Metric.total('users'))
+
+        @admin_only
+        def post(self):
+            body = json_body()
+            user = User.query.filter_by(_name=body.get('name')).first()
+            if user is None:
+                return {'message': 'No user with that name'}, 404
+            user._interests = body.get('interests') or ''
+            return save(user) or ({"id": user.id, "name": user._name, "interests": user._interests}, 201)
+
+        @admin_only
+        def put(self):
+            body = json_body()
+            user_id = int_field(body, 'id')
+            if user_id is None:
+                return {'message': 'id must be an integer'}, 400
+            user = User.query.get(user_id)
+            if user is None:
+                return {'message': 'User not found'}, 404
+            user._name = body.get('name') or user._name
+            user._interests = body.get('interests', user._interests) or ''
+            return save(user) or ({"id": user.id, "name": user._name, "interests": user._interests}, 200)
+
+        @admin_only
+        def delete(self):
+            user_id = int_field(json_body(), 'id')
+            if user_id is None:
+                return {'message': 'id must be an integer'}, 400
+            user = User.query.get(user_id)
+            if user is None:
+                return {'message': 'User not found'}, 404
+            user._interests = ''
+            return save(user) or ({'message': f'Poll answer of {user._name} cleared'}, 200)
+
+    class _PostVotes(Resource):
+        @admin_only
+        def get(self):
+            post_id = request.args.get('post_id', type=int)
+            if post_id is None:
+                return {'message': 'post_id is required'}, 400
+            return jsonify(Vote.for_post(post_id))
+
+    class _Votes(Resource):
+        """
+        Votes cast from the console are the logged in admin's, switching a vote's type moves it between the
+        upvotes and downvotes counters.
+        """
+        vote_types = ('upvote', 'downvote')
+
+        @admin_only
+        def post(self):
+            body = json_body()
+            post_id = int_field(body, 'post_id')
+            if body.get('vote_type') not in self.vote_types or post_id is None:
+                return {'message': 'An integer post_id and a vote_type of upvote or downvote are required'}, 400
+            if Post.query.get(post_id) is None:
+                return {'message': 'Post not found'}, 404
+            vote = Vote(post_id, current_user.id, body['vote_type']).create()
+            if vote is None:
+                return {'message': 'You already voted on this post'}, 409
+            return vote.read(), 201
+
+        @admin_only
+        def put(self):
+            body = json_body()
+            if body.get('vote_type') not in self.vote_types:
+                return {'message': 'vote_type must be upvote or downvote'}, 400
+            vote_id = int_field(body, 'id')
+            if vote_id is None:
+                return {'message': 'id must be an integer'}, 400
+            vote = Vote.query.get(vote_id)
+            if vote is None:
+                return {'message': 'Vote not found'}, 404
+            vote._vote_type = body['vote_type']
+            return save(vote) or (vote.read(), 200)
+
+        @admin_only
+        def delete(self):
+            vote_id = int_field(json_body(), 'id')
+            if vote_id is None:
+                return {'message': 'id must be an integer'}, 400
+            vote = Vote.query.get(vote_id)
+            if vote is None:
+                return {'message': 'Vote not found'}, 404
+            return remove(vote) or ({'message': f'Vote {vote.id} deleted'}, 200)
+
+# Register the API resources with the Blueprint
+api.add_resource(MetricAPI._Posts, '/postmet', '/postsmet')
+api.add_resource(MetricAPI._Chats, '/chatmet')
+api.add_resource(MetricAPI._Polls, '/pollmet')
+api.add_resource(MetricAPI._Votes, '/votemet')
+api.add_resource(MetricAPI._PostVotes, '/votemet/post')
+api.add_resource(MetricAPI._Summary, '/<string:kind>met/summary')
@@ -3,6 +3,7 @@ from flask_restful import Api, Resource
 from api.jwt_authorize import token_required
 from model.user import User
 from model.pfp import pfp_base64_decode, pfp_base64_upload, pfp_file_delete
+from model.avatar import avatar_cache
 
 pfp_api = Blueprint('pfp_api', __name__, url_prefix='/api/id')
 api = Api(pfp_api)
@@ -83,6 +84,7 @@ class _PFP(Resource):
             #  Remove the user's reference to the profile picture
             try:
                 user.delete_pfp()  # Call the delete_pfp method to update the database
+                avatar_cache.invalidate(user_uid)
                 return {'message': 'Profile picture deleted successfully'}, 200
             except Exception as e:
                 return {'message': f'An error occurred while deleting the profile picture database reference: {str(e)}'}, 500
@@ -124,6 +126,7 @@ class _PFP(Resource):
         try:
             # write the filename reference to the database
             current_user.update({"pfp": filename})
+            avatar_cache.invalidate(current_user.uid)
             return {'message': 'Profile picture updated successfully'}, 200
         except Exception as e:
             return {'message': f'A database error occurred while assigning profile picture: {str(e)}'}, 500
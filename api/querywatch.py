@@ -0,0 +1,201 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from __init__ import app
+
+"""
+Opt-in query instrumentation for development, tests and canary runs.
+
+With QUERY_WATCH enabled every request counts and fingerprints its SQL statements. When one statement shape runs
+QUERY_WATCH_REPEAT times or more in a request it is logged as a likely N+1 (a query per row, as in a loop calling
+Post.read()). Statements slower than QUERY_WATCH_SLOW_MS are logged with their EXPLAIN plan. A request that runs more
+than QUERY_BUDGET statements is logged, or raises QueryBudgetExceeded when QUERY_WATCH_RAISE is set.
+
+Tests can hold a block of code or a route to a budget directly, whether or not QUERY_WATCH is enabled:
+
+    with query_budget(3):
+        client.get('/api/post')
+"""
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a request or a query_budget block runs more statements than allowed.
+    """
+
+
+def fingerprint(statement):
+    """
+    Reduces a statement to its shape: literals become ?, IN lists collapse and whitespace is normalized.
+    """
+    shape = re.sub(r"'(?:[^']|'')*'", '?', statement)
+    shape = re.sub(r'\b\d+(?:\.\d+)?\b', '?', shape)
+    shape = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', shape)
+    return re.sub(r'\s+', ' ', shape).strip()
+
+
+class QueryLog:
+    """
+    The statements seen inside one request or one query_budget block.
+    """
+    def __init__(self, label, budget=None):
+        self.label = label
+        self.budget = budget
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """
+        Returns (shape, count) pairs of statements run at least threshold times, most repeated first.
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def check(self):
+        """
+        Logs repeated statement shapes and enforces the budget.
+        """
+        for shape, count in self.repeated(app.config['QUERY_WATCH_REPEAT']):
+            logging.warning(f"Possible N+1 in {self.label}: {count}x {shape}")
+        if self.budget and self.count > self.budget:
+            message = f"{self.label} ran {self.count} queries, budget is {self.budget}"
+            if app.config['QUERY_WATCH_RAISE']:
+                raise QueryBudgetExceeded(message)
+            logging.warning(message)
+
+
+# Logs of the requests and query_budget blocks active in the current thread
+_local = threading.local()
+
+def active_logs():
+    logs = getattr(_local, 'logs', None)
+    if logs is None:
+        logs = _local.logs = []
+    return logs
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+def explain(conn, cursor, statement, parameters):
+    """
+    Returns the query plan of a statement, run on a separate DBAPI cursor so it does not trigger these events.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith('SELECT'):
+        return None
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute(prefix + statement, parameters)
+        return [' '.join(str(value) for value in row) for row in plan_cursor.fetchall()]
+    finally:
+        plan_cursor.close()
+
+def start_query_watch(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_watch_started', []).append(time.perf_counter())
+
+def record_query_watch(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_watch_started')
+    if not started:
+        return  # installed while this statement was running
+    elapsed = time.perf_counter() - started.pop()
+    for log in active_logs():
+        log.add(statement, elapsed)
+    if elapsed * 1000 >= app.config['QUERY_WATCH_SLOW_MS']:
+        plan = None
+        if not executemany:
+            try:
+                plan = explain(conn, cursor, statement, parameters)
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {str(e)}"]
+        logging.warning(f"Slow query ({elapsed * 1000:.1f} ms): {fingerprint(statement)} plan={plan}")
+
+# Users of the engine listeners: QUERY_WATCH for the whole process, or each active query_budget block
+_installs = 0
+_install_lock = threading.Lock()
+
+def install():
+    """
+    Registers the engine listeners, each call needs a matching uninstall().
+    """
+    global _installs
+    with _install_lock:
+        _installs += 1
+        if _installs == 1:
+            event.listen(Engine, 'before_cursor_execute', start_query_watch)
+            event.listen(Engine, 'after_cursor_execute', record_query_watch)
+
+def uninstall():
+    """
+    Removes the engine listeners once the last user is done, so a test's budget does not leave slow query logging
+    and EXPLAIN on for the rest of the process.
+    """
+    global _installs
+    with _install_lock:
+        _installs -= 1
+        if _installs == 0:
+            event.remove(Engine, 'before_cursor_execute', start_query_watch)
+            event.remove(Engine, 'after_cursor_execute', record_query_watch)
+
+
+class query_budget(ContextDecorator):
+    """
+    Fails a block or a decorated function that runs more than limit statements.
+
+    Always raises QueryBudgetExceeded on overrun so it can be used as a test assertion.
+    """
+    def __init__(self, limit, label='query_budget block'):
+        self.limit = limit
+        self.label = label
+
+    def __enter__(self):
+        install()
+        self.log = QueryLog(self.label, self.limit)
+        active_logs().append(self.log)
+        return self.log
+
+    def __exit__(self, *exc):
+        active_logs().remove(self.log)
+        uninstall()
+        if exc[0] is None and self.log.count > self.limit:
+            raise QueryBudgetExceeded(f"{self.label} ran {self.log.count} queries, budget is {self.limit}")
+        return False
+
+
+@app.before_request
+def start_request_query_log():
+    if app.config['QUERY_WATCH']:
+        g.query_log = QueryLog(f"{request.method} {request.path}", app.config['QUERY_BUDGET'])
+        active_logs().append(g.query_log)
+
+@app.teardown_request
+def stop_request_query_log(exc=None):
+    log = g.pop('query_log', None)
+    if log is not None and log in active_logs():
+        active_logs().remove(log)
+
+@app.after_request
+def check_request_query_log(response):
+    log = g.get('query_log')
+    if log is not None:
+        active_logs().remove(log)
+        g.pop('query_log')
+        response.headers['X-Query-Count'] = str(log.count)
+        log.check()
+    return response
+
+
+if app.config['QUERY_WATCH']:
+    install()
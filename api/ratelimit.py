@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    """
+    Token bucket, allows bursts of up to capacity events and refills at rate tokens per second.
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, tokens=1):
+        """
+        Takes tokens from the bucket.
+
+        Returns:
+            bool: True if enough tokens were available, False if the event should be rejected.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+
+class RateLimiter:
+    """
+    Keeps one token bucket per key, for example per Socket.IO connection or per room.
+
+    Keys can come from clients, so at most max_keys buckets are kept, least recently used first. A bucket idle long
+    enough to refill is the same as a new one and is dropped first; past max_keys the oldest active buckets go too.
+    """
+    def __init__(self, rate, capacity, max_keys=10000):
+        """
+        Args:
+            rate (float): Tokens added per second, 0 disables the limiter.
+            capacity (int): The burst size.
+            max_keys (int): The maximum number of buckets kept.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def allow(self, key):
+        """
+        Returns True if the key may send one more event now.
+        """
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                self._evict()
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.consume()
+
+    def _evict(self):
+        """
+        Drops refilled buckets from the least recently used end, then any beyond max_keys. Called with the lock held.
+        """
+        refilled = time.monotonic() - self.capacity / self.rate
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.updated > refilled and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+
+    def forget(self, key):
+        """
+        Drops the bucket of a key, called when a connection goes away.
+        """
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SlowConsumerMonitor:
+    """
+    Watches the outbound queue of every Engine.IO connection and acts on clients that cannot keep up.
+
+    A client whose queue grows past the threshold either has its pending packets dropped ("drop") or is
+    disconnected ("disconnect"), so one slow reader cannot make the server buffer an entire room's traffic.
+    """
+    def __init__(self, socketio, threshold=500, interval=2.0, action='disconnect'):
+        """
+        Args:
+            socketio (SocketIO): The Flask-SocketIO server.
+            threshold (int): The queued packet count that marks a slow consumer, 0 disables the monitor.
+            interval (float): Seconds between checks.
+            action (str): "drop" or "disconnect".
+        """
+        self.socketio = socketio
+        self.threshold = threshold
+        self.interval = interval
+        self.action = action
+        self._task = None
+
+    def start(self):
+        if self.threshold > 0 and self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logging.warning(f"Slow consumer check failed: {str(e)}")
+
+    def check(self):
+        """
+        Applies the action to every connection over the threshold.
+
+        Returns:
+            int: The number of slow consumers found.
+        """
+        eio = self.socketio.server.eio
+        slow = [
+            (eio_sid, socket) for eio_sid, socket in list(eio.sockets.items())
+            if socket.queue.qsize() > self.threshold
+        ]
+        for eio_sid, socket in slow:
+            logging.warning(f"Slow consumer {eio_sid}: {socket.queue.qsize()} queued packets, {self.action}")
+            if self.action == 'drop':
+                while not socket.queue.empty():
+                    socket.queue.get_nowait()
+                    socket.queue.task_done()  # engine.io joins this queue when the socket closes
+            else:
+                eio.disconnect(eio_sid)
+        return len(slow)
@@ -0,0 +1,321 @@
+import glob
+import json
+import os
+import threading
+import time
+from flask import Blueprint, Response, abort, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from __init__ import app
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with a fixed memory footprint.
+
+    Values (microseconds) are bucketed log-linearly: every power of two range is split into SUB_BUCKETS equal
+    buckets, so a recorded value is rounded down by at most 1/SUB_BUCKETS (about 3%) while the whole range from 1us to
+    over a day fits in about a thousand counters. Recording is one index computation and one increment, and
+    percentiles walk the counters instead of sorting samples.
+
+    Not thread safe on its own, RequestStats records and reads it under its lock.
+    """
+    SUB_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BITS
+    MAX_EXPONENT = 32
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS * (self.MAX_EXPONENT + 1))
+        self.total = 0
+        self.sum = 0
+
+    def _index(self, value):
+        if value < self.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - self.SUB_BITS - 1
+        return (shift + 1) * self.SUB_BUCKETS + (value >> shift) - self.SUB_BUCKETS
+
+    def _value(self, index):
+        exponent, sub = divmod(index, self.SUB_BUCKETS)
+        if exponent == 0:
+            return sub
+        return (sub + self.SUB_BUCKETS) << (exponent - 1)
+
+    def record(self, seconds):
+        """
+        Adds one observation.
+
+        Args:
+            seconds (float): The observed latency.
+        """
+        value = int(seconds * 1_000_000)
+        self.counts[min(self._index(value), len(self.counts) - 1)] += 1
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, p):
+        """
+        Returns the value at or below which p percent of observations fall, in milliseconds.
+        """
+        if not self.total:
+            return 0.0
+        target = max(1, int(self.total * p / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self._value(index) / 1000
+        return self._value(len(self.counts) - 1) / 1000
+
+    def cumulative(self, bounds):
+        """
+        Returns cumulative counts at each upper bound (seconds), as used by Prometheus histogram buckets.
+        """
+        limits = [int(bound * 1_000_000) for bound in bounds]
+        result = [0] * len(limits)
+        for index, count in enumerate(self.counts):
+            if count:
+                value = self._value(index)
+                for position, limit in enumerate(limits):
+                    if value <= limit:
+                        result[position] += count
+        return result
+
+    def dump(self):
+        return {"counts": {str(i): c for i, c in enumerate(self.counts) if c}, "total": self.total, "sum": self.sum}
+
+    def merge(self, data):
+        for index, count in data["counts"].items():
+            self.counts[int(index)] += count
+        self.total += data["total"]
+        self.sum += data["sum"]
+
+    def read(self):
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum / self.total / 1000, 3) if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99)
+        }
+
+
+class RouteStats:
+    """
+    Everything recorded for one route: latency, status codes, response bytes and database work.
+    """
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = {}
+        self.response_bytes = 0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    def dump(self):
+        return {
+            "latency": self.latency.dump(),
+            "statuses": dict(self.statuses),
+            "response_bytes": self.response_bytes,
+            "db_queries": self.db_queries,
+            "db_seconds": self.db_seconds
+        }
+
+    def merge(self, data):
+        self.latency.merge(data["latency"])
+        for status, count in data["statuses"].items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.response_bytes += data["response_bytes"]
+        self.db_queries += data["db_queries"]
+        self.db_seconds += data["db_seconds"]
+
+
+class RequestStats:
+    """
+    Per-route request stats for this worker process.
+
+    Each worker only writes its own counters, so processes need no coordination. Request threads of one worker share
+    them, so recording and snapshots hold a lock, and snapshots are copies serialized after it is released.
+    When METRICS_MULTIPROC_DIR is set, every worker periodically writes a snapshot to <dir>/<pid>.json and the
+    /metrics endpoint merges all snapshots, so any worker can answer a scrape for the whole gunicorn server.
+    """
+    def __init__(self, multiproc_dir=None, dump_interval=5.0):
+        self.started = time.time()
+        self.routes = {}
+        self.multiproc_dir = multiproc_dir
+        self.dump_interval = dump_interval
+        self._last_dump = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, method, route, status, seconds, response_bytes=0, db_queries=0, db_seconds=0.0):
+        key = (method, route)
+        status = str(status)
+        with self._lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteStats()
+            stats.latency.record(seconds)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.response_bytes += response_bytes
+            stats.db_queries += db_queries
+            stats.db_seconds += db_seconds
+            due = self.multiproc_dir and time.monotonic() - self._last_dump > self.dump_interval
+            if due:
+                self._last_dump = time.monotonic()
+        if due:
+            self.dump()
+
+    def snapshot(self):
+        """
+        Returns a copy of every route's stats, in the dump() format, taken under the lock.
+        """
+        with self._lock:
+            return {f"{method} {route}": stats.dump() for (method, route), stats in self.routes.items()}
+
+    def dump(self):
+        """
+        Writes this worker's snapshot atomically to the multiprocess directory.
+        """
+        snapshot = self.snapshot()
+        path = os.path.join(self.multiproc_dir, f"{os.getpid()}.json")
+        # Each thread writes its own temporary file, the last rename wins
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, path)
+
+    def aggregate(self):
+        """
+        Returns route stats merged across all workers, or this worker's own stats without a multiprocess directory.
+        """
+        if not self.multiproc_dir:
+            return self.copy()
+        self.dump()
+        merged = {}
+        for path in glob.glob(os.path.join(self.multiproc_dir, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # a worker is replacing its file
+            for key, data in snapshot.items():
+                method, route = key.split(' ', 1)
+                merged.setdefault((method, route), RouteStats()).merge(data)
+        return merged
+
+    def copy(self):
+        """
+        Returns this worker's route stats as new RouteStats objects, safe to read while requests keep recording.
+        """
+        routes = {}
+        for key, data in self.snapshot().items():
+            method, route = key.split(' ', 1)
+            routes[(method, route)] = copied = RouteStats()
+            copied.merge(data)
+        return routes
+
+    def read(self):
+        endpoints = {}
+        for (method, route), stats in sorted(self.copy().items()):
+            data = stats.latency.read()
+            data["statuses"] = dict(stats.statuses)
+            data["response_bytes"] = stats.response_bytes
+            data["db_queries"] = stats.db_queries
+            data["db_ms"] = round(stats.db_seconds * 1000, 3)
+            endpoints[f"{method} {route}"] = data
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "endpoints": endpoints
+        }
+
+
+# Upper bounds (seconds) of the exported Prometheus latency buckets
+PROMETHEUS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+def render_prometheus(routes):
+    """
+    Renders route stats in the Prometheus text exposition format (version 0.0.4).
+    """
+    def labels(method, route, **extra):
+        pairs = {"method": method, "route": route, **extra}
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in pairs.values())
+        return "{" + ",".join(f'{key}="{value}"' for key, value in zip(pairs, escaped)) + "}"
+
+    lines = [
+        "# HELP flask_request_duration_seconds Request latency by route.",
+        "# TYPE flask_request_duration_seconds histogram"
+    ]
+    for (method, route), stats in sorted(routes.items()):
+        for bound, count in zip(PROMETHEUS_BUCKETS, stats.latency.cumulative(PROMETHEUS_BUCKETS)):
+            lines.append(f"flask_request_duration_seconds_bucket{labels(method, route, le=bound)} {count}")
+        lines.append(f"flask_request_duration_seconds_bucket{labels(method, route, le='+Inf')} {stats.latency.total}")
+        lines.append(f"flask_request_duration_seconds_sum{labels(method, route)} {stats.latency.sum / 1_000_000}")
+        lines.append(f"flask_request_duration_seconds_count{labels(method, route)} {stats.latency.total}")
+
+    counters = [
+        ("flask_requests_total", "Requests by route and status.", lambda stats: stats.statuses.items()),
+        ("flask_response_bytes_total", "Response body bytes by route.", lambda stats: [(None, stats.response_bytes)]),
+        ("flask_db_queries_total", "Database statements executed by route.", lambda stats: [(None, stats.db_queries)]),
+        ("flask_db_seconds_total", "Time spent in database statements by route.", lambda stats: [(None, stats.db_seconds)]),
+    ]
+    for name, help_text, values in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, route), stats in sorted(routes.items()):
+            for status, value in values(stats):
+                extra = {"status": status} if status else {}
+                lines.append(f"{name}{labels(method, route, **extra)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Stats of the current worker, filled by the request hooks below
+request_stats = RequestStats(multiproc_dir=app.config['METRICS_MULTIPROC_DIR'])
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append((context, time.perf_counter()))
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()[1]
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_seconds += elapsed
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(context):
+    # A failed statement never reaches after_cursor_execute, drop its start time so the next one is not offset
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started and started[-1][0] is context.execution_context:
+        started.pop()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+@app.after_request
+def record_request_stats(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Group by route rule, not raw path, so /uploads/<path> is one entry
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_stats.record(
+            request.method, route, response.status_code, time.perf_counter() - started,
+            response_bytes=response.calculate_content_length() or 0,
+            db_queries=g.db_queries,
+            db_seconds=g.db_seconds
+        )
+    return response
+
+
+stats_api = Blueprint('stats_api', __name__)
+
+@stats_api.route('/metrics')
+def metrics():
+    """
+    Prometheus scrape endpoint, protected by a bearer token when METRICS_TOKEN is set.
+    """
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(401)
+    return Response(render_prometheus(request_stats.aggregate()), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, g
+from flask_restful import Api, Resource
+from api.jwt_authorize import token_required
+from model.timetrack import TimeEntry, time_tracker
+
+"""
+Time tracking beacons from static/js/timeTracker.js.
+
+POST only buffers the reported time in memory, the buffer is written to the database in bulk by a background thread.
+The time is recorded for the logged in user, sendBeacon sends the JWT cookie like any same origin request.
+GET returns time summed per page or per user.
+"""
+timetrack_api = Blueprint('timetrack_api', __name__, url_prefix='/api')
+api = Api(timetrack_api)
+
+MAX_EVENTS = 100  # beacons accepted in one request
+MAX_SECONDS = 24 * 60 * 60  # a single report longer than a day is a broken client clock
+
+def parse_events(body):
+    """
+    Normalizes the accepted payloads to (page, seconds) tuples.
+
+    Accepted payloads:
+    - {"time_spent": 12, "page": "/path"}
+    - {"events": [{"page": "/path", "time_spent": 12}, ...]}
+    - a list of either of the above
+
+    A user_id in a report is ignored, older clients still send one.
+    """
+    reports = body if isinstance(body, list) else [body]
+    events = []
+    for report in reports:
+        if not isinstance(report, dict):
+            raise ValueError('Each report must be an object')
+        for event in report.get('events') or [report]:
+            if not isinstance(event, dict):
+                raise ValueError('Each event must be an object')
+            seconds = int(event.get('time_spent', 0))
+            if seconds < 0:
+                raise ValueError('time_spent must not be negative')
+            page = str(event.get('page') or '')[:255]
+            events.append((page, min(seconds, MAX_SECONDS)))
+    if len(events) > MAX_EVENTS:
+        raise ValueError(f'At most {MAX_EVENTS} events per request')
+    return events
+
+class TimeTrackAPI:
+    class _Track(Resource):
+        @token_required()
+        def post(self):
+            """
+            Accepts one or more time reports, sendBeacon posts them as text/plain so the body is parsed regardless of
+            the content type.
+            """
+            body = request.get_json(force=True, silent=True)
+            if body is None:
+                return {'message': 'JSON body is required'}, 400
+            try:
+                events = parse_events(body)
+            except (TypeError, ValueError) as e:
+                return {'message': str(e)}, 400
+            user_id = g.current_user.uid
+            for page, seconds in events:
+                if seconds:
+                    time_tracker.record(user_id, page, seconds)
+            return {'accepted': len(events)}, 202
+
+        @token_required()
+        def get(self):
+            """
+            Returns time spent, largest first.
+
+            Query parameters:
+            - group: 'page' (default) or 'user'.
+            - user_id: only this user, admins only for users other than themselves.
+            - page: only this page.
+            - days: only the last N days.
+            - limit: the number of groups, between 1 and 500, defaults to 100.
+            """
+            current_user = g.current_user
+            group = request.args.get('group', 'page')
+            if group not in ('page', 'user'):
+                return {'message': 'group must be page or user'}, 400
+            user_id = request.args.get('user_id')
+            if current_user.role != 'Admin':
+                if group == 'user' or (user_id and user_id != current_user.uid):
+                    return {'message': 'Only admins can read time of other users'}, 403
+                user_id = current_user.uid
+            days = request.args.get('days', type=int)
+            since = datetime.now() - timedelta(days=days) if days else None
+            limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+
+            # Make sure buffered reports are counted
+            time_tracker.flush()
+            return jsonify(TimeEntry.totals(group, user_id=user_id, page=request.args.get('page'), since=since, limit=limit))
+
+api.add_resource(TimeTrackAPI._Track, '/track_time')
@@ -0,0 +1,40 @@
+""" asgi.py
+Async entry point: serves the read-heavy endpoints /api/id, /api/users, /api/following, /api/posts and /api/id/pfp
+from api/async_read.py on the event loop, and hands every other request to the Flask app on a thread pool.
+
+A slow query on those endpoints no longer ties up a worker, one process serves as many of them concurrently as the
+async engine has connections. Writes and the remaining routes behave as under gunicorn, limited to
+ASGI_WSGI_THREADS at a time per process. Socket.IO is not served here, keep running server.py for chat and games.
+
+Usage: install requirements-async.txt, then:
+> uvicorn asgi:app --port 8696 --workers 4
+
+Or under gunicorn:
+> gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8696 asgi:app
+
+Compare with the sync server using scripts/async_benchmark.py.
+"""
+from a2wsgi import WSGIMiddleware
+from main import create_app
+from api import async_read
+
+flask_app = create_app()
+wsgi = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_THREADS'])
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await async_read.startup()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_read.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] in async_read.routes:
+        return await async_read.handle(scope, receive, send)
+    return await wsgi(scope, receive, send)
@@ -0,0 +1,1170 @@
+""" backup.py
+Streaming export of the database to NDJSON files, a bulk restore engine that loads them back, and online snapshots
+of the development SQLite database, a parallel logical dump of every table for production MySQL, and incremental
+backups that only export rows changed since the previous backup.
+
+Each table is read with yield_per, so only one batch of rows is in memory at a time, and every row is written as one
+JSON line as soon as it is read. Files can be gzip or zstd compressed (BACKUP_COMPRESSION). A manifest.json written
+last records, for each table, the file name, row count and the SHA-256 of the uncompressed NDJSON, so a restore can
+check that a backup is complete and intact before loading it.
+
+Restore loads the natural keys of a table in one query, splits incoming rows into inserts and updates in memory and
+applies them in chunked executemany statements, committing once per table. It bypasses the per-row Model.restore
+methods, which query, update and commit (and rehash a password) once per record.
+
+SQLite snapshots use the sqlite3 backup API, which copies a consistent image a few pages per step and lets writers
+in between steps, instead of copying the live file (which can tear mid-write). Each copy is checked with
+PRAGMA integrity_check before it replaces the previous backup, and timestamped snapshots are rotated.
+
+The logical dump (dump_database / load_dump) copies raw column values of every table in the schema, so unlike the
+NDJSON export it round-trips passwords and ids exactly. Worker threads dump tables in parallel, each on its own
+connection; all of their snapshot transactions are opened while writes are briefly blocked, so the tables are
+consistent with each other. Loading fills staging tables in parallel, then replaces every table from them in one
+transaction, so a failed load changes nothing; a direct load skips the staging copy and loads the tables in parallel,
+parents before children, at the cost of that guarantee.
+
+Incremental backups (backup_incremental / restore_incremental) read the change log written by model.changelog.capture.
+A chain starts with a full dump that records the change log watermark; each incremental exports the rows named by
+log entries after the previous watermark, plus new rows of append-only tables, so its cost follows the churn rather
+than the size of the database. Restore loads the base dump and replays the incrementals in order.
+
+Layout of a backup directory:
+    manifest.json
+    users.ndjson.gz
+    sections.ndjson.gz
+    ...
+"""
+import gzip
+import hashlib
+import csv
+import io
+import json
+import queue
+import threading
+import glob
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import Column, MetaData, Table, bindparam, func, inspect, or_, select, types
+from werkzeug.security import generate_password_hash
+from __init__ import app, db, optional_import
+from model.metric import increment
+from model.changelog import CAPTURED, ChangeLog, request_full_backup
+from model.user import User
+from model.section import Section
+from model.group import Group
+from model.channel import Channel
+from model.post import Post
+from model.usettings import Settings
+from model.language import Language
+
+MANIFEST = 'manifest.json'
+EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def rows_of(model):
+    """
+    Returns a function yielding model.read() for every row, in primary key order, one batch at a time.
+    """
+    def rows(batch_size):
+        for record in model.query.order_by(model.id).yield_per(batch_size):
+            yield record.read()
+    return rows
+
+def post_rows(batch_size):
+    """
+    Yields posts in the Post.read() shape plus the author's uid, resolving users and channels in the same query
+    instead of per row.
+    """
+    query = (
+        db.session.query(Post, User._uid, User._name, Channel.name)
+        .outerjoin(User, Post._user_id == User.id)
+        .outerjoin(Channel, Post._channel_id == Channel.id)
+        .order_by(Post.id)
+        .yield_per(batch_size)
+    )
+    for post, user_uid, user_name, channel_name in query:
+        yield {
+            "id": post.id,
+            "title": post._title,
+            "comment": post._comment,
+            "content": post._content,
+            "user_name": user_name,
+            "user_uid": user_uid,
+            "channel_name": channel_name
+        }
+
+# Tables in restore order, parents before the tables that reference them
+TABLES = [
+    ('users', rows_of(User)),
+    ('sections', rows_of(Section)),
+    ('groups', rows_of(Group)),
+    ('channels', rows_of(Channel)),
+    ('posts', post_rows),
+    ('settings', rows_of(Settings)),
+    ('languages', rows_of(Language)),
+]
+
+
+def open_compressed(path, mode, compression):
+    """
+    Opens a binary file, compressing or decompressing with gzip or zstd.
+    """
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == 'zstd':
+        zstandard = optional_import('zstandard', 'BACKUP_COMPRESSION=zstd')
+        raw = open(path, mode)
+        if 'w' in mode:
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, mode)
+
+def export_table(directory, name, rows, compression='gzip'):
+    """
+    Writes rows to <directory>/<name>.ndjson[.gz|.zst] one line at a time.
+
+    Returns:
+        dict: The manifest entry of the table.
+    """
+    filename = f"{name}.ndjson{EXTENSIONS[compression]}"
+    path = os.path.join(directory, filename)
+    checksum = hashlib.sha256()
+    count = 0
+    size = 0
+    with open_compressed(path + '.tmp', 'wb', compression) as out:
+        for row in rows:
+            line = (json.dumps(row, default=str, separators=(',', ':')) + '\n').encode('utf-8')
+            out.write(line)
+            checksum.update(line)
+            count += 1
+            size += len(line)
+    os.replace(path + '.tmp', path)
+    return {"file": filename, "rows": count, "bytes": size, "sha256": checksum.hexdigest()}
+
+def export_all(directory='backup', compression=None, batch_size=None, tables=TABLES):
+    """
+    Exports every table to NDJSON and writes the manifest last.
+
+    Args:
+        directory (str): The backup directory, created if missing.
+        compression (str, optional): 'none', 'gzip' or 'zstd'. Defaults to BACKUP_COMPRESSION.
+        batch_size (int, optional): Rows fetched per round trip. Defaults to BACKUP_BATCH_SIZE.
+
+    Returns:
+        dict: The manifest.
+    """
+    compression = compression or app.config['BACKUP_COMPRESSION']
+    batch_size = batch_size or app.config['BACKUP_BATCH_SIZE']
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Unknown backup compression {compression}")
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+        "format": "ndjson",
+        "version": 1,
+        "created_at": datetime.now().isoformat(),
+        "compression": compression,
+        "tables": {}
+    }
+    with app.app_context():
+        existing = set(inspect(db.engine).get_table_names())
+        for name, rows in tables:
+            if name not in existing:
+                continue  # a table added since the database was created, for example languages
+            manifest["tables"][name] = export_table(directory, name, rows(batch_size), compression)
+            db.session.expunge_all()  # drop the identity map between tables
+            print(f"Backed up {manifest['tables'][name]['rows']} {name}")
+
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return manifest
+
+
+def read_manifest(directory='backup'):
+    """
+    Returns the manifest of a backup directory, or None for a backup made before NDJSON exports.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def read_table(directory, name, manifest=None):
+    """
+    Yields the rows of one table from an NDJSON backup, then checks the row count and checksum.
+
+    Raises:
+        ValueError: The file does not match the manifest.
+    """
+    manifest = manifest or read_manifest(directory)
+    entry = manifest["tables"][name]
+    checksum = hashlib.sha256()
+    count = 0
+    with open_compressed(os.path.join(directory, entry["file"]), 'rb', manifest["compression"]) as raw:
+        for line in io.BufferedReader(raw):
+            checksum.update(line)
+            count += 1
+            yield json.loads(line)
+    if count != entry["rows"] or checksum.hexdigest() != entry["sha256"]:
+        raise ValueError(f"Backup of {name} does not match the manifest")
+
+
+class TableRestore:
+    """
+    Describes how backup rows of one table map to its columns.
+
+    Attributes:
+        name (str): The table name in the backup.
+        model: The SQLAlchemy model.
+        key (str): The natural key column used to match backup rows to existing rows.
+        metric (str, optional): The dashboard counter to increase by the number of inserted rows.
+        replace (bool): Delete all existing rows first instead of matching by key.
+    """
+    def __init__(self, name, model, key, metric=None, replace=False):
+        self.name = name
+        self.model = model
+        self.key = key
+        self.metric = metric
+        self.replace = replace
+
+    def prepare(self):
+        """
+        Runs once before the rows are read, loads lookups needed by columns().
+        """
+
+    def columns(self, row):
+        """
+        Returns the column values of a backup row, or None to skip the row. A column left out is kept as it is on
+        update.
+        """
+        raise NotImplementedError
+
+    def insert_columns(self, row):
+        """
+        Returns extra column values only set on insert, such as a password hash.
+        """
+        return {}
+
+
+class UserRestore(TableRestore):
+    def prepare(self):
+        # Backups carry no password hashes, new users get the default password, hashed once rather than per row
+        self.password = generate_password_hash(app.config["DEFAULT_PASSWORD"], "pbkdf2:sha256", salt_length=10)
+
+    def columns(self, row):
+        columns = {
+            "_uid": row["uid"],
+            "_name": row.get("name") or row["uid"],
+            "_role": row.get("role") or "User",
+            "_pfp": row.get("pfp") or '',
+            "_car": row.get("car") or '',
+            "_interests": row.get("interests") or '',
+            "_followers": row.get("followers") or ''
+        }
+        if row.get("email"):
+            columns["_email"] = row["email"]
+        return columns
+
+    def insert_columns(self, row):
+        # Email is a required column, a backup row without one keeps the email of an existing user
+        return {"_password": self.password, "_email": row.get("email") or "?"}
+
+
+class SectionRestore(TableRestore):
+    def columns(self, row):
+        return {"_name": row["name"], "_theme": row.get("theme")}
+
+
+class GroupRestore(TableRestore):
+    def columns(self, row):
+        return {"name": row["name"], "section_id": row.get("section_id")}
+
+
+class ChannelRestore(TableRestore):
+    def columns(self, row):
+        return {"name": row["name"], "group_id": row.get("group_id")}
+
+
+class PostRestore(TableRestore):
+    def prepare(self):
+        # Posts reference users by uid and channels by name in the backup, resolve them with one query per table
+        users = db.session.query(User._uid, User._name, User.id).all()
+        self.user_ids = {uid: id for uid, _, id in users}
+        # Backups from before user_uid was exported only have the display name, which is not unique: those rows are
+        # only matched when one user has the name
+        names = Counter(name for _, name, _ in users)
+        self.user_ids_by_name = {name: id for _, name, id in users if names[name] == 1}
+        self.channel_ids = dict(db.session.query(Channel.name, Channel.id).all())
+
+    def columns(self, row):
+        if "user_uid" in row:
+            user_id = self.user_ids.get(row["user_uid"])
+        else:
+            user_id = self.user_ids_by_name.get(row.get("user_name"))
+        channel_id = self.channel_ids.get(row.get("channel_name"))
+        if user_id is None or channel_id is None:
+            return None  # both are required columns
+        return {
+            "id": row.get("id"),
+            "_title": row["title"],
+            "_comment": row.get("comment") or '',
+            "_content": row.get("content") or {},
+            "_user_id": user_id,
+            "_channel_id": channel_id
+        }
+
+
+class SettingsRestore(TableRestore):
+    def columns(self, row):
+        return {
+            "description": row["description"],
+            "contact_email": row["contact_email"],
+            "contact_phone": row["contact_phone"]
+        }
+
+
+class LanguageRestore(TableRestore):
+    def columns(self, row):
+        return {"_name": row["name"], "_creator": row["creator"], "_popularity": row.get("popularity") or 0}
+
+
+# Restore order, parents before the tables that reference them
+RESTORES = [
+    UserRestore('users', User, '_uid', metric='users'),
+    SectionRestore('sections', Section, '_name'),
+    GroupRestore('groups', Group, 'name'),
+    ChannelRestore('channels', Channel, 'name'),
+    # Titles repeat, posts are matched by the id they were exported with
+    PostRestore('posts', Post, 'id', metric='posts'),
+    SettingsRestore('settings', Settings, 'id', replace=True),
+    LanguageRestore('languages', Language, '_name'),
+]
+
+
+def restore_table(spec, rows, chunk_size=None):
+    """
+    Restores one table from an iterable of backup rows in a single transaction.
+
+    Args:
+        spec (TableRestore): The table description.
+        rows (iterable): Backup rows, consumed once, may be a generator streaming from a file.
+        chunk_size (int, optional): Rows per executemany statement. Defaults to BACKUP_BATCH_SIZE.
+
+    Returns:
+        dict: Counts of inserted, updated and skipped rows, the elapsed seconds and rows per second.
+    """
+    chunk_size = chunk_size or app.config['BACKUP_BATCH_SIZE']
+    table = spec.model.__table__
+    started = time.perf_counter()
+    report = {"inserted": 0, "updated": 0, "skipped": 0}
+    try:
+        spec.prepare()
+        connection = db.session.connection()
+        if spec.replace:
+            connection.execute(table.delete())
+            existing = set()
+        else:
+            existing = {key for key, in db.session.query(getattr(spec.model, spec.key)).all()}
+        inserts = []
+        # Pending updates grouped by the columns they set, one UPDATE statement per group
+        updates = {}
+
+        def apply_inserts():
+            if inserts:
+                connection.execute(table.insert(), inserts)
+                report["inserted"] += len(inserts)
+                inserts.clear()
+
+        def apply_updates():
+            for names, params in updates.items():
+                # Bind names must differ from column names in a SET clause
+                update = (
+                    table.update()
+                    .where(table.c[spec.key] == bindparam('match_key'))
+                    .values({column: bindparam(f'new{column}') for column in names})
+                )
+                connection.execute(update, params)
+                report["updated"] += len(params)
+            updates.clear()
+
+        for row in rows:
+            columns = spec.columns(row)
+            if columns is None:
+                report["skipped"] += 1
+                continue
+            key = columns.get(spec.key)
+            if key in existing:
+                params = updates.setdefault(tuple(columns), [])
+                params.append({'match_key': key, **{f'new{column}': value for column, value in columns.items()}})
+                if len(params) >= chunk_size:
+                    # Inserts first, a later row may update a key inserted earlier in this restore
+                    apply_inserts()
+                    apply_updates()
+            else:
+                inserts.append({**columns, **spec.insert_columns(row)})
+                if key is not None and not spec.replace:
+                    existing.add(key)
+                if len(inserts) >= chunk_size:
+                    apply_inserts()
+        apply_inserts()
+        apply_updates()
+        # Core inserts bypass the ORM events that keep dashboard counters current and the change log
+        if spec.metric and report["inserted"]:
+            increment(connection, spec.metric, report["inserted"])
+        if report["inserted"] or report["updated"] or spec.replace:
+            request_full_backup(connection)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    elapsed = time.perf_counter() - started
+    total = report["inserted"] + report["updated"]
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(total / elapsed) if elapsed else total
+    return report
+
+def restore_all(data, chunk_size=None, restores=RESTORES):
+    """
+    Restores every table present in data, in dependency order.
+
+    Args:
+        data (dict): Table name to an iterable of backup rows, tables not present are skipped.
+
+    Returns:
+        dict: The restore_table() report of each table.
+    """
+    reports = {}
+    with app.app_context():
+        for spec in restores:
+            if spec.name not in data:
+                continue
+            reports[spec.name] = report = restore_table(spec, data[spec.name], chunk_size)
+            print(
+                f"Restored {spec.name}: {report['inserted']} inserted, {report['updated']} updated, "
+                f"{report['skipped']} skipped in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+            )
+    return reports
+
+
+def sqlite_path(uri):
+    """
+    Returns the file path of a sqlite:/// URI, relative paths resolve against the instance folder like Flask-SQLAlchemy.
+    """
+    path = uri[len('sqlite:///'):]
+    return path if os.path.isabs(path) else os.path.join(app.instance_path, path)
+
+def sqlite_online_backup(source_path, target_path, pages=None):
+    """
+    Copies a live SQLite database with the backup API, then verifies the copy before moving it into place.
+
+    Args:
+        source_path (str): The database being backed up, may be in use.
+        target_path (str): Where the verified copy is written.
+        pages (int, optional): Pages copied per step, writers can proceed between steps. Defaults to BACKUP_SQLITE_PAGES.
+
+    Returns:
+        dict: The number of pages and steps, copy and verify durations, and the size of the copy.
+
+    Raises:
+        RuntimeError: The copy failed PRAGMA integrity_check, the previous backup is kept.
+    """
+    pages = pages or app.config['BACKUP_SQLITE_PAGES']
+    tmp_path = target_path + '.tmp'
+    steps = {"count": 0, "pages": 0}
+
+    def progress(status, remaining, total):
+        steps["count"] += 1
+        steps["pages"] = total
+
+    started = time.perf_counter()
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(tmp_path)
+    try:
+        # sleep is the wait before retrying a step that found the database busy
+        source.backup(target, pages=pages, progress=progress, sleep=0.05)
+        copied = time.perf_counter()
+        result = target.execute('PRAGMA integrity_check').fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+    verified = time.perf_counter()
+    if result != 'ok':
+        os.remove(tmp_path)
+        raise RuntimeError(f"Backup of {source_path} failed integrity_check: {result}")
+    os.replace(tmp_path, target_path)
+    return {
+        "pages": steps["pages"],
+        "steps": steps["count"],
+        "copy_seconds": round(copied - started, 3),
+        "verify_seconds": round(verified - copied, 3),
+        "bytes": os.path.getsize(target_path)
+    }
+
+def rotate_snapshots(directory, stem, keep):
+    """
+    Deletes all but the newest keep snapshots named <stem>-<timestamp>.db.
+
+    Returns:
+        list: The paths removed.
+    """
+    snapshots = sorted(glob.glob(os.path.join(directory, f"{stem}-*.db")))
+    expired = snapshots[:-keep] if keep > 0 else []
+    for path in expired:
+        os.remove(path)
+    return expired
+
+def backup_database(db_uri, backup_uri):
+    """
+    Backs up the SQLite database to backup_uri and adds a timestamped snapshot, keeping BACKUP_SNAPSHOT_KEEP of them.
+
+    Other databases (production MySQL) get a parallel logical dump in backup/dump instead.
+    """
+    if not db_uri.startswith('sqlite:///'):
+        return dump_database('backup/dump')
+    if not backup_uri:
+        print("No SQLALCHEMY_BACKUP_URI configured, skipping database backup.")
+        return None
+    source_path = sqlite_path(db_uri)
+    backup_path = sqlite_path(backup_uri)
+    stats = sqlite_online_backup(source_path, backup_path)
+    print(
+        f"Database backed up to {backup_path}: {stats['pages']} pages in {stats['steps']} steps, "
+        f"copy {stats['copy_seconds']}s, integrity_check {stats['verify_seconds']}s"
+    )
+
+    keep = app.config['BACKUP_SNAPSHOT_KEEP']
+    if keep > 0:
+        directory = app.config['BACKUP_SNAPSHOT_DIR'] or os.path.join(os.path.dirname(backup_path), 'snapshots')
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        snapshot = os.path.join(directory, f"{stem}-{datetime.now().strftime('%Y%m%d%H%M%S')}.db")
+        # Snapshot from the verified backup so the live database is only read once
+        sqlite_online_backup(backup_path, snapshot)
+        expired = rotate_snapshots(directory, stem, keep)
+        print(f"Snapshot {snapshot}, {len(expired)} expired snapshots removed")
+    return stats
+
+
+def snapshot_lock(connection, tables):
+    """
+    Blocks writers until the returned function is called, so worker snapshots all start at the same point.
+    """
+    if connection.dialect.name == 'mysql':
+        connection.exec_driver_sql('LOCK TABLES ' + ', '.join(f'`{table.name}` READ' for table in tables))
+        return lambda: connection.exec_driver_sql('UNLOCK TABLES')
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+        return lambda: connection.exec_driver_sql('ROLLBACK')
+    return lambda: None
+
+def begin_snapshot(connection):
+    """
+    Starts a read transaction whose view of the database stays fixed for the rest of the dump.
+    """
+    if connection.dialect.name == 'mysql':
+        connection.exec_driver_sql('SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        connection.exec_driver_sql('START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY')
+    else:
+        # SQLite starts the read snapshot at the first read of a transaction
+        connection.exec_driver_sql('BEGIN')
+        connection.exec_driver_sql('SELECT count(*) FROM sqlite_master').fetchall()
+
+def encode_value(value):
+    if hasattr(value, 'isoformat'):  # datetime, date and time
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+def decode_value(column, value, fmt):
+    """
+    Converts a dumped value back to the Python type the column expects.
+    """
+    if value is None or (fmt == 'csv' and value == '\\N'):
+        return None
+    kind = column.type
+    if isinstance(kind, types.JSON):
+        return json.loads(value) if fmt == 'csv' else value
+    if isinstance(kind, types.DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(kind, types.Date):
+        return datetime.fromisoformat(value).date()
+    if isinstance(kind, types.Time):
+        return datetime.fromisoformat(f"1970-01-01T{value}").time()
+    if isinstance(kind, types.LargeBinary):
+        return bytes.fromhex(value)
+    if isinstance(kind, types.Boolean):
+        return value in (True, 1, '1', 'True', 'true')
+    if fmt == 'csv':
+        if isinstance(kind, types.Integer):
+            return int(value)
+        if isinstance(kind, types.Float):
+            return float(value)
+    return value
+
+def dump_table(connection, table, directory, fmt, compression, batch_size):
+    """
+    Streams one table, in primary key order, to NDJSON or CSV.
+
+    Returns:
+        dict: The manifest entry of the table.
+    """
+    columns = [column.name for column in table.columns]
+    filename = f"{table.name}.{fmt}{EXTENSIONS[compression]}"
+    path = os.path.join(directory, filename)
+    checksum = hashlib.sha256()
+    count = 0
+    query = select(table).order_by(*table.primary_key.columns)
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+    with open_compressed(path + '.tmp', 'wb', compression) as out:
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+        for row in result:
+            values = [encode_value(value) for value in row]
+            if fmt == 'csv':
+                writer.writerow([
+                    '\\N' if value is None else json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in values
+                ])
+                line = buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                line = (json.dumps(dict(zip(columns, values)), default=str, separators=(',', ':')) + '\n').encode('utf-8')
+            out.write(line)
+            checksum.update(line)
+            count += 1
+    os.replace(path + '.tmp', path)
+    return {"file": filename, "rows": count, "columns": columns, "sha256": checksum.hexdigest()}
+
+def dump_database(directory='backup/dump', workers=None, fmt=None, compression=None, batch_size=None):
+    """
+    Dumps every table of the schema in parallel from one consistent point in time.
+
+    Args:
+        directory (str): The dump directory, created if missing.
+        workers (int, optional): Parallel connections. Defaults to BACKUP_WORKERS.
+        fmt (str, optional): 'ndjson' or 'csv'. Defaults to BACKUP_DUMP_FORMAT.
+        compression (str, optional): 'none', 'gzip' or 'zstd'. Defaults to BACKUP_COMPRESSION.
+        batch_size (int, optional): Rows fetched per round trip. Defaults to BACKUP_BATCH_SIZE.
+
+    Returns:
+        dict: The manifest.
+    """
+    workers = workers or app.config['BACKUP_WORKERS']
+    fmt = fmt or app.config['BACKUP_DUMP_FORMAT']
+    compression = compression or app.config['BACKUP_COMPRESSION']
+    batch_size = batch_size or app.config['BACKUP_BATCH_SIZE']
+    if fmt not in ('ndjson', 'csv'):
+        raise ValueError(f"Unknown dump format {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+
+    with app.app_context():
+        engine = db.engine
+        existing = set(inspect(engine).get_table_names())
+        # The change log only matters between backups, the manifest keeps its watermark instead
+        tables = [table for table in db.metadata.sorted_tables if table.name in existing and table.name != ChangeLog.__tablename__]
+    workers = max(1, min(workers, len(tables)))
+    pending = queue.Queue()
+    for table in sorted(tables, key=lambda table: table.name):
+        pending.put(table)
+    entries, errors = {}, []
+
+    connections = [engine.connect() for _ in range(workers)]
+    coordinator = engine.connect()
+    try:
+        release = snapshot_lock(coordinator, tables)
+        try:
+            for connection in connections:
+                begin_snapshot(connection)
+        finally:
+            release()
+        # Read in the same snapshot, so incremental backups continue exactly where this dump ends
+        watermark = ChangeLog.watermark(connections[0]) if ChangeLog.__tablename__ in existing else 0
+        append_ids = max_ids(connections[0], tables)
+
+        def work(connection):
+            while not errors:
+                try:
+                    table = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    table_started = time.perf_counter()
+                    entries[table.name] = entry = dump_table(connection, table, directory, fmt, compression, batch_size)
+                    entry["seconds"] = round(time.perf_counter() - table_started, 3)
+                    print(f"Dumped {entry['rows']} rows of {table.name} in {entry['seconds']}s")
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(connection,), daemon=True) for connection in connections]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for connection in connections + [coordinator]:
+            connection.close()
+    if errors:
+        raise errors[0]
+
+    manifest = {
+        "format": fmt,
+        "version": 1,
+        "kind": "dump",
+        "dialect": engine.dialect.name,
+        "created_at": datetime.now().isoformat(),
+        "compression": compression,
+        "seconds": round(time.perf_counter() - started, 3),
+        "watermark": watermark,
+        "append_ids": append_ids,
+        "order": [table.name for table in tables],
+        "tables": {table.name: entries[table.name] for table in tables}
+    }
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+    print(f"Dumped {len(tables)} tables with {workers} workers in {manifest['seconds']}s")
+
+    bucket = app.config['BACKUP_S3_BUCKET']
+    if bucket:
+        upload_dump(directory, manifest, bucket)
+    return manifest
+
+def upload_dump(directory, manifest, bucket):
+    """
+    Uploads the dump files to S3, the manifest last so a listed manifest always has its files.
+    """
+    boto3 = optional_import('boto3', 'BACKUP_S3_BUCKET')
+    client = boto3.client('s3')
+    prefix = f"{app.config['BACKUP_S3_PREFIX']}/{manifest['created_at'][:19].replace(':', '')}"
+    for entry in manifest["tables"].values():
+        client.upload_file(os.path.join(directory, entry["file"]), bucket, f"{prefix}/{entry['file']}")
+    client.upload_file(os.path.join(directory, MANIFEST), bucket, f"{prefix}/{MANIFEST}")
+    print(f"Uploaded dump to s3://{bucket}/{prefix}")
+
+def dump_rows(directory, name, manifest):
+    """
+    Yields the rows of one dumped table as dictionaries of raw values, then checks the row count and checksum.
+    """
+    entry = manifest["tables"][name]
+    checksum = hashlib.sha256()
+    count = 0
+    with open_compressed(os.path.join(directory, entry["file"]), 'rb', manifest["compression"]) as raw:
+        lines = io.BufferedReader(raw)
+        if manifest["format"] == 'csv':
+            reader = csv.reader(io.TextIOWrapper(lines, encoding='utf-8', newline=''))
+            # The header is written with the first row, an empty table has none
+            header = next(reader, None)
+            if header is not None:
+                checksum.update(encode_csv_row(header))
+            for values in reader:
+                checksum.update(encode_csv_row(values))
+                count += 1
+                yield dict(zip(header, values))
+        else:
+            for line in lines:
+                checksum.update(line)
+                count += 1
+                yield json.loads(line)
+    if count != entry["rows"] or checksum.hexdigest() != entry["sha256"]:
+        raise ValueError(f"Dump of {name} does not match the manifest")
+
+def encode_csv_row(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+def load_rows(connection, table, target, directory, manifest, batch_size):
+    """
+    Inserts the dumped rows of table into target, which is the table itself or its staging copy.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    columns = {column.name: column for column in table.columns}
+    count = 0
+    chunk = []
+    for row in dump_rows(directory, table.name, manifest):
+        chunk.append({name: decode_value(columns[name], value, manifest["format"]) for name, value in row.items() if name in columns})
+        if len(chunk) >= batch_size:
+            connection.execute(target.insert(), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(target.insert(), chunk)
+        count += len(chunk)
+    return count
+
+def staging_table(table, metadata):
+    """
+    Returns a copy of table's columns, without keys or constraints, to load into before the swap.
+    """
+    return Table(f"{table.name}_load", metadata, *(Column(column.name, column.type) for column in table.columns))
+
+def load_levels(tables):
+    """
+    Groups tables, given parents first, into levels whose tables only reference tables of earlier levels, so each
+    level can load in parallel once the previous one committed.
+    """
+    levels = {}
+    for table in tables:
+        parents = {key.column.table.name for key in table.foreign_keys} - {table.name}
+        levels[table.name] = 1 + max((levels[name] for name in parents if name in levels), default=-1)
+    grouped = [[] for _ in range(max(levels.values(), default=-1) + 1)]
+    for table in tables:
+        grouped[levels[table.name]].append(table)
+    return grouped
+
+def run_parallel(items, workers, task):
+    """
+    Runs task(item) for every item on up to workers threads, stops taking new items after the first error and
+    raises it.
+    """
+    errors = []
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+
+    def work():
+        while not errors:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                task(item)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(min(workers, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def load_dump(directory='backup/dump', workers=None, batch_size=None, atomic=None):
+    """
+    Replaces the contents of every dumped table.
+
+    With one worker (always on SQLite, which allows one writer at a time) every table is emptied and loaded in a
+    single transaction, so a failed load changes nothing.
+
+    With more workers the load is either atomic or direct (BACKUP_LOAD_ATOMIC). A transaction belongs to one
+    connection, so tables loaded in parallel on several connections cannot be rolled back together:
+    - atomic: the tables are loaded in parallel into staging tables, then the real tables are emptied and filled from
+      them in one transaction. The data is copied twice, but the second copy is a single INSERT ... SELECT per table
+      run by the server, without the decoding, checksums and round trips that the parallel load takes off the
+      critical path. A failed load changes nothing.
+    - direct: the tables are emptied in one transaction, then loaded in parallel straight into the real tables, one
+      foreign key level at a time (load_levels), each table in its own transaction. The data is copied once, but a
+      failed load leaves the tables it had not finished empty, load the dump again to recover.
+
+    Returns:
+        dict: Rows loaded and seconds per table.
+    """
+    manifest = read_manifest(directory)
+    if not manifest or manifest.get("kind") != "dump":
+        raise ValueError(f"{directory} does not contain a database dump")
+    workers = workers or app.config['BACKUP_WORKERS']
+    batch_size = batch_size or app.config['BACKUP_BATCH_SIZE']
+    atomic = app.config['BACKUP_LOAD_ATOMIC'] if atomic is None else atomic
+    started = time.perf_counter()
+
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        workers = 1
+    tables = [table for table in db.metadata.sorted_tables if table.name in manifest["tables"]]
+    reports = {}
+
+    def load(connection, table, target):
+        table_started = time.perf_counter()
+        count = load_rows(connection, table, target, directory, manifest, batch_size)
+        reports[table.name] = {"rows": count, "seconds": round(time.perf_counter() - table_started, 3)}
+        print(f"Loaded {count} rows of {table.name} in {reports[table.name]['seconds']}s")
+
+    def empty(connection):
+        # Children before parents so no foreign key is left dangling
+        for table in reversed(tables):
+            connection.execute(table.delete())
+        request_full_backup(connection)
+
+    def replace(connection, sources):
+        empty(connection)
+        for table in tables:
+            sources(connection, table)
+
+    if workers == 1:
+        with engine.begin() as connection:
+            replace(connection, lambda connection, table: load(connection, table, table))
+    elif not atomic:
+        with engine.begin() as connection:
+            empty(connection)
+
+        def load_direct(table):
+            with engine.begin() as connection:
+                load(connection, table, table)
+
+        for level in load_levels(tables):
+            run_parallel(level, workers, load_direct)
+    else:
+        metadata = MetaData()
+        staging = {table.name: staging_table(table, metadata) for table in tables}
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        try:
+            def load_staging(table):
+                # Staging tables have no foreign keys, so every table loads in parallel
+                with engine.begin() as connection:
+                    load(connection, table, staging[table.name])
+
+            run_parallel(tables, workers, load_staging)
+
+            def swap(connection, table):
+                names = [column.name for column in table.columns]
+                connection.execute(table.insert().from_select(names, select(*(staging[table.name].c[name] for name in names))))
+
+            with engine.begin() as connection:
+                replace(connection, swap)
+        finally:
+            metadata.drop_all(engine)
+
+    print(f"Loaded {len(tables)} tables in {round(time.perf_counter() - started, 3)}s")
+    return reports
+
+
+# Tables appended to by bulk inserts, which bypass the change log, so their new rows are backed up by id. Messages are
+# also edited and deleted through the ORM, those changes come from the change log as for any captured table.
+APPEND_ONLY = ('messages', 'time_entries')
+
+def max_ids(connection, tables):
+    """
+    Returns the highest id of each append-only table.
+    """
+    return {
+        table.name: connection.execute(select(func.max(table.c.id))).scalar() or 0
+        for table in tables if table.name in APPEND_ONLY
+    }
+
+def read_changes(connection, since, grace):
+    """
+    Returns the changed row ids per table after a watermark, and the new watermark.
+
+    Log ids are taken when a change is written but become visible at commit, so a missing id may still show up. The
+    read stops before a gap followed by an entry younger than grace seconds; older gaps are rolled back transactions.
+
+    Returns:
+        tuple: ({table: set of row ids}, watermark)
+    """
+    log = ChangeLog.__table__
+    rows = connection.execute(
+        select(log.c.id, log.c._table, log.c._row_id, log.c._changed_at).where(log.c.id > since).order_by(log.c.id)
+    )
+    changes = {}
+    watermark = since
+    now = datetime.utcnow()
+    for id, table, row_id, changed_at in rows:
+        if id != watermark + 1 and (now - changed_at).total_seconds() < grace:
+            break
+        changes.setdefault(table, set()).add(row_id)
+        watermark = id
+    return changes, watermark
+
+def backup_chain(root):
+    """
+    Returns (directory, manifest) of the newest chain: its base dump followed by its incrementals, oldest first.
+    """
+    backups = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        manifest = read_manifest(os.path.join(root, name))
+        if manifest:
+            backups.append((os.path.join(root, name), manifest))
+    bases = [index for index, (_, manifest) in enumerate(backups) if manifest.get("kind") == "dump"]
+    return backups[bases[-1]:] if bases else []
+
+def write_rows(connection, table, query, directory, compression):
+    """
+    Streams the rows of a query to <directory>/<table>.ndjson[.gz|.zst].
+
+    Returns:
+        tuple: The manifest entry and the set of ids written.
+    """
+    columns = [column.name for column in table.columns]
+    filename = f"{table.name}.ndjson{EXTENSIONS[compression]}"
+    path = os.path.join(directory, filename)
+    checksum = hashlib.sha256()
+    ids = set()
+    with open_compressed(path + '.tmp', 'wb', compression) as out:
+        for row in connection.execution_options(stream_results=True).execute(query):
+            values = dict(zip(columns, (encode_value(value) for value in row)))
+            line = (json.dumps(values, default=str, separators=(',', ':')) + '\n').encode('utf-8')
+            out.write(line)
+            checksum.update(line)
+            ids.add(values.get('id'))
+    os.replace(path + '.tmp', path)
+    return {"file": filename, "rows": len(ids), "columns": columns, "sha256": checksum.hexdigest()}, ids
+
+def backup_incremental(root='backup/cdc', compression=None):
+    """
+    Adds an incremental backup to the newest chain, or starts a new chain with a full dump.
+
+    A new chain starts when there is none yet, the current one has BACKUP_FULL_EVERY incrementals, or a bulk write
+    such as a restore called request_full_backup() since the previous backup. Change log entries covered by a new full
+    dump are pruned.
+
+    Returns:
+        dict: The manifest written.
+    """
+    compression = compression or app.config['BACKUP_COMPRESSION']
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    chain = backup_chain(root)
+    full = not chain or len(chain) > app.config['BACKUP_FULL_EVERY']
+    if not full:
+        with app.app_context():
+            with db.engine.connect() as connection:
+                full = ChangeLog.full_backup_requested(connection, chain[-1][1]["watermark"])
+    if full:
+        manifest = dump_database(os.path.join(root, f"{stamp}-base"), fmt='ndjson', compression=compression)
+        with app.app_context():
+            with db.engine.begin() as connection:
+                ChangeLog.prune(connection, manifest["watermark"])
+        return manifest
+
+    base, previous = chain[0][1], chain[-1][1]
+    directory = os.path.join(root, f"{stamp}-incr")
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    with app.app_context():
+        engine = db.engine
+        existing = set(inspect(engine).get_table_names())
+    tables = [table for table in db.metadata.sorted_tables if table.name in base["tables"] and table.name in existing]
+    log = ChangeLog.__table__
+    entries = {}
+
+    with engine.connect() as connection:
+        begin_snapshot(connection)
+        changes, watermark = read_changes(connection, previous["watermark"], app.config['BACKUP_CDC_GRACE'])
+        for table in tables:
+            if table.name in CAPTURED or table.name in APPEND_ONLY:
+                changed = changes.get(table.name, set())
+                conditions = []
+                if changed:
+                    # Select the changed rows with the log as a subquery instead of sending the id list
+                    ids = select(log.c._row_id).where(
+                        log.c._table == table.name, log.c.id > previous["watermark"], log.c.id <= watermark
+                    )
+                    conditions.append(table.c.id.in_(ids))
+                if table.name in APPEND_ONLY:
+                    conditions.append(table.c.id > previous["append_ids"].get(table.name, 0))
+                if not conditions:
+                    continue
+                query = select(table).where(or_(*conditions)).order_by(table.c.id)
+                entry, written = write_rows(connection, table, query, directory, compression)
+                entry["deletes"] = sorted(changed - written)
+                # Append only rows are all new, changed rows may exist in the restored database
+                entry["mode"] = "changes" if table.name in CAPTURED else "append"
+            else:
+                # Tables written by bulk statements without a change log, such as the metric counters, are small
+                entry, written = write_rows(connection, table, select(table), directory, compression)
+                entry["mode"] = "full"
+            entries[table.name] = entry
+        append_ids = {**previous["append_ids"], **max_ids(connection, tables)}
+
+    manifest = {
+        "format": "ndjson",
+        "version": 1,
+        "kind": "incremental",
+        "created_at": datetime.now().isoformat(),
+        "compression": compression,
+        "since": previous["watermark"],
+        "watermark": watermark,
+        "append_ids": append_ids,
+        "seconds": round(time.perf_counter() - started, 3),
+        "order": [table.name for table in tables if table.name in entries],
+        "tables": entries
+    }
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+    rows = sum(entry["rows"] for entry in entries.values())
+    print(f"Incremental backup of {rows} rows from {len(entries)} tables in {manifest['seconds']}s")
+    return manifest
+
+def apply_incremental(directory, manifest, batch_size=None):
+    """
+    Applies one incremental backup in a single transaction: upserts parents first, then deletes children first.
+    """
+    batch_size = batch_size or app.config['BACKUP_BATCH_SIZE']
+    with app.app_context():
+        engine = db.engine
+    tables = [table for table in db.metadata.sorted_tables if table.name in manifest["tables"]]
+    with engine.begin() as connection:
+        for table in tables:
+            entry = manifest["tables"][table.name]
+            columns = {column.name: column for column in table.columns}
+            if entry["mode"] == "full":
+                connection.execute(table.delete())
+            update = (
+                table.update()
+                .where(table.c.id == bindparam('match_id'))
+                .values({name: bindparam(f'new{name}') for name in columns})
+            )
+
+            def apply(chunk):
+                present = set()
+                if entry["mode"] == "changes":
+                    ids = [row["id"] for row in chunk]
+                    present = {id for id, in connection.execute(select(table.c.id).where(table.c.id.in_(ids)))}
+                inserts = [row for row in chunk if row["id"] not in present]
+                updates = [
+                    {'match_id': row["id"], **{f'new{name}': value for name, value in row.items()}}
+                    for row in chunk if row["id"] in present
+                ]
+                if inserts:
+                    connection.execute(table.insert(), inserts)
+                if updates:
+                    connection.execute(update, updates)
+
+            chunk = []
+            for row in dump_rows(directory, table.name, manifest):
+                chunk.append({name: decode_value(columns[name], value, 'ndjson') for name, value in row.items() if name in columns})
+                if len(chunk) >= batch_size:
+                    apply(chunk)
+                    chunk = []
+            if chunk:
+                apply(chunk)
+        for table in reversed(tables):
+            deletes = manifest["tables"][table.name].get("deletes")
+            for start in range(0, len(deletes or []), batch_size):
+                connection.execute(table.delete().where(table.c.id.in_(deletes[start:start + batch_size])))
+        request_full_backup(connection)
+
+def restore_incremental(root='backup/cdc'):
+    """
+    Restores the newest chain: loads its base dump, then replays each incremental in order.
+    """
+    chain = backup_chain(root)
+    if not chain:
+        raise ValueError(f"No base backup found in {root}")
+    started = time.perf_counter()
+    (base, _), incrementals = chain[0], chain[1:]
+    load_dump(base)
+    for directory, manifest in incrementals:
+        apply_incremental(directory, manifest)
+        print(f"Replayed {directory}")
+    print(f"Restored base and {len(incrementals)} incrementals in {round(time.perf_counter() - started, 3)}s")
@@ -0,0 +1,90 @@
+""" gunicorn.conf.py
+Gunicorn settings for the realtime entry point.
+
+Usage:
+> gunicorn -c gunicorn.conf.py server:app
+
+The worker class follows SOCKETIO_ASYNC_MODE (threading by default, like server.py and __init__.py) so WebSockets work
+under gunicorn:
+- eventlet: eventlet worker, one process serves thousands of sockets.
+- gevent: gevent-websocket worker.
+- threading: gthread worker, long-polling and WebSocket through simple-websocket.
+
+WEB_CONCURRENCY sets the number of workers. Socket.IO clients must keep talking to the same process and every worker has
+to see the same rooms and presence, so the default is 1 worker, and 3 only when both SOCKETIO_MESSAGE_QUEUE and
+PRESENCE_BACKEND=redis are set. gunicorn does not route a client back to its worker, so more than one worker also needs
+a load balancer with sticky sessions in front of them.
+
+With METRICS_MULTIPROC_DIR set, each worker writes its request stats there and /metrics merges them.
+
+GUNICORN_PRELOAD=true imports the app once in the master and forks the workers from it (see main.prepare_fork and
+main.after_fork). The garbage collector is off while the app loads, then everything the master allocated is frozen and
+collection is turned back on, so collections in the workers (and in the master) do not write to, and copy, the shared
+pages. scripts/fork_benchmark.py compares memory with and without preload. Code changes then need a restart rather than
+a HUP, since HUP reuses the preloaded app.
+"""
+import gc
+import glob
+import os
+
+WORKER_CLASSES = {
+    'eventlet': 'eventlet',
+    'gevent': 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker',
+    'threading': 'gthread',
+}
+
+async_mode = os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'threading')
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8696'
+# Several workers only share Socket.IO rooms and presence through Redis
+shared_state = bool(os.environ.get('SOCKETIO_MESSAGE_QUEUE')) and os.environ.get('PRESENCE_BACKEND') == 'redis'
+workers = int(os.environ.get('WEB_CONCURRENCY') or (3 if shared_state else 1))
+worker_class = WORKER_CLASSES[async_mode]
+threads = int(os.environ.get('GUNICORN_THREADS') or 100) if async_mode == 'threading' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 1000)
+timeout = 120
+preload_app = (os.environ.get('GUNICORN_PRELOAD') or 'false').lower() == 'true'
+
+if preload_app:
+    gc.disable()  # collections while the app loads would leave holes in the pages the workers share
+
+
+def on_starting(server):
+    """
+    Clears request stats left by the workers of a previous run.
+    """
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.json*')):
+            os.remove(path)
+
+
+def when_ready(server):
+    """
+    Warms the preloaded app once, before any worker is forked, then freezes it and reenables collection in the master.
+    """
+    if preload_app:
+        import main
+        main.prepare_fork()
+        gc.freeze()
+        gc.enable()
+
+
+def pre_fork(server, worker):
+    """
+    Moves everything the master allocated since, for example while restarting a worker, out of the collector's reach,
+    so workers never touch those objects' headers.
+    """
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """
+    Gives the worker its own database connections, collection is already on since when_ready.
+    """
+    if preload_app:
+        import main
+        main.after_fork()
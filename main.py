@@ -1,38 +1,113 @@
 # imports from flask
 import json
 import os
-from urllib.parse import urljoin, urlparse
-from flask import abort, redirect, render_template, request, send_from_directory, url_for, jsonify  # import render_template from "public" flask libraries
+from urllib.parse import quote, urljoin, urlparse
+from flask import abort, redirect, render_template, request, send_from_directory, url_for, jsonify, Response  # import render_template from "public" flask libraries
 from flask_login import current_user, login_user, logout_user
 from flask.cli import AppGroup
 from flask_login import current_user, login_required
 from flask import current_app
 from werkzeug.security import generate_password_hash
-import shutil
+import mimetypes
+from werkzeug.security import safe_join
 from functools import wraps
-from flask_socketio import SocketIO, send, emit
+from flask_socketio import emit
 
 # import "objects" from "this" project
-from __init__ import app, db, login_manager  # Key Flask objects 
-# API endpoints
-from api.user import user_api 
-from api.pfp import pfp_api
-from api.post import post_api
-from api.usettings import settings_api
+from __init__ import app, db, login_manager, socketio  # Key Flask objects 
 # database Initialization functions
 from model.user import User, initUsers
 from model.section import Section, initSections
 from model.post import Post, initPosts
 from model.channel import Channel, initChannels
 from model.group import Group, initGroups
-from model.usettings import Settings  # Import the Settings model
+from model.usettings import Settings, initSettings  # Import the Settings model
+from model.metric import initMetrics
+from model.language import initLanguages
+# Models only the API modules use, imported here so db.create_all() builds every table without create_app()
+from model.help import HelpRequest
+from model.message import Message
+from model.timetrack import TimeEntry
+from model.vote import Vote
+from model.presence import presence_store
+from model.leaderboard import Leaderboard
+from backup import backup_database, backup_incremental, dump_database, export_all, load_dump, read_manifest, read_table, restore_all, restore_incremental
 # server only Views
 
 
-# register URIs for api endpoints
-app.register_blueprint(user_api)
-app.register_blueprint(pfp_api) 
-app.register_blueprint(post_api)
+def create_app():
+    """
+    Finishes the shared app for serving: creates the instance folders and registers the API blueprints, the
+    Socket.IO chat handlers and the request instrumentation.
+
+    Importing main only defines the server pages and the CLI commands, so CLI commands and scripts start without
+    loading every API module. Nothing here touches the database; the schema and seed data are only created by the
+    `flask custom create_schema` and `flask custom generate_data` commands.
+
+    Serving entry points call this once: server.py (gunicorn), `python main.py`, and
+    `flask --app "main:create_app()" run`.
+
+    Returns:
+        Flask: The shared app.
+    """
+    if app.config.get('SERVING'):
+        return app
+    app.config['SERVING'] = True
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    if app.config['METRICS_MULTIPROC_DIR']:
+        os.makedirs(app.config['METRICS_MULTIPROC_DIR'], exist_ok=True)
+
+    # API endpoints, imported here so CLI commands do not pay for them
+    from api.user import user_api
+    from api.pfp import pfp_api
+    from api.post import post_api
+    from api.message import message_api
+    from api.metric import metric_api
+    from api.health import health_api
+    from api.stats import stats_api
+    from api.timetrack import timetrack_api
+    from api.help import help_api
+    from api.language import language_api
+    import api.querywatch  # opt-in SQL instrumentation, see QUERY_WATCH
+    import api.chat  # registers the chat Socket.IO handlers
+
+    # register URIs for api endpoints
+    app.register_blueprint(user_api)
+    app.register_blueprint(pfp_api)
+    app.register_blueprint(post_api)
+    app.register_blueprint(message_api)
+    app.register_blueprint(metric_api)
+    app.register_blueprint(health_api)
+    app.register_blueprint(stats_api)
+    app.register_blueprint(timetrack_api)
+    app.register_blueprint(help_api)
+    app.register_blueprint(language_api)
+    return app
+
+def prepare_fork():
+    """
+    Builds the lazily created parts of the app in the gunicorn master when it preloads the app (GUNICORN_PRELOAD), so
+    workers inherit them through copy-on-write instead of each building its own: the sorted URL map, the compiled
+    templates and the mimetypes table used for static and upload files.
+
+    It also closes the master's database connections, a socket inherited by several workers would interleave their
+    queries.
+    """
+    mimetypes.init()
+    with app.app_context():
+        app.url_map.update()
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            app.jinja_env.get_template(name)
+        db.engine.dispose()
+
+def after_fork():
+    """
+    Gives a forked worker its own connection pool. close=False drops the inherited pool without closing connections
+    that may still belong to the master or a sibling.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
 
 # Tell Flask-Login the view function name of your login route
 login_manager.login_view = "login"
@@ -109,73 +184,106 @@ def unauthorized():
 def user_index():
     return render_template("user_index.html")
 
+# Columns the admin user tables can be sorted by
+USER_SORT_COLUMNS = {'id': User.id, 'uid': User._uid, 'name': User._name, 'role': User._role}
+
+def user_table_page():
+    """
+    Returns the rows for the user tables and the pagination state.
+
+    Non-admins only ever see themselves. Admins get one page of users, sorted by the 'sort' and 'order' query
+    parameters and filtered by a 'q' prefix match on uid or name. The prefix match is written as a range so the
+    _uid and _name indexes are used instead of scanning the table.
+    """
+    if current_user.role != 'Admin':
+        return [current_user], None
+
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc')
+    column = USER_SORT_COLUMNS.get(sort, User.id)
+
+    query = User.query
+    if search:
+        upper = search + '\uffff'
+        query = query.filter(db.or_(
+            db.and_(User._uid >= search, User._uid < upper),
+            db.and_(User._name >= search, User._name < upper)
+        ))
+    query = query.order_by(column.desc() if order == 'desc' else column.asc(), User.id.asc())
+    pagination = query.paginate(
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', 50, type=int),
+        max_per_page=200,
+        error_out=False
+    )
+    return pagination.items, pagination
+
 @app.route('/users/table')
 @login_required
 def utable():
-    users = User.query.all()
-    return render_template("utable.html", user_data=users)
+    users, pagination = user_table_page()
+    return render_template("utable.html", user_data=users, pagination=pagination)
 
 @app.route('/users/table2')
 @login_required
 def u2table():
-    users = User.query.all()
-    return render_template("u2table.html", user_data=users)
+    users, pagination = user_table_page()
+    return render_template("u2table.html", user_data=users, pagination=pagination)
 
 @app.route('/users/votedata')
 @admin_required
 @login_required
 def uvote():
-    users = User.query.all()
-    return render_template("uvote.html", user_data=users)
+    return render_template("uvote.html")
 
 @app.route('/postdata')
 @admin_required
 @login_required
 def postData():
-    users = User.query.all()
-    return render_template("postData.html", user_data=users)
+    return render_template("postData.html")
 
 @app.route('/chatdata')
 @admin_required
 @login_required
 def chatData():
-    users = User.query.all()
-    return render_template("chatData.html", user_data=users)
+    return render_template("chatData.html")
 
 @app.route('/languagedata')
 @admin_required
 @login_required
 def languageData():
-    users = User.query.all()
-    return render_template("languageData.html", user_data=users)
+    return render_template("languageData.html")
 
 @app.route('/pollData')
 @admin_required
 @login_required
 def pollData():
-    users = User.query.all()
-    return render_template("pollData.html", user_data=users)
+    return render_template("pollData.html")
 
 @app.route('/users/settings')
 @admin_required
 @login_required
 def usettings():
-    users = User.query.all()
-    return render_template("usettings.html", user_data=users)
+    return render_template("usettings.html")
 
 @app.route('/users/reports')
 @admin_required
 @login_required
 def ureports():
-    users = User.query.all()
-    return render_template("ureports.html", user_data=users)
+    return render_template("ureports.html")
 
 @app.route('/users/health', methods=['GET'])
 @admin_required
 @login_required
 def uhealth():
-    users = User.query.all()
-    return render_template("uhealth.html", user_data=users)
+    return render_template("uhealth.html")
+
+@app.route('/users/help')
+@admin_required
+@login_required
+def uhelp():
+    return render_template("uhelp.html")
 
 @app.route('/general-settings', methods=['GET', 'POST'])
 @login_required
@@ -193,7 +301,20 @@ def general_settings():
 # Helper function to extract uploads for a user (ie PFP image)
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    accel_location = current_app.config['UPLOAD_ACCEL_REDIRECT']
+    if not accel_location:
+        return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+
+    # Flask validates the path, nginx performs the actual file transfer from its internal location
+    file_path = safe_join(current_app.config['UPLOAD_FOLDER'], filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+    internal_path = safe_join(accel_location, filename)
+    response = Response(status=200)
+    # nginx reads the header as a URI and decodes it, so spaces, '%', '?' and non-ASCII names must be escaped
+    response.headers['X-Accel-Redirect'] = quote(internal_path)
+    response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return response
  
 @app.route('/users/delete/<int:user_id>', methods=['DELETE'])
 @login_required
@@ -224,25 +345,51 @@ def reset_password(user_id):
 # Create an AppGroup for custom commands
 custom_cli = AppGroup('custom', help='Custom commands')
 
-socketio = SocketIO(app, cors_allowed_origins="*")
+leaderboard = Leaderboard(store=presence_store)
+leaderboard_task = None
+
+def broadcast_leaderboard():
+    """Emit the top players at most once per interval, and only when the ranking changed."""
+    while True:
+        socketio.sleep(app.config['LEADERBOARD_BROADCAST_INTERVAL'])
+        if leaderboard.take_changed():
+            socketio.emit("leaderboard", leaderboard.top(app.config['LEADERBOARD_SIZE']))
 
-players = []  # Keep a list of players and scores
+def schedule_leaderboard_broadcast():
+    global leaderboard_task
+    if leaderboard_task is None:
+        leaderboard_task = socketio.start_background_task(broadcast_leaderboard)
 
 @socketio.on("player_join")
 def handle_player_join(data):
     name = data.get("name")
     if name:
-        players.append({"name": name, "score": 0})
+        leaderboard.add(name)
+        schedule_leaderboard_broadcast()
         emit("player_joined", {"name": name}, broadcast=True)
 
 @socketio.on("player_score")
 def handle_player_score(data):
     name = data.get("name")
-    score = data.get("score", 0)
-    for p in players:
-        if p["name"] == name:
-            p["score"] = score
-            break
+    try:
+        score = int(data.get("score", 0))
+    except (TypeError, ValueError):
+        return
+    if leaderboard.update(name, score):
+        schedule_leaderboard_broadcast()
+
+@socketio.on("leaderboard")
+def handle_leaderboard(data=None):
+    k = app.config['LEADERBOARD_SIZE']
+    if data and isinstance(data.get("k"), int):
+        k = max(1, min(data["k"], 100))
+    emit("leaderboard", leaderboard.top(k))
+
+@socketio.on("player_rank")
+def handle_player_rank(data):
+    if not isinstance(data, dict) or not data.get("name"):
+        return
+    emit("player_rank", leaderboard.rank(data["name"]))
 
 
 # Define a command to run the data generation functions
@@ -253,59 +400,49 @@ def generate_data():
     initGroups()
     initChannels()
     initPosts()
+    initLanguages()
+    initSettings()
+    initMetrics()
 
-    
-# Backup the old database
-def backup_database(db_uri, backup_uri):
-    """Backup the current database."""
-    if backup_uri:
-        db_path = db_uri.replace('sqlite:///', 'instance/')
-        backup_path = backup_uri.replace('sqlite:///', 'instance/')
-        shutil.copyfile(db_path, backup_path)
-        print(f"Database backed up to {backup_path}")
-    else:
-        print("Backup not supported for production database.")
-
-# Extract data from the existing database
-def extract_data():
-    data = {}
+# Define a command to create missing tables without adding any data
+@custom_cli.command('create_schema')
+def create_schema():
     with app.app_context():
-        data['users'] = [user.read() for user in User.query.all()]
-        data['sections'] = [section.read() for section in Section.query.all()]
-        data['groups'] = [group.read() for group in Group.query.all()]
-        data['channels'] = [channel.read() for channel in Channel.query.all()]
-    return data
+        db.create_all()
+    print("Schema created.")
 
-# Save extracted data to JSON files
-def save_data_to_json(data, directory='backup'):
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    for table, records in data.items():
-        with open(os.path.join(directory, f'{table}.json'), 'w') as f:
-            json.dump(records, f)
-    print(f"Data backed up to {directory} directory.")
+    
+# Define a command to rebuild the dashboard counter totals from the tables
+@custom_cli.command('seed_metrics')
+def seed_metrics():
+    initMetrics()
 
-# Load data from JSON files
+# Load data from a backup directory, NDJSON tables are streamed and checked against their manifest
 def load_data_from_json(directory='backup'):
+    manifest = read_manifest(directory)
+    if manifest:
+        return {table: read_table(directory, table, manifest) for table in manifest['tables']}
     data = {}
     for table in ['users', 'sections', 'groups', 'channels']:
+        if not os.path.exists(os.path.join(directory, f'{table}.json')):
+            continue  # no backup was taken, for example before the first deploy
         with open(os.path.join(directory, f'{table}.json'), 'r') as f:
             data[table] = json.load(f)
     return data
 
 def restore_data(data):
-    with app.app_context():
-        users = User.restore(data['users'])
-        _ = Section.restore(data['sections'])
-        _ = Group.restore(data['groups'], users)
-        _ = Channel.restore(data['channels'])
+    restore_all(data)
     print("Data restored to the new database.")
 
 # Define a command to backup data
 @custom_cli.command('backup_data')
 def backup_data():
-    data = extract_data()
-    save_data_to_json(data)
+    with app.app_context():
+        if not db.inspect(db.engine).get_table_names():
+            print("Database has no tables yet, nothing to back up.")
+            return
+    export_all('backup')
+    print("Data backed up to backup directory.")
     backup_database(app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_BACKUP_URI'])
 
 # Define a command to restore data
@@ -313,6 +450,24 @@ def backup_data():
 def restore_data_command():
     data = load_data_from_json()
     restore_data(data)
+
+# Define commands for the full logical dump of every table, used for production MySQL
+@custom_cli.command('dump_database')
+def dump_database_command():
+    dump_database('backup/dump')
+
+@custom_cli.command('load_dump')
+def load_dump_command():
+    load_dump('backup/dump')
+
+# Define commands for incremental backups, a full base followed by change log exports
+@custom_cli.command('backup_incremental')
+def backup_incremental_command():
+    backup_incremental('backup/cdc')
+
+@custom_cli.command('restore_incremental')
+def restore_incremental_command():
+    restore_incremental('backup/cdc')
     
 # Register the custom command group with the Flask application
 app.cli.add_command(custom_cli)
@@ -320,4 +475,5 @@ app.cli.add_command(custom_cli)
 # this runs the flask application on the development server
 if __name__ == "__main__":
     # change name for testing
-    app.run(debug=True, host="0.0.0.0", port="8696")
+    create_app()
+    socketio.run(app, debug=True, host="0.0.0.0", port=8696)
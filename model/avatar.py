@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+from __init__ import app
+from model.user import User
+
+def default_avatar(username):
+    """
+    Returns the generated avatar used when a user has no profile picture.
+    """
+    return f"https://api.dicebear.com/7.x/identicon/svg?seed={quote(username)}"
+
+def pfp_url(uid, pfp):
+    """
+    Returns the URL the uploads route serves a profile picture from.
+    """
+    return f"/uploads/{quote(uid)}/{quote(pfp)}"
+
+class AvatarCache:
+    """
+    Maps chat usernames (user uids) to avatar URLs through a bounded LRU cache.
+
+    Lookups for chat messages are served from memory. Misses are resolved from the users table, and prefetch()
+    resolves a whole room in one query when someone joins, so message fan-out does not query the database.
+    Entries are invalidated when the profile picture API changes a picture, and expire after ttl seconds so other
+    workers eventually see the change too.
+    """
+    def __init__(self, size=10000, ttl=300):
+        """
+        Args:
+            size (int): The maximum number of cached users.
+            ttl (float): Seconds an entry stays valid, 0 keeps entries until invalidated or evicted.
+        """
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _get(self, username):
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        url, expires = entry
+        if self.ttl and expires < time.monotonic():
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return url
+
+    def _put(self, username, url):
+        self._entries[username] = (url, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def get(self, username):
+        """
+        Returns the avatar URL of a user, querying the database only on a cache miss.
+
+        Args:
+            username (str): The user's uid.
+
+        Returns:
+            str: The uploaded profile picture URL, or a generated avatar.
+        """
+        with self._lock:
+            url = self._get(username)
+        if url is None:
+            url = self.prefetch([username]).get(username)
+        return url
+
+    def prefetch(self, usernames):
+        """
+        Resolves all uncached usernames with a single query.
+
+        Args:
+            usernames (iterable): User uids, for example everyone online in a room.
+
+        Returns:
+            dict: The avatar URL of every requested username.
+        """
+        resolved = {}
+        with self._lock:
+            missing = []
+            for username in set(usernames):
+                url = self._get(username)
+                if url is None:
+                    missing.append(username)
+                else:
+                    resolved[username] = url
+        if not missing:
+            return resolved
+
+        with app.app_context():
+            rows = User.query.with_entities(User._uid, User._pfp).filter(User._uid.in_(missing)).all()
+        found = {uid: pfp_url(uid, pfp) for uid, pfp in rows if pfp}
+        with self._lock:
+            for username in missing:
+                url = found.get(username) or default_avatar(username)
+                self._put(username, url)
+                resolved[username] = url
+        return resolved
+
+    def invalidate(self, username):
+        """
+        Forgets a user's cached avatar, called after the profile picture changes.
+        """
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+# Shared cache used by the chat handlers and invalidated by the profile picture API
+avatar_cache = AvatarCache(size=app.config['AVATAR_CACHE_SIZE'], ttl=app.config['AVATAR_CACHE_TTL'])
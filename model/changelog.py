@@ -0,0 +1,94 @@
+from datetime import datetime
+from sqlalchemy import event, func
+from __init__ import db
+
+# Names of the tables whose changes are recorded
+CAPTURED = set()
+# Table name of the entry left by bulk writes that bypass the capture events, the next backup is a full dump
+FULL_BACKUP = '*'
+
+class ChangeLog(db.Model):
+    """
+    ChangeLog Model
+
+    One row per insert, update or delete of a captured model, written in the same transaction as the change. The id
+    is the position in the log: an incremental backup exports the rows named by entries after the watermark of the
+    previous backup. Ids are never reused: SQLite gets AUTOINCREMENT, and pruning keeps the newest entry so that
+    MySQL before 8.0, which restarts AUTO_INCREMENT at the max id, also continues above the watermark.
+
+    Attributes:
+        id (db.Column): The primary key, the log sequence number.
+        _table (db.Column): A string representing the table of the changed row.
+        _row_id (db.Column): An integer representing the primary key of the changed row.
+        _op (db.Column): A string, "upsert" for inserts and updates, "delete" for deletes.
+        _changed_at (db.Column): A datetime representing when the change was written.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    _table = db.Column(db.String(64), nullable=False)
+    _row_id = db.Column(db.Integer, nullable=False)
+    _op = db.Column(db.String(10), nullable=False)
+    _changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def watermark(connection):
+        """
+        Returns the newest log id visible on the connection, 0 for an empty log.
+        """
+        return connection.execute(db.select(func.max(ChangeLog.id))).scalar() or 0
+
+    @staticmethod
+    def prune(connection, up_to):
+        """
+        Deletes log entries already covered by a full backup, except the one holding the watermark.
+        """
+        connection.execute(ChangeLog.__table__.delete().where(ChangeLog.id < up_to))
+
+    @staticmethod
+    def full_backup_requested(connection, since):
+        """
+        Returns whether request_full_backup() was called after the watermark since.
+        """
+        query = db.select(ChangeLog.id).where(ChangeLog._table == FULL_BACKUP, ChangeLog.id > since).limit(1)
+        return connection.execute(query).first() is not None
+
+
+def log_change(connection, table, row_id, op):
+    connection.execute(
+        ChangeLog.__table__.insert(),
+        {"_table": table, "_row_id": row_id, "_op": op, "_changed_at": datetime.utcnow()}
+    )
+
+def request_full_backup(connection):
+    """
+    Makes the next incremental backup a full dump, for bulk writes the change log cannot name the rows of, such as a
+    restore. Written on the connection of the bulk write, so it only counts if that transaction commits.
+    """
+    log_change(connection, FULL_BACKUP, 0, 'full')
+
+def capture(model):
+    """
+    Records inserts, updates and deletes made through the ORM for a model in the change log.
+
+    Bulk Core statements bypass these events, tables written that way are either append-only (backed up by id) or
+    call request_full_backup().
+
+    Args:
+        model (db.Model): The model class to capture, it must have an integer id primary key.
+    """
+    table = model.__tablename__
+    CAPTURED.add(table)
+
+    @event.listens_for(model, 'after_insert')
+    def capture_insert(mapper, connection, target):
+        log_change(connection, table, target.id, 'upsert')
+
+    @event.listens_for(model, 'after_update')
+    def capture_update(mapper, connection, target):
+        log_change(connection, table, target.id, 'upsert')
+
+    @event.listens_for(model, 'after_delete')
+    def capture_delete(mapper, connection, target):
+        log_change(connection, table, target.id, 'delete')
@@ -1,4 +1,5 @@
 from __init__ import app, db
+from model.changelog import capture
 
 class Channel(db.Model):
     __tablename__ = 'channels'
@@ -36,6 +37,9 @@ class Channel(db.Model):
         db.session.commit()
         print("Channels restored.")
 
+# Record changes for incremental backups
+capture(Channel)
+
 def initChannels():
     """
     The initChannels function creates the Channel table and adds tester data to the table.
@@ -1,4 +1,5 @@
 from __init__ import app, db
+from model.changelog import capture
 
 class Group(db.Model):
     __tablename__ = 'groups'
@@ -36,6 +37,9 @@ class Group(db.Model):
         db.session.commit()
         print("Groups restored.")
 
+# Record changes for incremental backups
+capture(Group)
+
 def initGroups():
     """
     The initGroups function creates the Group table and adds tester data to the table.
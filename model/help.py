@@ -0,0 +1,147 @@
+from datetime import datetime
+from sqlalchemy import and_, func, or_
+from __init__ import db
+from model.changelog import capture
+
+class HelpRequest(db.Model):
+    """
+    HelpRequest Model
+
+    The HelpRequest class represents a question a user asked the admins, worked through as a queue by status.
+
+    Deleting a request only marks it deleted, so admin pages polling with a since cursor learn about the deletion.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the request.
+        _message (db.Column): A string representing the user's question.
+        _response (db.Column): A string representing the admin's answer.
+        _status (db.Column): A string representing the queue state, for example "Pending" or "Resolved".
+        _user_id (db.Column): An integer representing the user who asked.
+        _deleted (db.Column): A boolean, True once the request has been deleted.
+        _created_at (db.Column): A datetime representing when the request was made.
+        _updated_at (db.Column): A datetime representing the last change, the polling cursor.
+    """
+    __tablename__ = 'help_requests'
+    __table_args__ = (db.Index('ix_help_requests_status_created', '_status', '_created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    _message = db.Column(db.Text, nullable=False)
+    _response = db.Column(db.Text, nullable=False, default='')
+    _status = db.Column(db.String(20), nullable=False, default='Pending')
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    _deleted = db.Column(db.Boolean, nullable=False, default=False)
+    _created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    _updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __init__(self, message, response='', status='Pending', user_id=None):
+        """
+        Constructor, 1st step in object creation.
+
+        Args:
+            message (str): The user's question.
+            response (str): The admin's answer.
+            status (str): The queue state.
+            user_id (int, optional): The user who asked.
+        """
+        self._message = message
+        self._response = response
+        self._status = status
+        self._user_id = user_id
+        self._created_at = self._updated_at = datetime.now()
+
+    def __repr__(self):
+        return f"HelpRequest(id={self.id}, status={self._status}, user_id={self._user_id})"
+
+    def create(self):
+        """
+        Adds the help request to the database and commits the transaction.
+        """
+        try:
+            db.session.add(self)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return self
+
+    def read(self):
+        if self._deleted:
+            return {"id": self.id, "deleted": True, "updated_at": self._updated_at.isoformat()}
+        return {
+            "id": self.id,
+            "message": self._message,
+            "response": self._response,
+            "status": self._status,
+            "user_id": self._user_id,
+            "created_at": self._created_at.isoformat(),
+            "updated_at": self._updated_at.isoformat()
+        }
+
+    def update(self, inputs):
+        """
+        Updates the message, response and status from a dictionary, ignoring missing keys.
+        """
+        for key in ('message', 'response', 'status'):
+            if inputs.get(key) is not None:
+                setattr(self, f'_{key}', inputs[key])
+        if inputs.get('user_id') not in (None, ''):
+            self._user_id = int(inputs['user_id'])
+        self._updated_at = datetime.now()
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return self
+
+    def delete(self):
+        self._deleted = True
+        self._updated_at = datetime.now()
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def version():
+        """
+        Returns a value that changes whenever any help request changes, used as the ETag.
+        """
+        count, latest = db.session.query(func.count(HelpRequest.id), func.max(HelpRequest._updated_at)).one()
+        return f"{count}-{latest.isoformat() if latest else 0}"
+
+    @staticmethod
+    def queue(status=None, since=None, limit=200):
+        """
+        Returns help requests oldest first, or only the changes since a cursor.
+
+        Args:
+            status (str, optional): Only requests in this state, served by the status index.
+            since (tuple, optional): A (datetime, id) cursor, only requests changed after it, including deleted ones.
+            limit (int): The maximum number of requests returned.
+
+        Returns:
+            list: HelpRequest objects.
+        """
+        query = HelpRequest.query
+        if since is not None:
+            # The id breaks ties, so changes made in the same tick as the cursor are neither missed nor sent again
+            changed_at, last_id = since
+            return (
+                query.filter(or_(
+                    HelpRequest._updated_at > changed_at,
+                    and_(HelpRequest._updated_at == changed_at, HelpRequest.id > last_id)
+                ))
+                .order_by(HelpRequest._updated_at, HelpRequest.id)
+                .limit(limit)
+                .all()
+            )
+        query = query.filter(HelpRequest._deleted.is_(False))
+        if status:
+            query = query.filter(HelpRequest._status == status)
+        return query.order_by(HelpRequest._created_at).limit(limit).all()
+
+
+# Record changes for incremental backups
+capture(HelpRequest)
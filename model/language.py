@@ -0,0 +1,219 @@
+# language.py
+import threading
+import time
+from sqlalchemy.exc import IntegrityError
+from __init__ import app, db
+from model.changelog import capture, log_change
+
+class Language(db.Model):
+    """
+    Language Model
+
+    The Language class represents a programming language that users can upvote.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the language.
+        _name (db.Column): A string representing the name of the language.
+        _creator (db.Column): A string representing the creator of the language.
+        _popularity (db.Column): An integer counting upvotes, indexed so the ranking reads only its top rows.
+    """
+    __tablename__ = 'languages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    _name = db.Column(db.String(255), unique=True, nullable=False)
+    _creator = db.Column(db.String(255), nullable=False)
+    _popularity = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+    def __init__(self, name, creator, popularity=0):
+        """
+        Constructor, 1st step in object creation.
+
+        Args:
+            name (str): The name of the language.
+            creator (str): The creator of the language.
+            popularity (int, optional): The starting popularity. Defaults to 0.
+        """
+        self._name = name
+        self._creator = creator
+        self.popularity = popularity
+
+    def __repr__(self):
+        return f"Language(id={self.id}, name={self._name}, creator={self._creator}, popularity={self._popularity})"
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @property
+    def creator(self):
+        return self._creator
+
+    @creator.setter
+    def creator(self, creator):
+        self._creator = creator
+
+    @property
+    def popularity(self):
+        return self._popularity
+
+    @popularity.setter
+    def popularity(self, popularity):
+        """
+        Raises:
+            ValueError: The popularity is not a whole number.
+        """
+        # Forms send numbers as strings
+        try:
+            self._popularity = int(popularity or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"popularity must be a whole number, not {popularity!r}")
+
+    def create(self):
+        """
+        Adds the language to the database, or saves changes made to its attributes, and commits the transaction.
+
+        Raises:
+            Exception: An error occurred when adding the object to the database.
+        """
+        try:
+            db.session.add(self)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        language_ranking.invalidate()
+
+    def read(self):
+        """
+        Returns:
+            dict: A dictionary containing the language data.
+        """
+        return {
+            "id": self.id,
+            "name": self._name,
+            "creator": self._creator,
+            "popularity": self._popularity
+        }
+
+    def delete(self):
+        """
+        Removes the language from the database and commits the transaction.
+        """
+        try:
+            db.session.delete(self)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        language_ranking.invalidate()
+
+    def upvote(self):
+        """
+        Adds one to the popularity in a single UPDATE, so concurrent upvotes are all counted instead of the last
+        read-modify-write winning. The attributes are expired by the commit and reload with the new count.
+
+        The ranking cache is not invalidated, upvotes show in it after at most LANGUAGE_RANKING_TTL seconds.
+        """
+        try:
+            table = Language.__table__
+            db.session.execute(
+                table.update().where(table.c.id == self.id).values(_popularity=table.c._popularity + 1)
+            )
+            # Core statements bypass the change capture events, log the change for incremental backups here
+            log_change(db.session.connection(), Language.__tablename__, self.id, 'upsert')
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def top(limit):
+        """
+        Returns the most popular languages, read through the popularity index.
+
+        Args:
+            limit (int): The maximum number of languages returned.
+        """
+        languages = Language.query.order_by(Language._popularity.desc(), Language.id.desc()).limit(limit)
+        return [language.read() for language in languages]
+
+# Record changes for incremental backups
+capture(Language)
+
+
+class LanguageRanking:
+    """
+    Caches the top languages by popularity for the ranking endpoint.
+
+    Only the size most popular rows are read, and only once per ttl seconds per worker however often the page polls.
+    Adding, editing or deleting a language through this worker invalidates the cache, other workers see the change
+    when their copy expires.
+    """
+    def __init__(self, size=50, ttl=5):
+        """
+        Args:
+            size (int): The number of ranked languages kept.
+            ttl (float): Seconds the ranking is served before it is read again.
+        """
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ranking = None
+        self._expires = 0
+
+    def get(self, limit=None):
+        """
+        Returns up to limit languages, most popular first, limit is capped at size.
+        """
+        with self._lock:
+            if self._ranking is None or self._expires < time.monotonic():
+                self._ranking = Language.top(self.size)
+                self._expires = time.monotonic() + self.ttl
+            ranking = self._ranking
+        return ranking[:limit or self.size]
+
+    def invalidate(self):
+        with self._lock:
+            self._ranking = None
+
+# Shared ranking cache used by api/language.py
+language_ranking = LanguageRanking(
+    size=app.config['LANGUAGE_RANKING_SIZE'],
+    ttl=app.config['LANGUAGE_RANKING_TTL']
+)
+
+
+def initLanguages():
+    """
+    The initLanguages function creates the Language table and adds tester data to the table.
+
+    Uses:
+        The db ORM methods to create the table.
+
+    Instantiates:
+        Language objects with tester data.
+
+    Raises:
+        IntegrityError: An error occurred when adding the tester data to the table.
+    """
+    with app.app_context():
+        """Create database and tables"""
+        db.create_all()
+        """Tester data for table"""
+        languages = [
+            Language(name='Python', creator='Guido van Rossum'),
+            Language(name='Java', creator='James Gosling'),
+            Language(name='JavaScript', creator='Brendan Eich'),
+            Language(name='C', creator='Dennis Ritchie'),
+        ]
+        for language in languages:
+            try:
+                language.create()
+            except IntegrityError:
+                '''fails with bad or duplicate data'''
+                db.session.remove()
+                print(f"Records exist, duplicate name, or error: {language._name}")
@@ -0,0 +1,144 @@
+import threading
+from bisect import bisect_left, insort
+
+class Leaderboard:
+    """
+    Leaderboard for the Socket.IO game events.
+
+    Players are indexed by name in a dict, and a list of (-score, name) keys is kept sorted with bisect, so the
+    highest score is first and ties are ordered by name. A score update locates the old key with a binary search
+    instead of scanning every player, top-K is a slice of the sorted list, and a player's rank is a binary search.
+
+    Scores are written through to a PresenceStore when one is given, so with the redis presence backend the game
+    state survives restarts and is shared by every worker. The sorted copy is kept for as long as the store's players
+    version matches it, and is reloaded from the store when another worker changed a player.
+    """
+    def __init__(self, store=None):
+        """
+        Args:
+            store (PresenceStore, optional): Persists players and scores, None keeps them in memory only.
+        """
+        self._store = store
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._ranking = []
+        self._version = None
+        self._changed = False
+
+    def _load(self):
+        """
+        Reloads the players when the store changed since the last load, called with the lock held.
+        """
+        if self._store is None:
+            return
+        version = self._store.players_version()
+        if version != self._version:
+            self._scores = {player["name"]: player["score"] for player in self._store.get_players()}
+            self._ranking = sorted((-score, name) for name, score in self._scores.items())
+            self._version = version
+
+    def _stored(self, version):
+        """
+        Keeps the local copy current after this worker's own write, called with the lock held. The write moved the
+        version by one, anything more means another worker wrote too and the next read reloads.
+        """
+        if self._version == version and self._store.players_version() == version + 1:
+            self._version = version + 1
+
+    def add(self, name):
+        """
+        Registers a player with a score of 0, joining again keeps the existing score.
+
+        Args:
+            name (str): The player name.
+
+        Returns:
+            bool: True if the player is new, False otherwise.
+        """
+        with self._lock:
+            self._load()
+            if name in self._scores:
+                return False
+            version = self._version
+            if self._store and not self._store.add_player(name):
+                # Another worker registered the player first
+                self._version = None
+                return False
+            self._scores[name] = 0
+            insort(self._ranking, (0, name))
+            self._changed = True
+            if self._store:
+                self._stored(version)
+        return True
+
+    def update(self, name, score):
+        """
+        Sets the score of a registered player.
+
+        Args:
+            name (str): The player name.
+            score (int): The new score.
+
+        Returns:
+            bool: True if the player exists, False otherwise.
+        """
+        with self._lock:
+            self._load()
+            old = self._scores.get(name)
+            if old is None:
+                return False
+            if old != score:
+                version = self._version
+                if self._store and not self._store.set_score(name, score):
+                    self._version = None
+                    return False
+                del self._ranking[bisect_left(self._ranking, (-old, name))]
+                insort(self._ranking, (-score, name))
+                self._scores[name] = score
+                self._changed = True
+                if self._store:
+                    self._stored(version)
+        return True
+
+    def top(self, k=10):
+        """
+        Returns the K highest scoring players.
+
+        Args:
+            k (int): The number of players to return.
+
+        Returns:
+            list: Dictionaries with "rank", "name" and "score" keys, best first.
+        """
+        with self._lock:
+            self._load()
+            return [
+                {"rank": rank, "name": name, "score": -negative}
+                for rank, (negative, name) in enumerate(self._ranking[:k], start=1)
+            ]
+
+    def rank(self, name):
+        """
+        Returns a player's position, 1 being the highest score.
+
+        Args:
+            name (str): The player name.
+
+        Returns:
+            dict: A dictionary with "rank", "name", "score" and "players" keys, or None if the player is unknown.
+        """
+        with self._lock:
+            self._load()
+            score = self._scores.get(name)
+            if score is None:
+                return None
+            position = bisect_left(self._ranking, (-score, name)) + 1
+            return {"rank": position, "name": name, "score": score, "players": len(self._ranking)}
+
+    def take_changed(self):
+        """
+        Returns whether the ranking changed since the last call, used to throttle broadcasts.
+        """
+        with self._lock:
+            changed, self._changed = self._changed, False
+            return changed
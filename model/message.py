@@ -0,0 +1,250 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from __init__ import app, db
+from model.changelog import capture
+from model.channel import Channel
+from model.metric import increment, track
+
+class Message(db.Model):
+    """
+    Message Model
+
+    The Message class represents a chat message sent to a Socket.IO room, the room name matches a Channel name.
+
+    Attributes:
+        id (db.Column): The primary key, an integer that also serves as the pagination cursor.
+        _channel_id (db.Column): An integer representing the channel the message was sent to.
+        _username (db.Column): A string representing the sender.
+        _msg (db.Column): A string representing the message text.
+        _avatar (db.Column): A string representing the sender's avatar URL at the time of sending.
+        _created_at (db.Column): A datetime representing when the message was received by the server.
+    """
+    __tablename__ = 'messages'
+    __table_args__ = (db.Index('ix_messages_channel_id_id', '_channel_id', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    _channel_id = db.Column(db.Integer, db.ForeignKey('channels.id'), nullable=False)
+    _username = db.Column(db.String(255), nullable=False)
+    _msg = db.Column(db.Text, nullable=False)
+    _avatar = db.Column(db.String(255), nullable=True)
+    _created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __init__(self, channel_id, username, msg, avatar='', created_at=None):
+        """
+        Constructor, 1st step in object creation.
+
+        Args:
+            channel_id (int): The channel the message was sent to.
+            username (str): The sender of the message.
+            msg (str): The message text.
+            avatar (str): The sender's avatar URL.
+            created_at (datetime, optional): When the message was received. Defaults to now.
+        """
+        self._channel_id = channel_id
+        self._username = username
+        self._msg = msg
+        self._avatar = avatar
+        self._created_at = created_at or datetime.now()
+
+    def __repr__(self):
+        """
+        The __repr__ method is a special method used to represent the object in a string format.
+        Called by the repr() built-in function.
+
+        Returns:
+            str: A text representation of how to create the object.
+        """
+        return f"Message(id={self.id}, channel_id={self._channel_id}, username={self._username}, msg={self._msg})"
+
+    def read(self):
+        """
+        The read method returns the message in the same shape as the Socket.IO "message" event.
+
+        Returns:
+            dict: A dictionary containing the message data.
+        """
+        return {
+            "id": self.id,
+            "username": self._username,
+            "msg": self._msg,
+            "avatar": self._avatar,
+            "timestamp": self._created_at.strftime("%H:%M"),
+            "created_at": self._created_at.isoformat()
+        }
+
+    @staticmethod
+    def page(channel_id, before=None, limit=50):
+        """
+        Returns one page of a channel's history, newest first, using the message id as a cursor.
+
+        Args:
+            channel_id (int): The channel to read.
+            before (int, optional): Only return messages with an id lower than this cursor.
+            limit (int): The maximum number of messages to return.
+
+        Returns:
+            list: Message objects ordered by descending id.
+        """
+        query = Message.query.filter(Message._channel_id == channel_id)
+        if before is not None:
+            query = query.filter(Message.id < before)
+        return query.order_by(Message.id.desc()).limit(limit).all()
+
+# Messages written one at a time through the ORM, the batched history writer counts its inserts itself
+track(Message, 'messages')
+# Edits and deletes from the admin console reach incremental backups through the change log, the batched inserts are
+# exported by id (see APPEND_ONLY in backup.py)
+capture(Message)
+
+
+class MessageHistory:
+    """
+    Keeps the last N messages of each room in memory and persists messages to the messages table in batches.
+
+    The Socket.IO handlers only touch memory: record() appends to the room's ring buffer and to a pending list,
+    and recent() serves join backfill. A background thread wakes every flush interval and bulk inserts the pending
+    messages in one transaction, so the send path never waits on the database.
+
+    Rooms that do not match a Channel name are kept in memory only. A flush that fails puts its messages back in
+    front of the pending list, which keeps at most max_pending messages, the oldest are dropped first.
+    """
+    def __init__(self, size=50, flush_interval=1.0, flush_batch=500, max_pending=10000):
+        """
+        Args:
+            size (int): The number of messages kept per room for backfill.
+            flush_interval (float): Seconds between background flushes.
+            flush_batch (int): The maximum number of messages inserted per statement.
+            max_pending (int): The maximum number of messages waiting to be written while the database fails.
+        """
+        self.size = size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # Held for a whole flush, the background thread and the history endpoint both flush
+        self._flush_lock = threading.Lock()
+        self._rooms = {}
+        self._pending = []
+        self._channel_ids = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, room, message):
+        """
+        Stores a message in the room's ring buffer and queues it for persistence.
+
+        Args:
+            room (str): The room the message was sent to.
+            message (dict): The message payload as emitted to the room.
+        """
+        with self._lock:
+            buffer = self._rooms.get(room)
+            if buffer is None:
+                buffer = self._rooms[room] = deque(maxlen=self.size)
+            buffer.append(message)
+            self._pending.append((room, message, datetime.now()))
+        self._start()
+
+    def recent(self, room):
+        """
+        Returns the buffered messages of a room, oldest first.
+
+        Args:
+            room (str): The room name.
+
+        Returns:
+            list: The last N message payloads of the room.
+        """
+        with self._lock:
+            return list(self._rooms.get(room, ()))
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='message-history-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.warning(f"Message history flush failed: {str(e)}")
+
+    def _resolve_channels(self, rooms):
+        """
+        Maps room names to channel ids, querying only names not resolved before. Called with the flush lock held.
+
+        Only found ids are cached, so a room whose channel is created later is persisted from the next flush on.
+        """
+        missing = [room for room in rooms if room not in self._channel_ids]
+        if missing:
+            self._channel_ids.update(db.session.query(Channel.name, Channel.id).filter(Channel.name.in_(missing)).all())
+        return self._channel_ids
+
+    def flush(self):
+        """
+        Writes all pending messages to the messages table.
+
+        Returns:
+            int: The number of messages persisted.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            try:
+                return self._write(pending)
+            except Exception:
+                self._requeue(pending)
+                raise
+
+    def _requeue(self, pending):
+        with self._lock:
+            queued = pending + self._pending
+            self._pending = queued[-self.max_pending:]
+        dropped = len(queued) - len(self._pending)
+        if dropped:
+            logging.warning(f"Message history dropped {dropped} unsaved messages, more than {self.max_pending} pending")
+
+    def _write(self, pending):
+        with app.app_context():
+            channel_ids = self._resolve_channels({room for room, _, _ in pending})
+            rows = [
+                {
+                    "_channel_id": channel_ids[room],
+                    "_username": message["username"],
+                    "_msg": message["msg"],
+                    "_avatar": message.get("avatar", ""),
+                    "_created_at": created_at
+                }
+                for room, message, created_at in pending if channel_ids.get(room)
+            ]
+            try:
+                for start in range(0, len(rows), self.flush_batch):
+                    db.session.execute(Message.__table__.insert(), rows[start:start + self.flush_batch])
+                # Bulk inserts bypass ORM events, so count the batch here in the same transaction
+                if rows:
+                    increment(db.session.connection(), 'messages', len(rows))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return len(rows)
+
+
+# Shared history used by the chat handlers in server.py
+chat_history = MessageHistory(
+    size=app.config['CHAT_HISTORY_SIZE'],
+    flush_interval=app.config['CHAT_HISTORY_FLUSH_INTERVAL'],
+    flush_batch=app.config['CHAT_HISTORY_FLUSH_BATCH'],
+    max_pending=app.config['CHAT_HISTORY_MAX_PENDING']
+)
+atexit.register(chat_history.flush)
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import event, inspect
+from __init__ import app, db
+
+# Start of the single bucket that holds all-time totals
+TOTAL_START = datetime(1970, 1, 1)
+
+class Metric(db.Model):
+    """
+    Metric Model
+
+    The Metric class stores incrementally maintained counters for the admin dashboards. Counters are updated when
+    rows are written, so reading a total or a time series never scans the underlying tables.
+
+    Attributes:
+        id (db.Column): The primary key.
+        _name (db.Column): The counter name, for example "posts" or "messages".
+        _bucket (db.Column): The rollup granularity, "total", "hour" or "day".
+        _start (db.Column): The start of the time bucket, TOTAL_START for the "total" bucket.
+        _count (db.Column): The counter value.
+    """
+    __tablename__ = 'metrics'
+    __table_args__ = (db.UniqueConstraint('_name', '_bucket', '_start', name='uq_metrics_name_bucket_start'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    _name = db.Column(db.String(64), nullable=False)
+    _bucket = db.Column(db.String(8), nullable=False)
+    _start = db.Column(db.DateTime, nullable=False)
+    _count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Metric(name={self._name}, bucket={self._bucket}, start={self._start}, count={self._count})"
+
+    def read(self):
+        return {
+            "start": self._start.isoformat(),
+            "count": self._count
+        }
+
+    @staticmethod
+    def total(name):
+        """
+        Returns the all-time total of a counter with one indexed lookup.
+        """
+        count = db.session.query(Metric._count).filter_by(_name=name, _bucket='total', _start=TOTAL_START).scalar()
+        return count or 0
+
+    @staticmethod
+    def series(name, bucket, periods):
+        """
+        Returns the most recent time buckets of a counter, oldest first.
+
+        Args:
+            name (str): The counter name.
+            bucket (str): "hour" or "day".
+            periods (int): The number of buckets to return.
+
+        Returns:
+            list: Dictionaries with "start" and "count" keys, missing buckets have a count of 0.
+        """
+        step = timedelta(hours=1) if bucket == 'hour' else timedelta(days=1)
+        end = bucket_start(datetime.utcnow(), bucket)
+        first = end - step * (periods - 1)
+        rows = dict(
+            db.session.query(Metric._start, Metric._count)
+            .filter(Metric._name == name, Metric._bucket == bucket, Metric._start >= first)
+            .all()
+        )
+        return [
+            {"start": (first + step * i).isoformat(), "count": rows.get(first + step * i, 0)}
+            for i in range(periods)
+        ]
+
+    @staticmethod
+    def summary(name, hours=24, days=30):
+        """
+        Returns the total plus hourly and daily rollups of a counter.
+        """
+        return {
+            "name": name,
+            "total": Metric.total(name),
+            "hourly": Metric.series(name, 'hour', hours),
+            "daily": Metric.series(name, 'day', days)
+        }
+
+
+def bucket_start(moment, bucket):
+    """
+    Floors a datetime to the start of its hour or day bucket.
+    """
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _upsert(connection, name, bucket, start, delta):
+    table = Metric.__table__
+    values = {"_name": name, "_bucket": bucket, "_start": start, "_count": delta}
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(**values).on_conflict_do_update(
+            index_elements=['_name', '_bucket', '_start'],
+            set_={"_count": table.c._count + delta}
+        )
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(**values).on_duplicate_key_update(_count=table.c._count + delta)
+    else:
+        updated = connection.execute(
+            table.update()
+            .where(table.c._name == name, table.c._bucket == bucket, table.c._start == start)
+            .values(_count=table.c._count + delta)
+        )
+        if updated.rowcount:
+            return
+        statement = table.insert().values(**values)
+    connection.execute(statement)
+
+
+def increment(connection, name, delta=1, moment=None):
+    """
+    Adds delta to a counter's total and, for positive deltas, to its current hour and day buckets.
+
+    Runs on the given connection so the counter update commits or rolls back with the write that caused it.
+
+    Args:
+        connection: The SQLAlchemy connection of the current transaction.
+        name (str): The counter name.
+        delta (int): The change, negative for deletes.
+        moment (datetime, optional): When the event happened, defaults to now (UTC).
+    """
+    _upsert(connection, name, 'total', TOTAL_START, delta)
+    if delta > 0:
+        moment = moment or datetime.utcnow()
+        _upsert(connection, name, 'hour', bucket_start(moment, 'hour'), delta)
+        _upsert(connection, name, 'day', bucket_start(moment, 'day'), delta)
+
+
+def track(model, name):
+    """
+    Maintains a counter for a model, incremented on insert and decremented on delete.
+
+    With a function as the name, an update that changes which counter a row belongs to (a vote switched from upvote
+    to downvote) moves it: the old total goes down and the new counter counts it as of the update.
+
+    Args:
+        model (db.Model): The model class to count.
+        name (str or callable): The counter name, or a function of the row returning it.
+    """
+    counter = name if callable(name) else (lambda target: name)
+
+    @event.listens_for(model, 'after_insert')
+    def count_insert(mapper, connection, target):
+        increment(connection, counter(target), 1)
+
+    @event.listens_for(model, 'after_delete')
+    def count_delete(mapper, connection, target):
+        increment(connection, counter(target), -1)
+
+    if callable(name):
+        @event.listens_for(model, 'after_update')
+        def count_update(mapper, connection, target):
+            # The attribute history still holds the values before this flush
+            state = inspect(target)
+            before = SimpleNamespace(**{
+                attr.key: attr.history.deleted[0] if attr.history.deleted else attr.value for attr in state.attrs
+            })
+            old, new = counter(before), counter(target)
+            if old != new:
+                increment(connection, old, -1)
+                increment(connection, new, 1)
+
+
+def initMetrics():
+    """
+    The initMetrics function creates the Metric table and seeds the totals from the existing rows.
+
+    Counters only see writes made after they are tracked, so this one-off scan brings them in line with data that
+    was created before the metrics table existed. Time buckets start empty.
+    """
+    from model.user import User
+    from model.post import Post
+    from model.message import Message
+    from model.vote import Vote
+    with app.app_context():
+        db.create_all()
+        totals = {
+            'users': User.query.count(),
+            'posts': Post.query.count(),
+            'messages': Message.query.count(),
+            'upvotes': Vote.query.filter_by(_vote_type='upvote').count(),
+            'downvotes': Vote.query.filter_by(_vote_type='downvote').count()
+        }
+        db.session.query(Metric).filter_by(_bucket='total').delete()
+        for name, count in totals.items():
+            db.session.add(Metric(_name=name, _bucket='total', _start=TOTAL_START, _count=count))
+        db.session.commit()
+        print(f"Metrics seeded: {totals}")
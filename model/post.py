@@ -6,6 +6,8 @@ from __init__ import app, db
 from model.user import User
 
 from model.channel import Channel
+from model.metric import track
+from model.changelog import capture
 
 class Post(db.Model):
     """
@@ -175,6 +177,11 @@ class Post(db.Model):
                 post = Post(**post_data)
                 post.update(post_data)
                 post.create()
+
+# Keep the admin dashboard post count current without scanning the table
+track(Post, 'posts')
+# Record changes for incremental backups
+capture(Post)
         
 def initPosts():
     """
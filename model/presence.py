@@ -0,0 +1,223 @@
+import threading
+from __init__ import app, optional_import
+
+class PresenceStore:
+    """
+    Presence Store
+
+    The PresenceStore class defines the shared realtime state used by the Socket.IO handlers: who is online in each
+    chat room and the score of each game player. Keeping this state behind one interface lets every gunicorn worker
+    (and every node) see the same presence and scores, instead of each process holding its own copy in memory.
+
+    Implementations:
+        MemoryPresenceStore: single process state, the default for development.
+        RedisPresenceStore: shared state in Redis (or any client with the same set and hash commands).
+    """
+    def add_user(self, room, username):
+        """
+        Adds a user to a room's online list.
+
+        Args:
+            room (str): The chat room name.
+            username (str): The user joining the room.
+        """
+        raise NotImplementedError
+
+    def remove_user(self, room, username):
+        """
+        Removes a user from a room's online list.
+
+        Args:
+            room (str): The chat room name.
+            username (str): The user leaving the room.
+        """
+        raise NotImplementedError
+
+    def get_users(self, room):
+        """
+        Returns the users online in a room.
+
+        Args:
+            room (str): The chat room name.
+
+        Returns:
+            list: The usernames currently online in the room.
+        """
+        raise NotImplementedError
+
+    def add_player(self, name):
+        """
+        Registers a game player with a score of 0, an existing player keeps their score.
+
+        Args:
+            name (str): The player name.
+
+        Returns:
+            bool: True if the player is new, False if the player was already registered.
+        """
+        raise NotImplementedError
+
+    def set_score(self, name, score):
+        """
+        Sets the score of a registered player.
+
+        Args:
+            name (str): The player name.
+            score (int): The new score.
+
+        Returns:
+            bool: True if the player exists and the score was stored, False otherwise.
+        """
+        raise NotImplementedError
+
+    def get_players(self):
+        """
+        Returns all players and their scores.
+
+        Returns:
+            list: A list of dictionaries with "name" and "score" keys.
+        """
+        raise NotImplementedError
+
+    def players_version(self):
+        """
+        Returns a counter that every player change increments, so a cached copy of the players can tell when
+        another worker changed them.
+
+        Returns:
+            int: The number of player changes so far.
+        """
+        raise NotImplementedError
+
+
+class MemoryPresenceStore(PresenceStore):
+    """
+    Keeps presence and scores in process memory, this is only correct when a single worker serves Socket.IO.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = {}
+        self._players = {}
+        self._players_version = 0
+
+    def add_user(self, room, username):
+        with self._lock:
+            self._rooms.setdefault(room, set()).add(username)
+
+    def remove_user(self, room, username):
+        with self._lock:
+            users = self._rooms.get(room)
+            if users is not None:
+                users.discard(username)
+                if not users:
+                    del self._rooms[room]
+
+    def get_users(self, room):
+        with self._lock:
+            return list(self._rooms.get(room, ()))
+
+    def add_player(self, name):
+        with self._lock:
+            if name in self._players:
+                return False
+            self._players[name] = 0
+            self._players_version += 1
+            return True
+
+    def set_score(self, name, score):
+        with self._lock:
+            if name not in self._players:
+                return False
+            self._players[name] = score
+            self._players_version += 1
+            return True
+
+    def get_players(self):
+        with self._lock:
+            return [{"name": name, "score": score} for name, score in self._players.items()]
+
+    def players_version(self):
+        with self._lock:
+            return self._players_version
+
+
+class RedisPresenceStore(PresenceStore):
+    """
+    Keeps presence and scores in Redis so all workers and nodes share them, and they survive a restart.
+
+    Rooms are stored as sets under "<prefix>:room:<room>" and players as one hash under "<prefix>:players", with a
+    change counter under "<prefix>:players:version". Only the SADD, SREM, SMEMBERS, HSETNX, HEXISTS, HSET, HGETALL,
+    INCR and GET commands are used, so a local fake with the same methods can stand in for a Redis server.
+    """
+    def __init__(self, client, prefix='flocker'):
+        """
+        Args:
+            client: A redis.Redis compatible client.
+            prefix (str): The key prefix, allows several deployments to share one Redis.
+        """
+        self._client = client
+        self._prefix = prefix
+
+    def _room_key(self, room):
+        return f"{self._prefix}:room:{room}"
+
+    @property
+    def _players_key(self):
+        return f"{self._prefix}:players"
+
+    @property
+    def _version_key(self):
+        return f"{self._prefix}:players:version"
+
+    @staticmethod
+    def _text(value):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def add_user(self, room, username):
+        self._client.sadd(self._room_key(room), username)
+
+    def remove_user(self, room, username):
+        self._client.srem(self._room_key(room), username)
+
+    def get_users(self, room):
+        return [self._text(user) for user in self._client.smembers(self._room_key(room))]
+
+    def add_player(self, name):
+        if not self._client.hsetnx(self._players_key, name, 0):
+            return False
+        self._client.incr(self._version_key)
+        return True
+
+    def set_score(self, name, score):
+        if not self._client.hexists(self._players_key, name):
+            return False
+        self._client.hset(self._players_key, name, score)
+        self._client.incr(self._version_key)
+        return True
+
+    def get_players(self):
+        players = self._client.hgetall(self._players_key)
+        return [{"name": self._text(name), "score": int(score)} for name, score in players.items()]
+
+    def players_version(self):
+        return int(self._client.get(self._version_key) or 0)
+
+
+def create_presence_store(config):
+    """
+    Builds the presence store selected by the PRESENCE_BACKEND setting.
+
+    Args:
+        config (dict): The Flask app configuration.
+
+    Returns:
+        PresenceStore: A RedisPresenceStore when PRESENCE_BACKEND is "redis", otherwise a MemoryPresenceStore.
+    """
+    if config.get('PRESENCE_BACKEND') == 'redis':
+        redis = optional_import('redis', 'PRESENCE_BACKEND=redis')
+        client = redis.Redis.from_url(config['REDIS_URL'])
+        return RedisPresenceStore(client, prefix=config.get('PRESENCE_KEY_PREFIX', 'flocker'))
+    return MemoryPresenceStore()
+
+# Shared store used by the Socket.IO handlers in main.py and server.py
+presence_store = create_presence_store(app.config)
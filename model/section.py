@@ -1,6 +1,7 @@
 # section.py
 from sqlite3 import IntegrityError
 from __init__ import app, db
+from model.changelog import capture
 from model.group import Group
 
 class Section(db.Model):
@@ -117,6 +118,9 @@ class Section(db.Model):
         db.session.commit()
         return sections
 
+# Record changes for incremental backups
+capture(Section)
+
 def initSections():
     """
     The initSections function creates the Section table and adds tester data to the table.
@@ -0,0 +1,180 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func
+from __init__ import app, db
+
+class TimeEntry(db.Model):
+    """
+    TimeEntry Model
+
+    The TimeEntry class represents time a user spent on a page, as reported by static/js/timeTracker.js.
+    Beacons received within one flush interval for the same user and page are stored as a single row.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the entry.
+        _user_id (db.Column): A string representing the user id sent by the tracker.
+        _page (db.Column): A string representing the page path.
+        _seconds (db.Column): An integer representing the time spent, in seconds.
+        _events (db.Column): An integer representing the number of beacons combined in this row.
+        _recorded_at (db.Column): A datetime representing when the beacons were received.
+    """
+    __tablename__ = 'time_entries'
+    __table_args__ = (
+        db.Index('ix_time_entries_user_page', '_user_id', '_page'),
+        db.Index('ix_time_entries_page', '_page'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    _user_id = db.Column(db.String(255), nullable=False)
+    _page = db.Column(db.String(255), nullable=False, default='')
+    _seconds = db.Column(db.Integer, nullable=False, default=0)
+    _events = db.Column(db.Integer, nullable=False, default=1)
+    _recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __init__(self, user_id, page, seconds, events=1, recorded_at=None):
+        """
+        Constructor, 1st step in object creation.
+
+        Args:
+            user_id (str): The user id sent by the tracker.
+            page (str): The page path.
+            seconds (int): The time spent, in seconds.
+            events (int): The number of beacons combined in this entry.
+            recorded_at (datetime, optional): When the beacons were received. Defaults to now.
+        """
+        self._user_id = user_id
+        self._page = page
+        self._seconds = seconds
+        self._events = events
+        self._recorded_at = recorded_at or datetime.now()
+
+    def __repr__(self):
+        return f"TimeEntry(id={self.id}, user_id={self._user_id}, page={self._page}, seconds={self._seconds})"
+
+    @staticmethod
+    def totals(group='page', user_id=None, page=None, since=None, limit=100):
+        """
+        Returns time spent summed per page or per user, largest first.
+
+        Args:
+            group (str): 'page' or 'user', the column to group by.
+            user_id (str, optional): Only count this user's time.
+            page (str, optional): Only count time on this page.
+            since (datetime, optional): Only count time recorded after this moment.
+            limit (int): The maximum number of groups returned.
+
+        Returns:
+            list: Dictionaries with the group key, seconds and visits.
+        """
+        column = TimeEntry._page if group == 'page' else TimeEntry._user_id
+        seconds = func.sum(TimeEntry._seconds).label('seconds')
+        query = db.session.query(column, seconds, func.sum(TimeEntry._events))
+        if user_id is not None:
+            query = query.filter(TimeEntry._user_id == user_id)
+        if page is not None:
+            query = query.filter(TimeEntry._page == page)
+        if since is not None:
+            query = query.filter(TimeEntry._recorded_at >= since)
+        rows = query.group_by(column).order_by(seconds.desc()).limit(limit).all()
+        return [{group: key, "seconds": int(total or 0), "visits": int(visits or 0)} for key, total, visits in rows]
+
+
+class TimeTrackBuffer:
+    """
+    Collects time tracking beacons in memory and writes them to the time_entries table in batches.
+
+    record() only adds to a dictionary keyed by user and page, so a page view costs no database work. A background
+    thread wakes every flush interval and bulk inserts one row per user and page seen since the last flush.
+    """
+    def __init__(self, flush_interval=5.0, flush_batch=1000):
+        """
+        Args:
+            flush_interval (float): Seconds between background flushes.
+            flush_batch (int): The maximum number of rows inserted per statement.
+        """
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def record(self, user_id, page, seconds):
+        """
+        Adds time spent by a user on a page to the pending totals.
+        """
+        key = (user_id, page)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [seconds, 1, datetime.now()]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+        self._start()
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='time-track-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.warning(f"Time tracking flush failed: {str(e)}")
+
+    def flush(self):
+        """
+        Writes all pending totals to the time_entries table.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = [
+            {"_user_id": user_id, "_page": page, "_seconds": seconds, "_events": events, "_recorded_at": recorded_at}
+            for (user_id, page), (seconds, events, recorded_at) in pending.items()
+        ]
+        with app.app_context():
+            try:
+                for start in range(0, len(rows), self.flush_batch):
+                    db.session.execute(TimeEntry.__table__.insert(), rows[start:start + self.flush_batch])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self._merge(pending)
+                raise
+        return len(rows)
+
+    def _merge(self, pending):
+        """
+        Adds the totals of a failed flush back to the time recorded since, so the next flush writes them.
+        """
+        with self._lock:
+            for key, (seconds, events, recorded_at) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [seconds, events, recorded_at]
+                else:
+                    entry[0] += seconds
+                    entry[1] += events
+                    entry[2] = recorded_at
+
+
+# Shared buffer used by the /api/track_time endpoint
+time_tracker = TimeTrackBuffer(
+    flush_interval=app.config['TIME_TRACK_FLUSH_INTERVAL'],
+    flush_batch=app.config['TIME_TRACK_FLUSH_BATCH']
+)
+atexit.register(time_tracker.flush)
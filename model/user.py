@@ -8,6 +8,8 @@ import os
 import json
 
 from __init__ import app, db
+from model.metric import track
+from model.changelog import capture
 
 """ Helper Functions """
 
@@ -52,7 +54,7 @@ class User(db.Model, UserMixin):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
-    _name = db.Column(db.String(255), unique=False, nullable=False)
+    _name = db.Column(db.String(255), unique=False, nullable=False, index=True)  # indexed for admin prefix search
     _uid = db.Column(db.String(255), unique=True, nullable=False)
     _email = db.Column(db.String(255), unique=False, nullable=False)
     _password = db.Column(db.String(255), unique=False, nullable=False)
@@ -544,6 +546,11 @@ class User(db.Model, UserMixin):
                 user.create()
         return users
 
+# Keep the admin dashboard user count current without scanning the table
+track(User, 'users')
+# Record changes for incremental backups
+capture(User)
+
 
 """Database Creation and Testing """
 
@@ -1,4 +1,5 @@
 from __init__ import db, app
+from model.changelog import capture
 
 class Settings(db.Model):
     """
@@ -104,6 +105,9 @@ class Settings(db.Model):
             
             return restored_settings
 
+# Record changes for incremental backups
+capture(Settings)
+
 def initSettings():
     """
     The initSettings function creates the Settings table and adds static data to the table.
@@ -120,6 +124,9 @@ def initSettings():
     with app.app_context():
         """Create database and tables"""
         db.create_all()
+        if Settings.query.first():
+            print("Settings exist, skipping static data")
+            return
         """Static data for table"""
         static_data = [
             Settings(description='A platform that evolves around projects, OCS Flocker', contact_email='manas.goel127@gmail.com', contact_phone='123-456-7890')
@@ -132,7 +139,4 @@ def initSettings():
                 print(f"Record created: {repr(data)}")
             except Exception as e:
                 db.session.rollback()
-                print(f"Error creating record for settings: {e}")
-
-# Call initSettings to initialize the settings with static data
-initSettings()
\ No newline at end of file
+                print(f"Error creating record for settings: {e}")
\ No newline at end of file
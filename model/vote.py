@@ -0,0 +1,88 @@
+from sqlalchemy.exc import IntegrityError
+from __init__ import db
+from model.metric import track
+from model.changelog import capture
+
+class Vote(db.Model):
+    """
+    Vote Model
+
+    The Vote class represents a user's upvote or downvote on a post.
+
+    Attributes:
+        id (db.Column): The primary key, an integer representing the unique identifier for the vote.
+        _post_id (db.Column): An integer representing the post that was voted on.
+        _user_id (db.Column): An integer representing the user who voted.
+        _vote_type (db.Column): A string, either "upvote" or "downvote".
+    """
+    __tablename__ = 'votes'
+    __table_args__ = (db.UniqueConstraint('_post_id', '_user_id', name='uq_votes_post_user'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    _post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False, index=True)
+    _user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    _vote_type = db.Column(db.String(10), nullable=False)
+
+    def __init__(self, post_id, user_id, vote_type):
+        """
+        Constructor, 1st step in object creation.
+
+        Args:
+            post_id (int): The post that was voted on.
+            user_id (int): The user who voted.
+            vote_type (str): "upvote" or "downvote".
+        """
+        self._post_id = post_id
+        self._user_id = user_id
+        self._vote_type = vote_type
+
+    def __repr__(self):
+        return f"Vote(id={self.id}, post_id={self._post_id}, user_id={self._user_id}, vote_type={self._vote_type})"
+
+    def create(self):
+        """
+        Adds the vote to the database and commits the transaction.
+
+        Returns:
+            Vote: The created vote, or None if the user already voted on the post.
+        """
+        try:
+            db.session.add(self)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None
+        return self
+
+    def read(self):
+        return {
+            "id": self.id,
+            "post_id": self._post_id,
+            "user_id": self._user_id,
+            "vote_type": self._vote_type
+        }
+
+    def delete(self):
+        try:
+            db.session.delete(self)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def for_post(post_id):
+        """
+        Returns the votes of one post split by type, using the post_id index.
+        """
+        votes = Vote.query.filter_by(_post_id=post_id).all()
+        return {
+            "upvotes": [vote.read() for vote in votes if vote._vote_type == 'upvote'],
+            "downvotes": [vote.read() for vote in votes if vote._vote_type == 'downvote']
+        }
+
+
+# Upvotes and downvotes are counted separately
+track(Vote, lambda vote: 'upvotes' if vote._vote_type == 'upvote' else 'downvotes')
+# Record changes for incremental backups
+capture(Vote)
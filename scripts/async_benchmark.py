@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+""" async_benchmark.py
+Concurrency benchmark for the read-heavy endpoints, comparing the sync server (gunicorn server:app) with the async
+entry point (asgi.py) at the same number of concurrent clients.
+
+Usage: Start both servers, then run from the root of the project:
+
+> gunicorn -c gunicorn.conf.py server:app                # port 8696
+> uvicorn asgi:app --port 8697 --workers 1
+> scripts/async_benchmark.py --urls http://localhost:8696,http://localhost:8697 --clients 500
+
+Requires aiohttp:
+> pip install aiohttp
+
+General Process outline:
+1. Log in once per server through /api/authenticate, every client reuses the JWT cookie.
+2. For each path, open the given number of clients, each sends requests back to back for the duration.
+3. Print requests per second, error count and latency percentiles per server and path.
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def login(session, url, uid, password):
+    async with session.post(f"{url}/api/authenticate", json={"uid": uid, "password": password}) as response:
+        if response.status != 200:
+            raise RuntimeError(f"login to {url} failed with {response.status}")
+
+
+async def client(session, url, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                if response.status >= 500:
+                    errors.append(response.status)
+                    continue
+        except aiohttp.ClientError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url, path, clients, duration, uid, password):
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+        await login(session, url, uid, password)
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(session, url + path, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', default='http://localhost:8696,http://localhost:8697', help='comma separated servers')
+    parser.add_argument('--paths', default='/api/id,/api/users,/api/following,/api/posts,/api/id/pfp')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15, help='seconds per server and path')
+    parser.add_argument('--uid', default='user')
+    parser.add_argument('--password', default='password')
+    args = parser.parse_args()
+
+    print(f"{'server':28} {'path':16} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for path in args.paths.split(','):
+        for url in args.urls.split(','):
+            latencies, errors = await run(url, path, args.clients, args.duration, args.uid, args.password)
+            print(f"{url:28} {path:16} {len(latencies) / args.duration:8.1f} {len(errors):7d} "
+                  f"{percentile(latencies, 50) * 1000:8.1f} {percentile(latencies, 99) * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
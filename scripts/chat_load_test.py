@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+""" chat_load_test.py
+Simulates many Socket.IO chat clients against a locally running server.py and reports delivery stats.
+
+Usage: Start the chat server, then run from the root of the project:
+
+> CHAT_BATCH_INTERVAL_MS=50 python server.py
+> scripts/chat_load_test.py --clients 2000 --rooms 4 --messages 2
+
+Requires the asyncio client of python-socketio:
+> pip install "python-socketio[asyncio_client]"
+
+General Process outline:
+1. Connect all clients and join them to rooms in a burst, like the start of a class.
+2. A fraction of the clients send messages, each message carries its send time.
+3. Every received message (single or batched) is timed, then all clients leave and disconnect.
+4. Print received event counts, frames per client and message delivery latency percentiles.
+"""
+import argparse
+import asyncio
+import time
+
+import socketio
+
+
+class Stats:
+    def __init__(self):
+        self.events = 0
+        self.frames = {}
+        self.latencies = []
+
+    def frame(self, name):
+        self.events += 1
+        self.frames[name] = self.frames.get(name, 0) + 1
+
+    def delivered(self, message):
+        msg = message.get("msg", "")
+        if msg.startswith("load:"):
+            self.latencies.append(time.perf_counter() - float(msg[5:]))
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+
+async def run_client(index, args, stats, joined, go):
+    client = socketio.AsyncClient(reconnection=False)
+    room = f"load-room-{index % args.rooms}"
+    username = f"load-user-{index}"
+
+    @client.on("message")
+    def on_message(data):
+        stats.frame("message")
+        stats.delivered(data)
+
+    @client.on("message_batch")
+    def on_batch(batch):
+        stats.frame("message_batch")
+        for message in batch:
+            stats.delivered(message)
+
+    for name in ("online_users", "presence_diff", "history"):
+        client.on(name, lambda data, name=name: stats.frame(name))
+
+    try:
+        await client.connect(args.url, transports=["websocket"])
+        await client.emit("join", {"username": username, "room": room})
+    except Exception as e:
+        stats.frame("connect_error")
+        print(f"Client {index} failed to connect: {e}")
+        return
+    finally:
+        joined.release()
+    await go.wait()
+
+    if index < args.senders:
+        for _ in range(args.messages):
+            # The server echoes msg, so encode the send time into it for latency tracking
+            await client.emit("send_message", {"username": username, "room": room, "msg": f"load:{time.perf_counter()}"})
+            await asyncio.sleep(args.pause)
+
+    await asyncio.sleep(args.drain)
+    await client.emit("leave", {"username": username, "room": room})
+    await client.disconnect()
+
+
+async def main(args):
+    stats = Stats()
+    joined = asyncio.Semaphore(0)
+    go = asyncio.Event()
+
+    start = time.perf_counter()
+    tasks = []
+    for index in range(args.clients):
+        tasks.append(asyncio.create_task(run_client(index, args, stats, joined, go)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp)
+    for _ in range(args.clients):
+        await joined.acquire()
+    join_time = time.perf_counter() - start
+
+    go.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    total_time = time.perf_counter() - start
+
+    print(f"Clients: {args.clients} in {args.rooms} rooms, joined in {join_time:.2f}s, total {total_time:.2f}s")
+    print(f"Events received: {stats.events} ({stats.events / args.clients:.1f} per client)")
+    for name, count in sorted(stats.frames.items()):
+        print(f"  {name}: {count}")
+    print(f"Message latency ms: p50={stats.percentile(50):.1f} p95={stats.percentile(95):.1f} p99={stats.percentile(99):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Socket.IO chat load test")
+    parser.add_argument("--url", default="http://localhost:8505")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--senders", type=int, default=100, help="number of clients that send messages")
+    parser.add_argument("--messages", type=int, default=2, help="messages per sender")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds between messages of one sender")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for deliveries before leaving")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds between client connects")
+    asyncio.run(main(parser.parse_args()))
@@ -22,7 +22,6 @@ General Process outline:
 3. Load Data: The bulk load API in "this" project inserts the data using required business logic.
 
 """
-import shutil
 import sys
 import os
 
@@ -30,17 +29,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Import application object
 from main import app, db, generate_data
-
-# Backup the old database
-def backup_database(db_uri, backup_uri):
-    """Backup the current database."""
-    if backup_uri:
-        db_path = db_uri.replace('sqlite:///', 'instance/')
-        backup_path = backup_uri.replace('sqlite:///', 'instance/')
-        shutil.copyfile(db_path, backup_path)
-        print(f"Database backed up to {backup_path}")
-    else:
-        print("Backup not supported for production database.")
+from backup import backup_database
 
 # Main extraction and loading process
 def main():
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+""" fork_benchmark.py
+Memory benchmark for the gunicorn worker model: starts gunicorn -c gunicorn.conf.py server:app with and without
+GUNICORN_PRELOAD at several worker counts, and measures each server after startup and after some traffic.
+
+RSS counts shared pages once per process and overstates a preforked server, so the totals use PSS (each shared page
+split between the processes mapping it) and private dirty memory (pages a process wrote and so copied), read from
+/proc/<pid>/smaps_rollup. Linux only.
+
+Usage: Run from the root of the project, with gunicorn installed and the port free:
+> scripts/fork_benchmark.py
+> scripts/fork_benchmark.py --workers 3,8,16 --requests 200 --path /api/health/live
+
+General Process outline:
+1. For each worker count and preload setting, start gunicorn and wait until every worker answers.
+2. Record the time to ready and the PSS, private dirty and RSS of the master and the workers.
+3. Send requests spread across the workers, record memory again; growth in private dirty is copy-on-write.
+4. Print one line per run.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # the command name may contain spaces, the parent pid is the second field after it
+                if int(stat.read().rsplit(')', 1)[1].split()[1]) == pid:
+                    found.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return found
+
+def memory_kb(pid):
+    """
+    Returns the Rss, Pss and Private_Dirty of a process in KiB.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Dirty'):
+                values[key] = int(rest.split()[0])
+    return values
+
+def measure(master):
+    pids = [master] + children(master)
+    totals = {'Rss': 0, 'Pss': 0, 'Private_Dirty': 0}
+    for pid in pids:
+        for key, value in memory_kb(pid).items():
+            totals[key] += value
+    return len(pids) - 1, totals
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            response.read()
+            return True
+    except OSError:
+        return False
+
+def run(workers, preload, port, path, requests):
+    env = {
+        **os.environ,
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_PRELOAD': 'true' if preload else 'false',
+        'GUNICORN_BIND': f"127.0.0.1:{port}",
+    }
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'server:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}{path}"
+    try:
+        # Workers answer once they have imported (or inherited) the app
+        while len(children(server.pid)) < workers or not get(url):
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {server.returncode}")
+            if time.perf_counter() - started > 120:
+                raise RuntimeError("gunicorn did not become ready within 120s")
+            time.sleep(0.1)
+        ready = time.perf_counter() - started
+        time.sleep(1)  # let late workers finish booting before the first sample
+        count, idle = measure(server.pid)
+        for _ in range(requests):
+            get(url)
+        _, loaded = measure(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    return ready, count, idle, loaded
+
+def mib(kb):
+    return f"{kb / 1024:7.1f}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='3,8,16', help='comma separated worker counts')
+    parser.add_argument('--requests', type=int, default=100, help='requests sent before the second sample')
+    parser.add_argument('--path', default='/api/health/live')
+    parser.add_argument('--port', type=int, default=8697)
+    args = parser.parse_args()
+
+    print("workers preload  ready_s   PSS_MiB  dirty_MiB   RSS_MiB | after traffic: PSS_MiB  dirty_MiB")
+    for workers in [int(value) for value in args.workers.split(',')]:
+        for preload in (False, True):
+            ready, count, idle, loaded = run(workers, preload, args.port, args.path, args.requests)
+            print(f"{count:7d} {'yes' if preload else 'no':>7} {ready:8.2f}  {mib(idle['Pss'])}  "
+                  f"{mib(idle['Private_Dirty'])}   {mib(idle['Rss'])} |                {mib(loaded['Pss'])}  "
+                  f"{mib(loaded['Private_Dirty'])}")
+
+if __name__ == "__main__":
+    main()
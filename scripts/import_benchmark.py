@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+""" import_benchmark.py
+Measures worker cold start: how long importing the app takes and which modules dominate, using python -X importtime.
+
+Two startup paths are measured, each in fresh interpreters:
+- cli: `import main`, what CLI commands and scripts pay.
+- serve: `import main; main.create_app()`, what a gunicorn worker pays.
+
+It also reports the peak RSS of each interpreter, whether the import touched the SQLite database file, and whether any
+of the heavy optional packages (pandas, numpy, boto3, ...) got imported; the last two should never happen and make
+the script exit non-zero with the default settings.
+
+Usage:
+> scripts/import_benchmark.py
+> scripts/import_benchmark.py --runs 10 --top 20
+
+Compare with an older commit (checked out in a temporary git worktree, where only `import main` exists):
+> scripts/import_benchmark.py --compare HEAD~1
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCENARIOS = {
+    'cli': 'import main',
+    'serve': 'import main; main.create_app()',
+}
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+# Packages left out by requirements-slim.txt, and optional backends, which only their subsystems may import
+HEAVY = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'sklearn', 'boto3', 'botocore', 'zstandard', 'redis')
+PROBE = ("; import resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+         f"*[name for name in {HEAVY!r} if name in sys.modules])")
+
+def database_state(root):
+    path = os.path.join(root, 'instance', 'volumes', 'user_management.db')
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def run_once(root, statement):
+    """
+    Imports in a fresh interpreter, returns wall seconds, (cumulative us, module, depth) per import, peak RSS in KiB
+    and the heavy packages that were imported.
+    """
+    env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement + PROBE],
+        cwd=root, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules.append((int(match.group(2)), match.group(4), len(match.group(3))))
+    rss, *heavy = result.stdout.split('\n')[-2].split()
+    return elapsed, modules, int(rss), heavy
+
+def measure(root, statement, runs):
+    before = database_state(root)
+    run_once(root, statement)  # warm the OS file cache so runs compare imports, not disk reads
+    times, rss = [], []
+    for _ in range(runs):
+        elapsed, modules, peak, heavy = run_once(root, statement)
+        times.append(elapsed)
+        rss.append(peak)
+    touched = database_state(root) != before
+    return statistics.median(times), modules, statistics.median(rss), heavy, touched
+
+def report(label, median, modules, rss, heavy, touched, top):
+    total = sum(cumulative for cumulative, _, depth in modules if depth == 1)
+    print(f"{label}: median {median * 1000:.0f} ms wall, {total / 1000:.0f} ms in imports, {rss / 1024:.1f} MiB RSS, "
+          f"database {'TOUCHED' if touched else 'untouched'}, heavy imports: {', '.join(heavy) or 'none'}")
+    for cumulative, name, _ in sorted(modules, reverse=True)[:top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per scenario')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules listed per scenario')
+    parser.add_argument('--compare', help='git revision to measure for comparison')
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in SCENARIOS.items():
+        results[name] = measure(ROOT, statement, args.runs)
+        report(name, *results[name], args.top)
+
+    if args.compare:
+        with tempfile.TemporaryDirectory() as directory:
+            worktree = os.path.join(directory, 'baseline')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.compare], cwd=ROOT, check=True, capture_output=True)
+            try:
+                baseline = measure(worktree, 'import main', args.runs)
+                report(f"{args.compare} import main", *baseline, args.top)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=ROOT, capture_output=True)
+        for name, (median, _, rss, _, _) in results.items():
+            print(f"{name}: {median * 1000:.0f} ms vs {baseline[0] * 1000:.0f} ms ({(1 - median / baseline[0]) * 100:+.0f}% faster), "
+                  f"{rss / 1024:.1f} MiB vs {baseline[2] / 1024:.1f} MiB RSS")
+
+    sys.exit(1 if any(heavy or touched for _, _, _, heavy, touched in results.values()) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+""" socket_benchmark.py
+Connection-scaling benchmark for the realtime server (server.py or gunicorn -c gunicorn.conf.py server:app).
+
+Usage: Start the server, then run from the root of the project:
+
+> SOCKETIO_ASYNC_MODE=eventlet python server.py
+> scripts/socket_benchmark.py --url http://localhost:8505 --steps 100,500,1000,2000 --pid <server pid>
+
+Requires the asyncio client of python-socketio:
+> pip install "python-socketio[asyncio_client]"
+
+General Process outline:
+1. For each step, grow the pool of open connections to the step size.
+2. Time how long the new connections took to open.
+3. Every open client asks for the leaderboard, the round trip of that event measures responsiveness under load.
+4. Print connect rate, round trip percentiles and, with --pid, the server's resident memory.
+"""
+import argparse
+import asyncio
+import time
+
+import socketio
+
+
+def server_rss_mb(pid):
+    """Reads the resident set size of a local process from /proc, None when unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+
+async def open_client(url, replies):
+    client = socketio.AsyncClient(reconnection=False)
+
+    @client.on("leaderboard")
+    def on_leaderboard(data):
+        replies.put_nowait(time.perf_counter())
+
+    await client.connect(url, transports=["websocket"])
+    return client
+
+
+async def round_trip(client, replies):
+    start = time.perf_counter()
+    await client.emit("leaderboard", {"k": 10})
+    end = await replies.get()
+    return end - start
+
+
+async def main(args):
+    clients = []
+    queues = []
+    print(f"{'connections':>11} {'connect/s':>10} {'rtt p50 ms':>11} {'rtt p99 ms':>11} {'errors':>7} {'server MB':>10}")
+    for step in [int(value) for value in args.steps.split(",")]:
+        errors = 0
+        opened = len(clients)
+        start = time.perf_counter()
+        while len(clients) < step:
+            batch = min(args.batch, step - len(clients))
+            new_queues = [asyncio.Queue() for _ in range(batch)]
+            results = await asyncio.gather(*(open_client(args.url, queue) for queue in new_queues), return_exceptions=True)
+            for client, queue in zip(results, new_queues):
+                if isinstance(client, Exception):
+                    errors += 1
+                else:
+                    clients.append(client)
+                    queues.append(queue)
+            if all(isinstance(client, Exception) for client in results):
+                break  # the server stopped accepting connections
+        connect_time = time.perf_counter() - start
+
+        rtts = await asyncio.gather(*(round_trip(client, queue) for client, queue in zip(clients, queues)), return_exceptions=True)
+        rtts = [rtt for rtt in rtts if not isinstance(rtt, Exception)]
+        rss = server_rss_mb(args.pid) if args.pid else None
+        rate = (len(clients) - opened) / connect_time if connect_time else 0.0
+        memory = f"{rss:.1f}" if rss is not None else "-"
+        print(f"{len(clients):>11} {rate:>10.0f} {percentile(rtts, 50):>11.1f} {percentile(rtts, 99):>11.1f} {errors:>7} {memory:>10}")
+
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Socket.IO connection scaling benchmark")
+    parser.add_argument("--url", default="http://localhost:8505")
+    parser.add_argument("--steps", default="100,500,1000,2000", help="comma separated connection counts")
+    parser.add_argument("--batch", type=int, default=100, help="connections opened concurrently")
+    parser.add_argument("--pid", type=int, default=None, help="server process id, reports its RSS")
+    asyncio.run(main(args=parser.parse_args()))
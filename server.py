@@ -1,73 +1,39 @@
-# monkey patch BEFORE imports
-import eventlet
-eventlet.monkey_patch()
-
-from main import app
-from flask_socketio import SocketIO, emit, join_room, leave_room
-from datetime import datetime
-
-# Setup SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
-
-# Track users by room
-online_users = {}
+#!/usr/bin/env python3
 
-def get_avatar(username):
-    # Placeholder logic, replace with real logic if using avatars from database
-    return f"https://api.dicebear.com/7.x/identicon/svg?seed={username}"
+""" server.py
+Realtime entry point, serves the Flask app together with all Socket.IO handlers (chat and game).
 
-@socketio.on("join")
-def handle_join(data):
-    username = data["username"]
-    room = data["room"]
-    join_room(room)
+The async worker is selected with SOCKETIO_ASYNC_MODE (eventlet, gevent or threading). It defaults to threading, as in
+__init__.py and gunicorn.conf.py, the Dockerfile selects eventlet.
+Monkey patching has to happen before anything else is imported, so the mode is read from the environment here.
 
-    # Add user to room's online list
-    if room not in online_users:
-        online_users[room] = set()
-    online_users[room].add(username)
+Usage:
 
-    # Notify room
-    emit("message", {
-        "username": "System",
-        "msg": f"{username} has joined the room.",
-        "timestamp": datetime.now().strftime("%H:%M"),
-        "avatar": ""
-    }, room=room)
+Development server:
+> python server.py
 
-    # Send updated online user list
-    emit("online_users", list(online_users[room]), room=room)
+Production, gunicorn picks the matching worker class from gunicorn.conf.py:
+> gunicorn -c gunicorn.conf.py server:app
+"""
+import os
+from dotenv import load_dotenv
 
-@socketio.on("send_message")
-def handle_send_message(data):
-    username = data["username"]
-    room = data["room"]
-    msg = data["msg"]
+load_dotenv()
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'threading')
+ASYNC_MODE = os.environ['SOCKETIO_ASYNC_MODE']
 
-    emit("message", {
-        "username": username,
-        "msg": msg,
-        "timestamp": datetime.now().strftime("%H:%M"),
-        "avatar": get_avatar(username)
-    }, room=room)
-
-@socketio.on("leave")
-def handle_leave(data):
-    username = data["username"]
-    room = data["room"]
-    leave_room(room)
-
-    if room in online_users:
-        online_users[room].discard(username)
+# monkey patch BEFORE imports
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
 
-    emit("message", {
-        "username": "System",
-        "msg": f"{username} has left the room.",
-        "timestamp": datetime.now().strftime("%H:%M"),
-        "avatar": ""
-    }, room=room)
+from main import create_app
+from __init__ import socketio
 
-    emit("online_users", list(online_users[room]), room=room)
+app = create_app()
 
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=8505)
+    socketio.run(app, host="0.0.0.0", port=int(os.environ.get('PORT') or 8505))
@@ -2,82 +2,85 @@
 
 // A utility object to handle user time tracking.
 const TimeTracker = (() => {
-    let userId = null;  // User's ID
-    let sessionStartTime = null;  // Start time of the session
-    let totalTimeSpent = 0;  // Total session duration in seconds
+    let tracking = false;  // Whether init was called
+    let sessionStartTime = null;  // Start time of the visible period being timed
+    let pending = [];  // Time not yet reported, one entry per page
 
     const TRACKING_API_URL = '/api/track_time';  // Endpoint to send time data
+    const MAX_PENDING = 20;  // Reports kept while the endpoint is unreachable
 
-    // Initialize the tracker with the user ID
-    function init(id) {
-        if (!id) {
-            console.error("User ID is required to track time.");
-            return;
-        }
-        userId = id;
+    // Start timing, the server records the time for the logged in user from the JWT cookie
+    function init() {
+        tracking = true;
         sessionStartTime = Date.now();
-        console.log(`Time tracking started for user: ${userId}`);
     }
 
-    // Calculate the total time spent in the current session
-    function calculateTimeSpent() {
-        if (!sessionStartTime) return totalTimeSpent;
-        const currentTime = Date.now();
-        const sessionDuration = Math.floor((currentTime - sessionStartTime) / 1000);  // Seconds
-        return totalTimeSpent + sessionDuration;
+    // Move the time since the last report into the pending list
+    function collect() {
+        if (!sessionStartTime) return;
+        const seconds = Math.floor((Date.now() - sessionStartTime) / 1000);
+        sessionStartTime = null;
+        if (seconds > 0) {
+            pending.push({ page: window.location.pathname, time_spent: seconds });
+            pending = pending.slice(-MAX_PENDING);
+        }
     }
 
-    // Send tracked time to the server
-    async function sendTimeData() {
-        if (!userId) {
-            console.error("Cannot send time data. User ID is not set.");
+    // Send pending time to the server in one request, only the time since the last report is sent
+    function sendTimeData() {
+        if (!tracking || pending.length === 0) return;
+
+        const body = JSON.stringify({ events: pending });
+        // sendBeacon survives page unload, fall back to fetch with keepalive
+        if (navigator.sendBeacon && navigator.sendBeacon(TRACKING_API_URL, body)) {
+            pending = [];
             return;
         }
-
-        const totalSessionTime = calculateTimeSpent();
-        const payload = {
-            user_id: userId,
-            time_spent: totalSessionTime
-        };
-
-        try {
-            const response = await fetch(TRACKING_API_URL, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(payload)
-            });
-
-            if (response.ok) {
-                console.log("Time data sent successfully:", payload);
-            } else {
+        const sent = pending;
+        pending = [];
+        fetch(TRACKING_API_URL, {
+            method: 'POST',
+            credentials: 'include',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: body,
+            keepalive: true
+        }).then(response => {
+            if (!response.ok) {
                 console.error("Failed to send time data:", response.statusText);
             }
-        } catch (error) {
+        }).catch(error => {
             console.error("Error sending time data:", error);
-        }
+            pending = sent.concat(pending).slice(-MAX_PENDING);
+        });
     }
 
     // Stop tracking the session
     function stopTracking() {
-        totalTimeSpent = calculateTimeSpent();
-        sessionStartTime = null;
-        console.log(`Time tracking stopped for user: ${userId}. Total time: ${totalTimeSpent} seconds.`);
+        collect();
         sendTimeData();
     }
 
+    // Resume timing when the page becomes visible again
+    function resumeTracking() {
+        if (tracking && !sessionStartTime) {
+            sessionStartTime = Date.now();
+        }
+    }
+
     // Attach event listeners for tracking user activity
     function attachListeners() {
-        window.addEventListener('beforeunload', stopTracking);
+        window.addEventListener('pagehide', stopTracking);
         document.addEventListener('visibilitychange', () => {
             if (document.visibilityState === 'hidden') stopTracking();
+            else resumeTracking();
         });
     }
 
     return { init, stopTracking, attachListeners };
 })();
 
-// Initialize tracker with the user's ID
-TimeTracker.init("user123");
+// Start tracking, time is reported for the logged in user
+TimeTracker.init();
 TimeTracker.attachListeners();
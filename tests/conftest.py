@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import jwt
+import pytest
+
+# The app reads its database settings at import time, point it at a scratch SQLite file first
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+DATABASE = os.path.join(tempfile.mkdtemp(prefix='flocker-tests-'), 'test.db')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{DATABASE}"
+
+from __init__ import db  # noqa: E402
+from main import create_app  # noqa: E402
+from model.user import User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(uid, role='User', email=None, password='password'):
+    user = User(name=uid.title(), uid=uid, password=password, role=role, email=email or f"{uid}@example.com")
+    user.create()
+    return user
+
+
+def login_token(app, client, user):
+    """
+    Sets the JWT cookie that token_required reads, as /api/authenticate would.
+    """
+    token = jwt.encode({"_uid": user._uid}, app.config["SECRET_KEY"], algorithm="HS256")
+    client.set_cookie(app.config["JWT_TOKEN_NAME"], token)
+
+
+def login_admin(client, user, password='password'):
+    """
+    Logs in to the admin console session used by admin_only.
+    """
+    return client.post('/login', data={'username': user._uid, 'password': password})
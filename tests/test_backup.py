@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from __init__ import db
+from backup import backup_incremental, dump_database, load_dump, load_levels, restore_all, restore_incremental
+from conftest import make_user
+from model.channel import Channel
+from model.message import Message, MessageHistory
+from model.post import Post
+from model.user import User
+
+
+def test_restore_keeps_existing_emails(app):
+    make_user('ada', email='ada@example.com')
+    make_user('bob', email='bob@example.com')
+
+    restore_all({'users': [
+        {'uid': 'ada', 'name': 'Ada', 'email': 'ada@newmail.com'},
+        {'uid': 'bob', 'name': 'Bob'},
+        {'uid': 'cy', 'name': 'Cy'},
+    ]})
+
+    emails = dict(User.query.with_entities(User._uid, User._email).all())
+    assert emails == {'ada': 'ada@newmail.com', 'bob': 'bob@example.com', 'cy': '?'}
+
+
+def test_restore_matches_posts_by_id_not_title(app):
+    author = make_user('ada')
+    channel = Channel('general', None)
+    db.session.add(channel)
+    db.session.commit()
+    rows = [
+        {'id': 1, 'title': 'Same', 'comment': 'first', 'user_name': author._name, 'channel_name': 'general'},
+        {'id': 2, 'title': 'Same', 'comment': 'second', 'user_name': author._name, 'channel_name': 'general'},
+    ]
+
+    restore_all({'posts': rows})
+    rows[0]['comment'] = 'edited'
+    report = restore_all({'posts': rows})
+
+    assert report['posts']['updated'] == 2
+    comments = dict(Post.query.with_entities(Post.id, Post._comment).all())
+    assert comments == {1: 'edited', 2: 'second'}
+
+
+def test_restore_resolves_post_authors_by_uid(app):
+    first, second = make_user('ada'), make_user('ada2')
+    second._name = first._name
+    db.session.add(Channel('general', None))
+    db.session.commit()
+    row = {'title': 'Hi', 'user_name': first._name, 'channel_name': 'general'}
+
+    restore_all({'posts': [dict(row, id=1, user_uid='ada2'), dict(row, id=2)]})
+
+    # Without a uid the shared name is ambiguous, so that row is skipped rather than given to the wrong user
+    assert Post.query.with_entities(Post.id, Post._user_id).all() == [(1, second.id)]
+
+
+def test_failed_load_dump_leaves_the_database_unchanged(app, tmp_path):
+    make_user('ada')
+    manifest = dump_database(str(tmp_path), fmt='ndjson', compression='none')
+    make_user('bob')
+    # A truncated dump of the last table fails its row count check after every other table loaded
+    manifest["tables"][manifest["order"][-1]]["rows"] += 1
+    (tmp_path / 'manifest.json').write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError):
+        load_dump(str(tmp_path))
+
+    db.session.remove()
+    assert sorted(uid for uid, in User.query.with_entities(User._uid)) == ['ada', 'bob']
+
+
+def test_load_levels_put_parents_before_children(app):
+    tables = [table for table in db.metadata.sorted_tables if table.name in ('users', 'channels', 'posts', 'votes', 'groups', 'sections')]
+
+    levels = [sorted(table.name for table in level) for level in load_levels(tables)]
+
+    assert levels == [['sections', 'users'], ['groups'], ['channels'], ['posts'], ['votes']]
+
+
+def test_incremental_after_a_base_backup_exports_new_changes(app, tmp_path):
+    make_user('ada')
+    base = backup_incremental(str(tmp_path), compression='none')
+    make_user('bob')
+
+    incremental = backup_incremental(str(tmp_path), compression='none')
+
+    assert incremental["kind"] == "incremental"
+    assert incremental["watermark"] > base["watermark"]
+    assert incremental["tables"]["users"]["rows"] == 1
+
+
+def test_incremental_restore_replays_message_edits_and_deletes(app, tmp_path):
+    db.session.add(Channel('general', None))
+    db.session.commit()
+    edited, deleted = Message(1, 'ada', 'first'), Message(1, 'ada', 'second')
+    db.session.add_all([edited, deleted])
+    db.session.commit()
+    backup_incremental(str(tmp_path), compression='none')
+
+    edited._msg = 'first, edited'
+    db.session.delete(deleted)
+    db.session.commit()
+    history = MessageHistory(flush_interval=3600)
+    history.record('general', {'username': 'bob', 'msg': 'third'})
+    history.flush()
+    backup_incremental(str(tmp_path), compression='none')
+
+    restore_incremental(str(tmp_path))
+    db.session.remove()
+    assert [message._msg for message in Message.query.order_by(Message.id)] == ['first, edited', 'third']
+
+
+def test_backup_after_a_restore_is_a_full_dump(app, tmp_path):
+    make_user('ada')
+    backup_incremental(str(tmp_path), compression='none')
+    restore_all({'users': [{'uid': 'bob', 'name': 'Bob'}]})
+
+    after = backup_incremental(str(tmp_path), compression='none')
+
+    assert after["kind"] == "dump"
+    assert backup_incremental(str(tmp_path), compression='none')["kind"] == "incremental"
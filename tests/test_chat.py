@@ -0,0 +1,27 @@
+from __init__ import socketio
+from model.presence import presence_store
+
+
+def test_disconnect_without_leave_clears_presence(app):
+    client = socketio.test_client(app)
+    client.emit('join', {'username': 'ada', 'room': 'lobby'})
+    assert 'ada' in presence_store.get_users('lobby')
+
+    client.disconnect()
+
+    assert 'ada' not in presence_store.get_users('lobby')
+
+
+def test_leave_then_disconnect_announces_once(app):
+    watcher = socketio.test_client(app)
+    watcher.emit('join', {'username': 'bob', 'room': 'den'})
+    client = socketio.test_client(app)
+    client.emit('join', {'username': 'ada', 'room': 'den'})
+    client.emit('leave', {'username': 'ada', 'room': 'den'})
+    watcher.get_received()
+
+    client.disconnect()
+
+    assert presence_store.get_users('den') == ['bob']
+    assert watcher.get_received() == []
+    watcher.disconnect()
@@ -0,0 +1,40 @@
+from conftest import login_admin, make_user
+
+
+def test_unchanged_queue_answers_304(client):
+    admin = make_user('helpadmin', role='Admin')
+    login_admin(client, admin)
+    assert client.post('/api/help_requests', json={'message': 'Stuck on lesson 3'}).status_code == 201
+
+    first = client.get('/api/help_requests')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.get('/api/help_requests', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+
+    client.post('/api/help_requests', json={'message': 'Another question'})
+    third = client.get('/api/help_requests', headers={'If-None-Match': etag})
+    assert third.status_code == 200
+    assert third.headers['ETag'] != etag
+
+
+def test_since_cursor_does_not_resend_the_newest_change(client):
+    admin = make_user('helpadmin', role='Admin')
+    login_admin(client, admin)
+    client.post('/api/help_requests', json={'message': 'First'})
+    client.post('/api/help_requests', json={'message': 'Second'})
+
+    full = client.get('/api/help_requests')
+    assert len(full.get_json()) == 2
+    cursor = full.headers['X-Help-Cursor']
+
+    empty = client.get('/api/help_requests', query_string={'since': cursor})
+    assert empty.status_code == 200
+    assert empty.get_json() == []
+
+    created = client.post('/api/help_requests', json={'message': 'Third'}).get_json()
+    changes = client.get('/api/help_requests', query_string={'since': cursor})
+    assert [help_request['id'] for help_request in changes.get_json()] == [created['id']]
+    assert changes.headers['X-Help-Cursor'] != cursor
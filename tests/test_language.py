@@ -0,0 +1,35 @@
+from __init__ import db
+from conftest import login_admin, make_user
+from model.language import Language
+
+
+def test_upvote_counts_votes_made_since_the_language_was_read(app):
+    language = Language('Python', 'Guido van Rossum')
+    language.create()
+    language_id = language.id
+    stale = Language.query.get(language_id)
+    # Another worker upvotes after this session read the row
+    with db.engine.begin() as connection:
+        table = Language.__table__
+        connection.execute(table.update().where(table.c.id == language_id).values(_popularity=table.c._popularity + 1))
+
+    stale.upvote()
+    stale.upvote()
+
+    assert Language.query.get(language_id).popularity == 3
+
+
+def test_ranking_is_admin_only(client):
+    assert client.get('/api/languagemet').status_code == 401
+    login_admin(client, make_user('langadmin', role='Admin'))
+    assert client.get('/api/languagemet').status_code == 200
+
+
+def test_non_numeric_popularity_is_rejected(client):
+    login_admin(client, make_user('langadmin', role='Admin'))
+
+    assert client.post('/api/languagemet', json={'name': 'Go', 'creator': 'Pike', 'popularity': 'lots'}).status_code == 400
+    created = client.post('/api/languagemet', json={'name': 'Go', 'creator': 'Pike', 'popularity': '2'})
+    language_id = created.get_json()['language']['id']
+    assert client.put('/api/languagemet', json={'id': language_id, 'name': 'Golang', 'popularity': 'lots'}).status_code == 400
+    assert Language.query.get(language_id).read()['name'] == 'Go'
@@ -0,0 +1,31 @@
+from model.leaderboard import Leaderboard
+from model.presence import MemoryPresenceStore
+
+
+def test_workers_sharing_a_store_see_each_others_scores():
+    store = MemoryPresenceStore()
+    first, second = Leaderboard(store=store), Leaderboard(store=store)
+
+    first.add('ada')
+    second.add('bob')
+    assert first.add('bob') is False
+    first.update('ada', 5)
+    second.update('bob', 9)
+
+    expected = [{"rank": 1, "name": "bob", "score": 9}, {"rank": 2, "name": "ada", "score": 5}]
+    assert first.top() == expected
+    assert second.top() == expected
+    assert first.rank('ada') == {"rank": 2, "name": "ada", "score": 5, "players": 2}
+
+
+def test_own_writes_do_not_reload_the_store():
+    store = MemoryPresenceStore()
+    leaderboard = Leaderboard(store=store)
+    leaderboard.add('ada')
+    reloads = []
+    get_players = store.get_players
+    store.get_players = lambda: reloads.append(1) or get_players()
+
+    leaderboard.update('ada', 3)
+    assert leaderboard.top() == [{"rank": 1, "name": "ada", "score": 3}]
+    assert reloads == []
@@ -0,0 +1,35 @@
+import pytest
+
+from __init__ import db
+from model.channel import Channel
+from model.message import Message, MessageHistory
+
+
+def test_room_is_persisted_once_its_channel_exists(app):
+    history = MessageHistory(flush_interval=3600)
+    history.record('later', {'username': 'ada', 'msg': 'before'})
+    assert history.flush() == 0
+
+    db.session.add(Channel('later', None))
+    db.session.commit()
+    history.record('later', {'username': 'ada', 'msg': 'after'})
+
+    assert history.flush() == 1
+    assert [message._msg for message in Message.query.all()] == ['after']
+
+
+def test_failed_flush_keeps_the_messages_for_the_next_one(app):
+    db.session.add(Channel('general', None))
+    db.session.commit()
+    history = MessageHistory(flush_interval=3600, max_pending=2)
+    for text in ('one', 'two', 'three'):
+        history.record('general', {'username': 'ada', 'msg': text})
+    db.session.remove()
+    Message.__table__.drop(db.engine)
+
+    with pytest.raises(Exception):
+        history.flush()
+
+    Message.__table__.create(db.engine)
+    assert history.flush() == 2
+    assert [message._msg for message in Message.query.order_by(Message.id)] == ['two', 'three']
@@ -0,0 +1,56 @@
+from conftest import login_admin, make_user
+from model.metric import Metric
+
+
+def test_post_and_chat_writes_move_their_counters(app, client):
+    admin = make_user('metricadmin', role='Admin')
+    login_admin(client, admin)
+
+    created = client.post('/api/postmet', json={'title': 'Hi', 'comment': 'First', 'channel_id': 1, 'content': 'text'})
+    assert created.status_code == 201
+    assert Metric.total('posts') == 1
+    assert client.put('/api/postmet', json={'id': created.get_json()['id'], 'comment': 'Edited'}).status_code == 200
+    assert Metric.total('posts') == 1
+    assert client.delete('/api/postmet', json={'id': created.get_json()['id']}).status_code == 200
+    assert Metric.total('posts') == 0
+
+    assert client.post('/api/chatmet', json={'message': 'hello', 'channel_id': 1}).status_code == 201
+    assert Metric.total('messages') == 1
+    chat_id = client.get('/api/chatmet').get_json()[0]['id']
+    assert client.delete('/api/chatmet', json={'id': chat_id}).status_code == 200
+    assert Metric.total('messages') == 0
+
+
+def test_switching_a_vote_moves_it_between_counters(app, client):
+    admin = make_user('metricadmin', role='Admin')
+    login_admin(client, admin)
+    post_id = client.post('/api/postmet', json={'title': 'Hi', 'comment': 'Vote', 'channel_id': 1}).get_json()['id']
+
+    vote = client.post('/api/votemet', json={'post_id': post_id, 'vote_type': 'upvote'})
+    assert vote.status_code == 201
+    assert client.post('/api/votemet', json={'post_id': post_id, 'vote_type': 'upvote'}).status_code == 409
+    assert (Metric.total('upvotes'), Metric.total('downvotes')) == (1, 0)
+
+    vote_id = vote.get_json()['id']
+    assert client.put('/api/votemet', json={'id': vote_id, 'vote_type': 'downvote'}).status_code == 200
+    assert (Metric.total('upvotes'), Metric.total('downvotes')) == (0, 1)
+
+    assert client.delete('/api/votemet', json={'id': vote_id}).status_code == 200
+    assert (Metric.total('upvotes'), Metric.total('downvotes')) == (0, 0)
+
+
+def test_metric_writes_need_an_admin(client):
+    assert client.post('/api/votemet', json={'post_id': 1, 'vote_type': 'upvote'}).status_code == 401
+    assert client.delete('/api/pollmet', json={'id': 1}).status_code == 401
+
+
+def test_non_integer_ids_are_rejected(app, client):
+    admin = make_user('metricadmin', role='Admin')
+    login_admin(client, admin)
+
+    assert client.post('/api/postmet', json={'title': 'Hi', 'comment': 'Bad', 'channel_id': 'general'}).status_code == 400
+    assert client.post('/api/chatmet', json={'message': 'hello', 'channel_id': [1]}).status_code == 400
+    assert client.post('/api/votemet', json={'post_id': 1.5, 'vote_type': 'upvote'}).status_code == 400
+    assert client.put('/api/postmet', json={'id': 'one', 'comment': 'Edited'}).status_code == 400
+    assert client.delete('/api/pollmet', json={'id': {'id': 1}}).status_code == 400
+    assert Metric.total('posts') == 0
@@ -0,0 +1,69 @@
+from model.presence import RedisPresenceStore
+
+
+class FakeRedis:
+    """
+    The redis.Redis commands RedisPresenceStore uses, answering with bytes like the real client.
+    """
+    def __init__(self):
+        self.sets, self.hashes, self.values = {}, {}, {}
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member.encode())
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def hsetnx(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        if field.encode() in fields:
+            return 0
+        fields[field.encode()] = str(value).encode()
+        return 1
+
+    def hexists(self, key, field):
+        return field.encode() in self.hashes.get(key, {})
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = str(value).encode()
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def get(self, key):
+        value = self.values.get(key)
+        return None if value is None else str(value).encode()
+
+
+def test_rooms_and_scores_round_trip_through_redis():
+    client = FakeRedis()
+    store = RedisPresenceStore(client, prefix='test')
+
+    store.add_user('general', 'ada')
+    store.add_user('general', 'bob')
+    store.remove_user('general', 'bob')
+    assert store.get_users('general') == ['ada']
+    assert store.get_users('empty') == []
+
+    assert store.players_version() == 0
+    assert store.add_player('ada') is True
+    assert store.add_player('ada') is False
+    assert store.set_score('ada', 7) is True
+    assert store.set_score('nobody', 1) is False
+    assert store.get_players() == [{"name": "ada", "score": 7}]
+    assert store.players_version() == 2
+
+
+def test_stores_sharing_a_client_see_the_same_state():
+    client = FakeRedis()
+    first, second = RedisPresenceStore(client, prefix='test'), RedisPresenceStore(client, prefix='test')
+    first.add_user('general', 'ada')
+    assert second.get_users('general') == ['ada']
+    assert RedisPresenceStore(client, prefix='other').get_users('general') == []
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.querywatch import QueryBudgetExceeded, query_budget, record_query_watch
+from conftest import make_user
+from model.user import User
+
+
+def test_block_over_its_budget_fails(app):
+    make_user('ada')
+    make_user('bob')
+
+    with pytest.raises(QueryBudgetExceeded, match='ran 3 queries, budget is 2'):
+        with query_budget(2):
+            for uid in ('ada', 'bob', 'cy'):
+                User.query.filter_by(_uid=uid).first()
+
+
+def test_block_within_its_budget_passes_and_removes_the_listeners(app):
+    with query_budget(1) as log:
+        User.query.all()
+
+    assert log.count == 1
+    assert not event.contains(Engine, 'after_cursor_execute', record_query_watch)
@@ -0,0 +1,20 @@
+import time
+
+from api.ratelimit import RateLimiter
+
+
+def test_buckets_are_capped_for_client_chosen_keys():
+    limiter = RateLimiter(rate=1, capacity=5, max_keys=3)
+    for room in range(100):
+        limiter.allow(f"room-{room}")
+    assert len(limiter._buckets) == 3
+
+
+def test_refilled_buckets_are_dropped_and_busy_ones_kept():
+    limiter = RateLimiter(rate=100, capacity=1, max_keys=100)
+    limiter.allow('idle')
+    time.sleep(0.05)
+    assert limiter.allow('busy')
+    assert not limiter.allow('busy')
+    limiter.allow('new')
+    assert list(limiter._buckets) == ['busy', 'new']
@@ -0,0 +1,33 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_command(command):
+    """
+    Runs a custom CLI command in a fresh interpreter, where create_app() never imported the API modules, and returns
+    the tables of the database it wrote.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix='flocker-schema-'), 'schema.db')
+    env = {**os.environ, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}"}
+    result = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'main', 'custom', command],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    with sqlite3.connect(path) as connection:
+        return {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_generate_data_creates_every_table():
+    tables = run_command('generate_data')
+    assert {'help_requests', 'time_entries', 'messages', 'votes', 'languages', 'users', 'posts'} <= tables
+
+
+def test_create_schema_creates_every_table():
+    tables = run_command('create_schema')
+    assert {'help_requests', 'time_entries', 'messages', 'votes', 'languages'} <= tables
@@ -0,0 +1,39 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from __init__ import db
+from api.stats import RequestStats
+
+
+def test_concurrent_records_are_all_counted(tmp_path):
+    stats = RequestStats(multiproc_dir=str(tmp_path), dump_interval=0)
+
+    def work():
+        for _ in range(500):
+            stats.record('GET', '/api/id', 200, 0.001, response_bytes=10, db_queries=1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    routes = stats.aggregate()
+    route = routes[('GET', '/api/id')]
+    assert route.latency.total == 4000
+    assert route.statuses == {'200': 4000}
+    assert route.db_queries == 4000
+    assert [path.name for path in tmp_path.iterdir()] == [f"{os.getpid()}.json"]
+
+
+def test_failed_statement_does_not_leave_its_timer(app):
+    connection = db.session.connection()
+    with pytest.raises(Exception):
+        connection.execute(text('SELECT * FROM no_such_table'))
+    db.session.rollback()
+    connection = db.session.connection()
+    connection.execute(text('SELECT 1'))
+    assert connection.info.get('query_started') == []
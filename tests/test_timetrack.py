@@ -0,0 +1,46 @@
+import pytest
+
+from __init__ import db
+from conftest import login_token, make_user
+from model.timetrack import TimeEntry, TimeTrackBuffer
+
+
+def test_time_is_recorded_for_the_logged_in_user(app, client):
+    ada = make_user('ada')
+    make_user('bob')
+    login_token(app, client, ada)
+
+    sent = client.post('/api/track_time', json={'user_id': 'bob', 'events': [{'page': '/home', 'time_spent': 30}]})
+    assert sent.status_code == 202
+
+    totals = client.get('/api/track_time?group=page').get_json()
+    assert totals and all(total.get('page') == '/home' for total in totals)
+    login_token(app, client, make_user('admin', role='Admin'))
+    by_user = client.get('/api/track_time?group=user').get_json()
+    assert [total['user'] for total in by_user] == ['ada']
+
+
+def test_anonymous_beacons_are_rejected(client):
+    sent = client.post('/api/track_time', json={'user_id': 'ada', 'time_spent': 30, 'page': '/home'})
+    assert sent.status_code == 401
+
+
+def test_events_that_are_not_objects_are_rejected(app, client):
+    login_token(app, client, make_user('ada'))
+    sent = client.post('/api/track_time', json={'events': ['/home', 30]})
+    assert sent.status_code == 400
+
+
+def test_failed_flush_keeps_the_time_for_the_next_one(app):
+    buffer = TimeTrackBuffer(flush_interval=3600)
+    buffer.record('ada', '/home', 10)
+    db.session.remove()
+    TimeEntry.__table__.drop(db.engine)
+
+    with pytest.raises(Exception):
+        buffer.flush()
+
+    buffer.record('ada', '/home', 5)
+    TimeEntry.__table__.create(db.engine)
+    assert buffer.flush() == 1
+    assert TimeEntry.totals('page') == [{"page": "/home", "seconds": 15, "visits": 2}]
@@ -0,0 +1,10 @@
+def test_accel_redirect_escapes_the_filename(app, client, monkeypatch, tmp_path):
+    (tmp_path / 'my photo?#%.png').write_bytes(b'png')
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'UPLOAD_ACCEL_REDIRECT', '/protected-uploads')
+
+    response = client.get('/uploads/my%20photo%3F%23%25.png')
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/protected-uploads/my%20photo%3F%23%25.png'
+    assert response.headers['Content-Type'] == 'image/png'